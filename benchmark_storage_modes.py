@@ -0,0 +1,47 @@
+#%%
+import time
+
+from solve_network import *
+from network_cache import load_network_cached
+
+list_renewable_carriers = ['solar','offwind-ac', 'onwind', 'biomass','ror', 'geothermal','hydro', 'offwind-ac', 'offwind-dc', 'Renewable_Storage']
+
+
+def benchmark(storage_mode, case='certificates', periods=24):
+    """Solve the Germany network in the given storage mode and measure the size of the LP and the solve time.
+
+    Args:
+        storage_mode (str): One of STORAGE_MODES.
+        case (str): 'unconstrained', 'co2cap' or 'certificates'.
+        periods (int): Number of hourly snapshots.
+
+    Returns:
+        dict: Number of variables, constraints, nonzeros, the wall time and the objective.
+    """
+    DE_1node = load_network_cached("elec_s_337.nc", periods=periods)
+    renewable_carriers = list(list_renewable_carriers)
+
+    start = time.perf_counter()
+    if case == 'unconstrained':
+        solve_network_unconstrained(DE_1node, renewable_carriers, storage_mode=storage_mode)
+    if case == 'co2cap':
+        solve_network_co2cap(DE_1node, renewable_carriers, co2_emissions=0.5*7319, storage_mode=storage_mode)
+    if case == 'certificates':
+        renewable_Shares = pd.Series(0.5, index=DE_1node.snapshots)
+        solve_network_certificates(DE_1node, renewable_Shares, renewable_carriers, storage_mode=storage_mode)
+    wall_time = time.perf_counter() - start
+
+    m = DE_1node.model
+    return {
+        'variables': m.nvars,
+        'constraints': m.ncons,
+        'nonzeros': len(m.constraints.flat),
+        'wall time [s]': wall_time,
+        'objective': DE_1node.objective,
+    }
+
+
+if __name__=="__main__":
+    results = pd.DataFrame({mode: benchmark(mode) for mode in STORAGE_MODES})
+    results['reduction [%]'] = 100 * (1 - results['soc_share'] / results['fictious'])
+    print(results)
@@ -0,0 +1,182 @@
+#%%
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import results
+from solve_network import *
+from synthetic_network import synthetic_network
+
+logger = logging.getLogger(__name__)
+
+CASES = ['unconstrained', 'co2cap', 'certificates']
+
+list_renewable_carriers = ['solar','offwind-ac', 'onwind', 'biomass','ror', 'geothermal','hydro', 'offwind-ac', 'offwind-dc', 'Renewable_Storage']
+
+# Quantities compared by find_regressions: the model size has to match exactly, times and memory may grow by the tolerance.
+SIZE_COLUMNS = ['variables', 'constraints', 'nonzeros']
+COST_COLUMNS = ['wall time [s]', 'peak rss [MB]']
+
+def peak_rss():
+    """Peak resident set size of this process in MB, the current one if only psutil is available, else None."""
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        return None
+
+def model_size(n):
+    """Number of variables, constraints and nonzeros of ``n.model``, None before the model is created."""
+    m = getattr(n, 'model', None)
+    if m is None:
+        return {column: None for column in SIZE_COLUMNS}
+    return {'variables': m.nvars, 'constraints': m.ncons, 'nonzeros': len(m.constraints.flat)}
+
+def run_benchmark(case, buses, storage_units, snapshots, storage_mode='fictious', solver_name=None, solver_profile='default', seed=0):
+    """Build, solve and post-process one case on a synthetic network and measure every stage.
+    The stages are those of the solve functions (the model is built stage by stage as in create_persistent_model):
+    building the network, preparing the renewable storage (create_fictious_storage_units), creating the model, the
+    storage constraints (storage_variables_constraints or renewable_soc_share_constraints), storage_restriction,
+    fix_bus_production (certificates only), the solve and the post-processing of case_selection.
+
+    Args:
+        case (str): One of CASES.
+        buses (int): Number of buses of the synthetic network.
+        storage_units (int): Number of buses with storage units.
+        snapshots (int): Number of hourly snapshots.
+        storage_mode (str): One of STORAGE_MODES.
+        solver_name (str): Solver, see solver_profiles.solver_settings.
+        solver_profile (str): Solver profile, see solver_profiles.solver_settings.
+        seed (int): Seed of the synthetic network.
+
+    Returns:
+        list: One dict per stage with wall time, peak RSS and the model size after the stage.
+    """
+    renewable_carriers = list(list_renewable_carriers)
+    records = []
+    n = None
+
+    def stage(name, function):
+        start = time.perf_counter()
+        value = function()
+        wall_time = time.perf_counter() - start
+        record = {
+            'case': case, 'buses': buses, 'storage units': storage_units, 'snapshots': snapshots,
+            'storage mode': storage_mode, 'stage': name, 'wall time [s]': wall_time, 'peak rss [MB]': peak_rss(),
+        }
+        record.update(model_size(n) if n is not None else {column: None for column in SIZE_COLUMNS})
+        records.append(record)
+        return value
+
+    n = stage('build network', lambda: synthetic_network(buses, snapshots, storage_units=storage_units, seed=seed))
+    storage_map = stage('prepare storage', lambda: prepare_renewable_storage(n, renewable_carriers, storage_mode))
+    if case == 'co2cap':
+        add_co2_limit(n, 0.5 * 0.3 * n.loads_t.p_set.sum().sum())
+    stage('create model', lambda: n.optimize.create_model(n.snapshots))
+    if storage_map is None:
+        stage('storage constraints', lambda: renewable_soc_share_constraints(n, n.snapshots))
+    else:
+        stage('storage constraints', lambda: storage_variables_constraints(n, n.snapshots, storage_map))
+    stage('storage restriction', lambda: storage_restriction(n, n.snapshots, renewable_carriers))
+    if case == 'certificates':
+        renewable_shares = pd.Series(0.5, index=n.snapshots)
+        stage('production share', lambda: fix_bus_production(n, n.snapshots, renewable_carriers, renewable_shares))
+    status, condition = stage('solve', lambda: solve_persistent_model(n, solver_name, solver_profile))
+    if status == 'ok':
+        stage('post-processing', lambda: postprocess(n))
+    for record in records:
+        record['status'] = status
+    return records
+
+def postprocess(n):
+    """The post-processing of case_selection: the carrier totals, the market and the production shares."""
+    dispatch = results.dispatch_by_bus_carrier(n)
+    production_total = results.production_total(dispatch)
+    storage_units_total = results.storage_units_total(dispatch)
+    market = results.market(dispatch)
+    production = pd.concat([n.generators_t.p, n.storage_units_t.p], axis=1).sum()
+    return production_total, storage_units_total, market, production / production.sum()
+
+def benchmark_suite(buses=(5, 20, 80), storage_units=(0, 5), snapshots=(24, 168), cases=CASES, **kwargs):
+    """Run the benchmark over the matrix of cases, bus counts, storage counts and snapshot lengths.
+    Every run is done in a fresh process, so the peak RSS belongs to that run only.
+
+    Args:
+        buses (tuple): Bus counts.
+        storage_units (tuple): Numbers of buses with storage units, capped at the bus count.
+        snapshots (tuple): Snapshot lengths.
+        cases (list): Cases to run.
+        **kwargs: Passed on to run_benchmark (storage_mode, solver_name, solver_profile, seed).
+
+    Returns:
+        pandas.DataFrame: One row per run and stage.
+    """
+    records = []
+    for case, bus_count, storage_count, snapshot_count in itertools.product(cases, buses, storage_units, snapshots):
+        storage_count = min(storage_count, bus_count)
+        logger.info(f"Benchmark {case} with {bus_count} buses, {storage_count} storage buses and {snapshot_count} snapshots.")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                records += executor.submit(run_benchmark, case, bus_count, storage_count, snapshot_count, **kwargs).result()
+            except Exception:
+                logger.exception(f"Benchmark {case} with {bus_count} buses failed.")
+    return pd.DataFrame(records)
+
+def write_benchmark(df, fn='benchmark_results.json'):
+    """Write the benchmark results with the versions of the packages as JSON."""
+    import linopy
+    document = {
+        'versions': {'pypsa': pypsa.__version__, 'linopy': linopy.__version__, 'pandas': pd.__version__},
+        'results': json.loads(df.to_json(orient='records')),
+    }
+    with open(fn, 'w') as f:
+        json.dump(document, f, indent=1)
+
+def read_benchmark(fn='benchmark_results.json'):
+    """Read benchmark results written by write_benchmark."""
+    with open(fn) as f:
+        return pd.DataFrame(json.load(f)['results'])
+
+def find_regressions(baseline, current, tolerance=0.25):
+    """Compare two benchmark results.
+    A change of the model size (variables, constraints, nonzeros) is always reported, wall time and peak RSS when
+    they grew by more than ``tolerance`` (relative).
+
+    Args:
+        baseline (pandas.DataFrame): Earlier results, as returned by benchmark_suite or read_benchmark.
+        current (pandas.DataFrame): New results.
+        tolerance (float): Relative increase of wall time and peak RSS that is accepted.
+
+    Returns:
+        pandas.DataFrame: One row per run, stage and quantity that changed, with the baseline and current value.
+    """
+    keys = ['case', 'buses', 'storage units', 'snapshots', 'storage mode', 'stage']
+    merged = baseline.merge(current, on=keys, suffixes=(' baseline', ' current'))
+    regressions = []
+    for column in SIZE_COLUMNS + COST_COLUMNS:
+        before, after = merged[column + ' baseline'], merged[column + ' current']
+        if column in SIZE_COLUMNS:
+            changed = (before != after) & before.notna()
+        else:
+            changed = after > before * (1 + tolerance)
+        rows = merged.loc[changed, keys].assign(quantity=column, baseline=before[changed], current=after[changed])
+        regressions.append(rows)
+    return pd.concat(regressions, ignore_index=True)
+
+
+if __name__=="__main__":
+    logging.basicConfig(level=logging.INFO)
+    df = benchmark_suite()
+    print(df.groupby(['case', 'buses', 'storage units', 'snapshots', 'stage'], sort=False)[['wall time [s]', 'peak rss [MB]'] + SIZE_COLUMNS].first())
+    write_benchmark(df, 'benchmark_results.json')
+    if os.path.exists('benchmark_baseline.json'):
+        regressions = find_regressions(read_benchmark('benchmark_baseline.json'), df)
+        print("Regressions against benchmark_baseline.json:\n", regressions)
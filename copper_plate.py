@@ -0,0 +1,143 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from pypsa.descriptors import get_switchable_as_dense as get_as_dense
+
+logger = logging.getLogger(__name__)
+
+BUS = 'copper plate'
+
+def is_uncongested(n, snapshots=None):
+    """Check whether the transmission can never be congested: every line, transformer and link (in both
+    directions) can carry the peak withdrawal on its own, as with lines.s_nom = 1000000 in the case scripts. No
+    branch carries more than all loads plus the storage units charging at full power (p_nom, p_nom_max if
+    extendable, times -p_min_pu) together. Stores can charge without a power limit, networks with stores are
+    treated as congested, and so are networks with links which have losses or marginal costs, since the copper
+    plate drops the links.
+    If the network is uncongested, the copper plate (copper_plate_network) keeps every generator and storage unit
+    and only drops the branch limits which can never bind, so it has the same optimal objective as the full
+    network. The dispatch of the single components is the same up to alternative optima.
+
+    Args:
+        n (PyPSA Network): PyPSA network.
+        snapshots (list or pandas.Index): Snapshots to check, defaults to n.snapshots.
+
+    Returns:
+        bool: True if no branch can be congested.
+    """
+    snapshots = n.snapshots if snapshots is None else snapshots
+    if not n.stores.empty:
+        return False
+    if not n.links.empty and ((n.links.efficiency != 1) | (n.links.marginal_cost != 0)).any():
+        return False
+    su = n.storage_units
+    charging = get_as_dense(n, 'StorageUnit', 'p_min_pu', snapshots).clip(upper=0).mul(-su.p_nom.where(~su.p_nom_extendable, su.p_nom_max)).sum(axis=1)
+    peak_withdrawal = (get_as_dense(n, 'Load', 'p_set', snapshots).sum(axis=1) + charging).max()
+    for component, nominal in [('Line', 's_nom'), ('Transformer', 's_nom'), ('Link', 'p_nom')]:
+        df = n.df(component)
+        if df.empty:
+            continue
+        if df[nominal + '_extendable'].any():
+            return False
+        capacity = df[nominal] * (df.s_max_pu if nominal == 's_nom' else np.minimum(df.p_max_pu, -df.p_min_pu))
+        if (capacity < peak_withdrawal).any():
+            return False
+    return True
+
+def capacity_weights(df):
+    """Weight of every component within a group of merged components: p_nom, for extendable components the finite
+    p_nom_max or 1."""
+    potential = df.p_nom_max.where(np.isfinite(df.p_nom_max), 1.)
+    return df.p_nom.where(~df.p_nom_extendable, potential).clip(lower=1e-9)
+
+def copper_plate_network(n):
+    """Collapse the network to a single bus without transmission.
+    Every generator, storage unit, store and load is kept with all its attributes and time series and only moved
+    onto the single bus, so the site specific availability profiles stay as they are. Lines, transformers and links
+    are dropped, of the GlobalConstraints only the primary energy ones (e.g. CO2Limit) are taken over. Fictious
+    storage units of the original network are kept with their real storage units. To merge equivalent components
+    as well, solve the copper plate with presolve=True, see presolve.presolved.
+
+    Args:
+        n (PyPSA Network): PyPSA network.
+
+    Returns:
+        PyPSA Network: The copper plate network.
+    """
+    cp = n.copy()
+    for component in ['Line', 'Transformer', 'Link']:
+        cp.mremove(component, cp.df(component).index)
+
+    gc = cp.global_constraints
+    primary_energy = gc[gc.type == 'primary_energy']
+    if len(primary_energy) < len(gc):
+        logger.warning(f"Only primary energy GlobalConstraints are taken over to the copper plate, dropped {list(gc.index.difference(primary_energy.index))}.")
+        cp.mremove('GlobalConstraint', gc.index.difference(primary_energy.index))
+
+    buses = cp.buses.index
+    cp.add('Bus', BUS, carrier=cp.buses.carrier.iloc[0] if len(buses) else 'AC')
+    for component in ['Generator', 'Load', 'StorageUnit', 'Store', 'ShuntImpedance']:
+        cp.df(component)['bus'] = BUS
+    cp.mremove('Bus', buses)
+    return cp
+
+def attribute_to_buses(n, cp):
+    """Copy the results of the copper plate back to the components of the original network.
+    The generators and storage units of the copper plate are those of the network, their optimized capacities and
+    dispatch are copied. Fictious storage units of the copper plate which the network does not have are added to
+    their real storage units (real_storage_unit), so the original storage units get their combined dispatch. All
+    buses get the price of the copper plate; line flows are not computed.
+
+    Args:
+        n (PyPSA Network): The original network, the results are written to it.
+        cp (PyPSA Network): The solved copper plate network.
+    """
+    n.generators['p_nom_opt'] = cp.generators.p_nom_opt.reindex(n.generators.index)
+    n.generators_t.p = cp.generators_t.p.reindex(columns=n.generators.index)
+
+    if not n.storage_units.empty:
+        n.storage_units['p_nom_opt'] = cp.storage_units.p_nom_opt.reindex(n.storage_units.index)
+        real = cp.storage_units.index.to_series()
+        if 'real_storage_unit' in cp.storage_units:
+            twin = (cp.storage_units.real_storage_unit.fillna('') != '') & ~cp.storage_units.index.isin(n.storage_units.index)
+            real[twin] = cp.storage_units.real_storage_unit[twin]
+        for attr in ['p', 'p_store', 'p_dispatch', 'state_of_charge', 'spill']:
+            if attr in cp.storage_units_t and not cp.storage_units_t[attr].empty:
+                combined = cp.storage_units_t[attr].T.groupby(real).sum().T
+                n.storage_units_t[attr] = combined.reindex(columns=n.storage_units.index, fill_value=0.)
+
+    n.loads_t.p = get_as_dense(n, 'Load', 'p_set')
+    n.buses_t.marginal_price = pd.DataFrame(
+        np.tile(cp.buses_t.marginal_price[BUS].values[:, None], len(n.buses)), index=cp.snapshots, columns=n.buses.index
+    )
+    n.objective = cp.objective
+    n.solver_statistics = getattr(cp, 'solver_statistics', [])
+
+def solve_copper_plate(n, solve, *args, assume_uncongested=False, **kwargs):
+    """Solve the network as a copper plate and attribute the results back to its buses.
+    Unless ``assume_uncongested``, the network is checked with is_uncongested first.
+
+    Example:
+        cp = solve_copper_plate(DE_1node, solve_network_co2cap, list_renewable_carriers, 3659)
+
+    Args:
+        n (PyPSA Network): PyPSA network, it is not prepared or solved itself, the results are written to it.
+        solve (callable): One of the solve_network_* functions.
+        *args: Passed on to solve, e.g. renewable_carriers and co2_emissions.
+        assume_uncongested (bool): Skip the congestion check.
+        **kwargs: Passed on to solve.
+
+    Returns:
+        PyPSA Network: The solved copper plate network.
+    """
+    if not assume_uncongested and not is_uncongested(n, kwargs.get('snapshots')):
+        raise ValueError("The transmission of the network can be congested, pass assume_uncongested=True to solve it as a copper plate anyway.")
+    cp = copper_plate_network(n)
+    logger.info(f"Copper plate with {len(cp.generators)} generators and {len(cp.storage_units)} storage units on one bus instead of {len(n.buses)} buses and {len(n.lines) + len(n.transformers) + len(n.links)} branches.")
+    status, condition = solve(cp, *args, **kwargs)
+    if status == 'ok':
+        attribute_to_buses(n, cp)
+    else:
+        logger.warning(f"The copper plate could not be solved: {condition}.")
+    return cp
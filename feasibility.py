@@ -0,0 +1,172 @@
+import logging
+
+import pandas as pd
+from pypsa.descriptors import get_switchable_as_dense as get_as_dense
+
+logger = logging.getLogger(__name__)
+
+# Relative tolerance of the comparisons, targets closer to the bounds than this are not rejected.
+TOLERANCE = 1e-6
+# Number of snapshots named in the diagnostics.
+SHOWN_SNAPSHOTS = 5
+
+def available_power(n, component, snapshots, index=None):
+    """Upper bound of the output of every component per snapshot: p_nom * p_max_pu, with p_nom_max for extendable
+    components (infinite if their potential is unlimited).
+
+    Args:
+        n (PyPSA Network): PyPSA network.
+        component (str): "Generator" or "StorageUnit".
+        snapshots (pandas.Index): Snapshots.
+        index (pandas.Index): Components, defaults to all.
+
+    Returns:
+        pandas.DataFrame: Snapshots x components.
+    """
+    df = n.df(component) if index is None else n.df(component).loc[index]
+    capacity = df.p_nom.where(~df.p_nom_extendable, df.p_nom_max)
+    return (get_as_dense(n, component, 'p_max_pu', snapshots, df.index).clip(lower=0) * capacity).fillna(0.)
+
+def renewable_demand(n, snapshots):
+    """Demand the renewable shares refer to: the time dependent loads (loads_t.p_set) summed per snapshot. The
+    production_share constraint (solve_network.renewable_requirement) and the precheck both use it.
+
+    Returns:
+        pandas.Series: Demand per snapshot.
+    """
+    return n.loads_t.p_set.loc[snapshots].sum(axis=1)
+
+def storage_bounds(n, snapshots):
+    """Dispatch bound per snapshot of the real storage units and the energy all storage units can release over the
+    snapshots (initial state of charge of the non-cyclic storage units and the inflow). The fictious storage units
+    share the dispatch capacity of their real storage unit and are left out of the dispatch bound.
+
+    Returns:
+        tuple: pandas.Series of the dispatch bound per snapshot and the releasable energy (float).
+    """
+    storage_units = n.storage_units
+    real = storage_units.index
+    if 'real_storage_unit' in storage_units:
+        real = real[storage_units.real_storage_unit.fillna('') == '']
+    dispatch = available_power(n, 'StorageUnit', snapshots, real).sum(axis=1)
+    weights = n.snapshot_weightings.stores.loc[snapshots]
+    inflow = get_as_dense(n, 'StorageUnit', 'inflow', snapshots).sum(axis=1)
+    energy = storage_units.state_of_charge_initial[~storage_units.cyclic_state_of_charge].sum() + (weights * inflow).sum()
+    return dispatch, energy
+
+def binding_snapshots(margin):
+    """The SHOWN_SNAPSHOTS snapshots with the smallest margin, as text."""
+    return ', '.join(str(snapshot) for snapshot in margin.nsmallest(SHOWN_SNAPSHOTS).index)
+
+def precheck_co2_limit(n, co2_emissions, snapshots=None):
+    """Reject CO2 caps which are provably infeasible, before the model is built.
+    The load which cannot be covered by the emission free generators and the storage units has to be covered by
+    emitting generators, per snapshot (bounded by the dispatch of the storage units) and over all snapshots
+    (bounded by the energy the storage units can release). The larger of both, times the lowest emission intensity
+    (co2_emissions of the carrier / efficiency) of the emitting generators, is a lower bound of the emissions.
+    Stores are not bounded this way, networks with stores are not prechecked.
+
+    Args:
+        n (PyPSA Network): PyPSA network.
+        co2_emissions (float): The CO2 cap.
+        snapshots (list or pandas.Index): Snapshots to optimize, defaults to n.snapshots.
+
+    Returns:
+        pandas.DataFrame: Per snapshot the load, the emission free generation and storage dispatch bounds and the
+        load which has to be covered by emitting generators.
+
+    Raises:
+        ValueError: If the emissions of every feasible dispatch exceed the cap.
+    """
+    snapshots = n.snapshots if snapshots is None else pd.Index(snapshots)
+    weights = n.snapshot_weightings.generators.loc[snapshots]
+    load = get_as_dense(n, 'Load', 'p_set', snapshots).sum(axis=1)
+    intensity = n.generators.carrier.map(n.carriers.co2_emissions).fillna(0) / n.generators.efficiency
+    clean = available_power(n, 'Generator', snapshots, intensity.index[intensity <= 0]).sum(axis=1)
+    storage, storage_energy = storage_bounds(n, snapshots)
+    diagnostic = pd.DataFrame({'load': load, 'emission free': clean, 'storage': storage})
+    diagnostic['emitting'] = (load - clean - storage).clip(lower=0)
+
+    if (intensity < 0).any():
+        logger.info("Generators with negative emissions, the CO2 cap is not prechecked.")
+        return diagnostic
+    if not n.stores.empty:
+        logger.info("The network has stores, the CO2 cap is not prechecked.")
+        return diagnostic
+    emitting_energy = max((weights * diagnostic.emitting).sum(), (weights * (load - clean)).sum() - storage_energy)
+    emitting = intensity[intensity > 0]
+    if emitting_energy > TOLERANCE * (weights * load).sum():
+        if emitting.empty:
+            raise ValueError(
+                f"The load cannot be covered without emitting generators, which the network does not have; "
+                f"at least {emitting_energy:.0f} MWh are missing, most in the snapshots {binding_snapshots(-diagnostic.emitting)}."
+            )
+        minimum = emitting_energy * emitting.min()
+        if minimum > co2_emissions * (1 + TOLERANCE) + TOLERANCE:
+            raise ValueError(
+                f"The CO2 cap of {co2_emissions} t is infeasible: at least {emitting_energy:.0f} MWh have to come from "
+                f"emitting generators, emitting at least {minimum:.0f} t; the emission free generation and the storage "
+                f"units fall short most in the snapshots {binding_snapshots(-diagnostic.emitting)}."
+            )
+        logger.info(
+            f"The CO2 cap of {co2_emissions} t cannot be ruled out, the emissions are at least {minimum:.0f} t. "
+            f"Binding snapshots (the emission free generation and storage units fall short most): {binding_snapshots(-diagnostic.emitting)}."
+        )
+    else:
+        logger.info(
+            f"The CO2 cap of {co2_emissions} t cannot be ruled out. Snapshots with the least emission free headroom: "
+            f"{binding_snapshots(clean + storage - load)}."
+        )
+    return diagnostic
+
+def precheck_renewable_shares(n, renewable_shares, renewable_carriers, snapshots=None, periods=None):
+    """Reject renewable shares which are provably infeasible, before the model is built.
+    In every snapshot (or, weighted by the snapshot weightings, in every settlement period) the renewable generation
+    plus the dispatch of the storage units has to reach the share of the load (see fix_bus_production), and over all
+    snapshots the renewable generation plus the energy the storage units can release has to reach the required
+    renewable energy.
+
+    Args:
+        n (PyPSA Network): PyPSA network.
+        renewable_shares (pandas.Series): Minimum renewable share per snapshot, as returned by define_RE_share(n, renewable_share).
+        renewable_carriers (list): Carriers which are counted as renewable.
+        snapshots (list or pandas.Index): Snapshots to optimize, defaults to n.snapshots.
+        periods (pandas.Series): Settlement period per snapshot, see solve_network.settlement_periods, None if every
+            snapshot is settled on its own.
+
+    Returns:
+        pandas.DataFrame: Per snapshot (or settlement period) the required renewable production, the renewable
+        generation and storage dispatch bounds and the margin between them.
+
+    Raises:
+        ValueError: If the shares cannot be reached in some snapshot or over all snapshots.
+    """
+    snapshots = n.snapshots if snapshots is None else pd.Index(snapshots)
+    weights = n.snapshot_weightings.generators.loc[snapshots]
+    required = renewable_demand(n, snapshots) * renewable_shares.loc[snapshots]
+    renewable = n.generators.index[n.generators.carrier.isin(renewable_carriers)]
+    generation = available_power(n, 'Generator', snapshots, renewable).sum(axis=1)
+    storage, storage_energy = storage_bounds(n, snapshots)
+    diagnostic = pd.DataFrame({'required': required, 'renewable': generation, 'storage': storage})
+    unit = 'MW'
+    if periods is not None:
+        diagnostic = diagnostic.mul(weights, axis=0).groupby(periods, sort=False).sum()
+        unit = 'MWh'
+    diagnostic['margin'] = diagnostic.renewable + diagnostic.storage - diagnostic.required
+
+    short = diagnostic.margin < -TOLERANCE * diagnostic.required.abs().clip(lower=1)
+    if short.any():
+        raise ValueError(
+            f"The renewable shares are infeasible in {short.sum()} {'snapshots' if periods is None else 'settlement periods'}: "
+            f"the renewable generation and the storage units fall short by {-diagnostic.margin[short].sum():.0f} {unit} "
+            f"in total, most in {binding_snapshots(diagnostic.margin)}."
+        )
+    missing = (weights * required).sum() - (weights * generation).sum() - storage_energy
+    if missing > TOLERANCE * (weights * required).sum():
+        raise ValueError(
+            f"The renewable shares are infeasible: {missing:.0f} MWh more renewable energy is required than the "
+            f"renewable generators can produce and the storage units can release; the storage units have to cover "
+            f"most in the snapshots {binding_snapshots(generation - required)}."
+        )
+    logger.info(f"The renewable shares cannot be ruled out. Binding {'snapshots' if periods is None else 'settlement periods'} (least margin): {binding_snapshots(diagnostic.margin)}.")
+    return diagnostic
@@ -16,6 +16,7 @@ import numpy as np
 from matplotlib import pyplot as plt
 import cartopy.crs as ccrs
 from pypsa.descriptors import get_switchable_as_dense as as_dense
+from network_cache import load_network_cached
 
 def solve_network(n, renewable_carriers, *args, **kwargs):
     """Solve the network.
@@ -152,10 +153,8 @@ def solve_network(n, renewable_carriers, *args, **kwargs):
     )
 
 if __name__=="__main__":
-    DE_1node = pypsa.Network("elec_s_337.nc")
-    DE_1node.set_snapshots(pd.date_range('2019-01-01', periods=5, freq='H'))
+    DE_1node = load_network_cached("elec_s_337.nc", periods=5)
     storage_map = {}
-    DE_1node.lines.s_nom = 1000000
     
     
     from pypsa.linopt import get_var, linexpr, join_exprs, define_constraints
@@ -287,6 +286,7 @@ import numpy as np
 from matplotlib import pyplot as plt
 import cartopy.crs as ccrs
 from pypsa.descriptors import get_switchable_as_dense as as_dense
+from network_cache import load_network_cached
 
 def solve_network(n, renewable_carriers, co2_emissions, *args, **kwargs):
     """Solve the network.
@@ -426,9 +426,7 @@ def solve_network(n, renewable_carriers, co2_emissions, *args, **kwargs):
     )
 
 if __name__=="__main__":
-    DE_1node = pypsa.Network('elec_s_337.nc')
-    DE_1node.lines.s_nom = 1000000
-    DE_1node.set_snapshots(pd.date_range('2019-01-01', periods=5, freq='H'))   
+    DE_1node = load_network_cached('elec_s_337.nc', periods=5)   
     storage_map = {}
 
     from pypsa.linopt import get_var, linexpr, join_exprs, define_constraints
@@ -561,6 +559,7 @@ import numpy as np
 from matplotlib import pyplot as plt
 import cartopy.crs as ccrs
 from pypsa.descriptors import get_switchable_as_dense as as_dense
+from network_cache import load_network_cached
 def solve_network(n, renewable_shares, renewable_carriers, *args, **kwargs):
     """Solve the network.
     Args:
@@ -743,9 +742,7 @@ def solve_network(n, renewable_shares, renewable_carriers, *args, **kwargs):
 
 if __name__=="__main__":
       
-    DE_1node = pypsa.Network('elec_s_337.nc')
-    DE_1node.lines.s_nom = 1000000
-    DE_1node.set_snapshots(pd.date_range('2019-01-01', periods=5, freq='H'))
+    DE_1node = load_network_cached('elec_s_337.nc', periods=5)
     renewable_Shares = pd.Series([1 for _ in range(len(DE_1node.snapshots))], index=DE_1node.snapshots)
     storage_map = {}
     
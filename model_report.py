@@ -0,0 +1,115 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Magnitudes outside of [SMALL, LARGE] and ranges above MAX_RANGE are flagged (solver guidelines for well scaled LPs).
+SMALL = 1e-3
+LARGE = 1e6
+MAX_RANGE = 1e6
+
+def magnitude_range(values):
+    """Smallest and largest absolute nonzero finite value, NaN if there is none."""
+    values = np.abs(np.asarray(values, dtype=float).ravel())
+    values = values[np.isfinite(values) & (values != 0)]
+    if values.size == 0:
+        return np.nan, np.nan
+    return values.min(), values.max()
+
+def flags(minimum, maximum):
+    """Describe why a range of absolute values is poorly conditioned, empty if it is not."""
+    problems = []
+    if minimum < SMALL:
+        problems.append(f"small values ({minimum:.2g})")
+    if maximum > LARGE:
+        problems.append(f"large values ({maximum:.2g})")
+    if maximum / minimum > MAX_RANGE:
+        problems.append(f"range {maximum / minimum:.2g}")
+    return ', '.join(problems)
+
+def constraint_report(m):
+    """Rows, columns (distinct variables), nonzeros and the coefficient and right hand side ranges per constraint family.
+
+    Args:
+        m (linopy.Model): The model, before or after solving.
+
+    Returns:
+        pandas.DataFrame: One row per constraint family, sorted by the number of nonzeros.
+    """
+    records = {}
+    for name, con in m.constraints.items():
+        active = con.labels.values != -1
+        variables = con.vars.values
+        coeffs = con.coeffs.values
+        entries = ((con.vars != -1) & (con.coeffs != 0) & (con.labels != -1)).transpose(*con.vars.dims).values
+        coeff_min, coeff_max = magnitude_range(coeffs[entries])
+        rhs_min, rhs_max = magnitude_range(con.rhs.values[active])
+        records[name] = {
+            'rows': int(active.sum()),
+            'columns': len(np.unique(variables[entries])),
+            'nonzeros': int(entries.sum()),
+            'coefficient min': coeff_min,
+            'coefficient max': coeff_max,
+            'rhs min': rhs_min,
+            'rhs max': rhs_max,
+        }
+    report = pd.DataFrame.from_dict(records, orient='index')
+    report.index.name = 'constraint'
+    return report.sort_values('nonzeros', ascending=False)
+
+def variable_report(m):
+    """Number of variables and the range of their finite bounds per variable family.
+
+    Args:
+        m (linopy.Model): The model.
+
+    Returns:
+        pandas.DataFrame: One row per variable family.
+    """
+    records = {}
+    for name, var in m.variables.items():
+        active = var.labels.values != -1
+        bound_min, bound_max = magnitude_range(np.concatenate([var.lower.values[active], var.upper.values[active]]))
+        records[name] = {'columns': int(active.sum()), 'bound min': bound_min, 'bound max': bound_max}
+    report = pd.DataFrame.from_dict(records, orient='index')
+    report.index.name = 'variable'
+    return report
+
+def model_report(m):
+    """Pre-solve report of the size and the numerics of a model.
+    The report has one row per constraint family (restrict_renewable_storages_share, max_store, ... as well as
+    the PyPSA constraints), the coefficients of each family and its right hand side are checked separately. A
+    family is flagged when its absolute values are smaller than SMALL, larger than LARGE or span more than
+    MAX_RANGE; e.g. the right hand side of the line constraints with s_nom = 1000000 is flagged as large values.
+    The overall coefficient, right hand side, bound and objective ranges are logged.
+
+    Args:
+        m (linopy.Model): The model, e.g. n.model after create_persistent_model(n, ...).
+
+    Returns:
+        pandas.DataFrame: constraint_report(m) with the share of the nonzeros and the flags per family.
+    """
+    report = constraint_report(m)
+    report['nonzeros share [%]'] = 100 * report.nonzeros / report.nonzeros.sum()
+    report['coefficient flags'] = [flags(*r) for r in report[['coefficient min', 'coefficient max']].values]
+    report['rhs flags'] = [flags(*r) for r in report[['rhs min', 'rhs max']].values]
+
+    variables = variable_report(m)
+    objective = m.objective.expression if hasattr(m.objective, 'expression') else m.objective
+    ranges = pd.DataFrame({
+        'min': [report['coefficient min'].min(), report['rhs min'].min(), variables['bound min'].min(), magnitude_range(objective.coeffs.values)[0]],
+        'max': [report['coefficient max'].max(), report['rhs max'].max(), variables['bound max'].max(), magnitude_range(objective.coeffs.values)[1]],
+    }, index=['coefficients', 'rhs', 'bounds', 'objective'])
+    ranges['flags'] = [flags(*r) for r in ranges[['min', 'max']].values]
+
+    logger.info(
+        f"Model with {m.nvars} variables, {m.ncons} constraints and {report.nonzeros.sum()} nonzeros.\n"
+        f"Largest constraint families:\n{report[['rows', 'nonzeros', 'nonzeros share [%]']].head(10)}\n"
+        f"Ranges:\n{ranges}"
+    )
+    flagged = report[(report['coefficient flags'] != '') | (report['rhs flags'] != '')]
+    if not flagged.empty:
+        logger.warning(f"Poorly scaled constraint families:\n{flagged[['coefficient flags', 'rhs flags']]}")
+    return report
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+
+import pandas as pd
+import pypsa
+import xarray as xr
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = 'network_cache'
+# Part of the cache key, increase it when the loading changes so networks loaded before are not used any more.
+CACHE_VERSION = 2
+
+def file_hash(network_file, cache_dir=CACHE_DIR):
+    """Return the sha1 of the content of a file.
+    The hash is remembered in ``<cache_dir>/hashes.json`` together with the size and modification time of the file,
+    so the file is only read again when it changed.
+
+    Args:
+        network_file (str): Path of the file.
+        cache_dir (str): Directory of the cache.
+
+    Returns:
+        str: Hex digest of the content.
+    """
+    path = os.path.abspath(network_file)
+    stat = os.stat(path)
+    hashes_fn = os.path.join(cache_dir, 'hashes.json')
+    hashes = {}
+    if os.path.exists(hashes_fn):
+        with open(hashes_fn) as f:
+            hashes = json.load(f)
+    entry = hashes.get(path)
+    if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha1']
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 24), b''):
+            digest.update(chunk)
+    hashes[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': digest.hexdigest()}
+    atomic_write(hashes_fn, json.dumps(hashes, indent=1).encode())
+    return digest.hexdigest()
+
+def atomic_write(fn, data):
+    """Write bytes to a file through a temporary file, so concurrent readers (sweep workers) never see a partial file."""
+    os.makedirs(os.path.dirname(fn) or '.', exist_ok=True)
+    fd, tmp_fn = tempfile.mkstemp(dir=os.path.dirname(fn) or '.', suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_fn, fn)
+
+def input_series(c):
+    """Return the time dependent input attributes of a component (outputs such as p or state_of_charge are not read)."""
+    attrs = c.attrs
+    return attrs.index[attrs.varying & attrs.status.str.startswith('Input')]
+
+def netcdf_snapshots(ds):
+    """Return the snapshots of a netCDF network file. Files of PyPSA 0.2x and later store the snapshots in the
+    variable ``snapshots_snapshot`` and index the ``snapshots`` dimension with integer positions, older files
+    index the dimension with the snapshots themselves."""
+    if 'snapshots_snapshot' in ds:
+        return pd.DatetimeIndex(pd.to_datetime(ds['snapshots_snapshot'].values))
+    return pd.DatetimeIndex(pd.to_datetime(ds.indexes['snapshots']))
+
+def netcdf_snapshot_weightings(window, snapshots):
+    """Return the snapshot weightings of a snapshot window of a netCDF network file, from the columns
+    ``snapshots_objective``, ``snapshots_stores`` and ``snapshots_generators`` or the single
+    ``snapshots_weightings`` of older files. Missing weightings are 1."""
+    weightings = pd.DataFrame(1., index=snapshots, columns=['objective', 'stores', 'generators'])
+    for column in weightings.columns:
+        for name in ['snapshots_' + column, 'snapshots_weightings']:
+            if name in window.data_vars:
+                weightings[column] = window[name].values
+                break
+    return weightings
+
+def load_network_window(network_file='elec_s_337.nc', periods=5, start='2019-01-01', freq='h', s_nom=1000000, components=None, chunk_size=None):
+    """Load only a snapshot window and the input time series of a network from a netCDF file.
+    The static component tables are imported as usual. The time series are read lazily with xarray: only the
+    hyperslab of the requested snapshots of the input series is read from disk, the full year arrays and the
+    stored results (e.g. generators_t.p) are never loaded. The snapshot weightings are read for the window as
+    well, requesting snapshots which the file does not have raises a ValueError. If dask is installed the
+    variables are read in chunks of ``chunk_size`` snapshots.
+
+    Args:
+        network_file (str): Path of the network file.
+        periods (int): Number of snapshots, None reads all snapshots of the file.
+        start (str): First snapshot.
+        freq (str): Frequency of the snapshots.
+        s_nom (float): Nominal capacity of all lines, None keeps the capacities of the file.
+        components (list): Components to keep, e.g. ["Generator", "Load", "StorageUnit", "Line"]. Buses and
+            carriers are always kept, None keeps all components.
+        chunk_size (int): Number of snapshots per chunk, requires dask.
+
+    Returns:
+        PyPSA Network: The network with the selected snapshots.
+    """
+    n = pypsa.Network()
+    n.import_from_netcdf(network_file, skip_time=True)
+    if components is not None:
+        for component in n.all_components - set(components) - {'Bus', 'Carrier'} - n.standard_type_components:
+            n.mremove(component, n.df(component).index)
+
+    chunks = None
+    if chunk_size is not None:
+        try:
+            import dask  # noqa: F401
+            chunks = {'snapshots': chunk_size}
+        except ImportError:
+            logger.warning("dask is not installed, the time series are read without chunks.")
+
+    with xr.open_dataset(network_file, chunks=chunks) as ds:
+        file_snapshots = netcdf_snapshots(ds)
+        snapshots = file_snapshots if periods is None else pd.date_range(start, periods=periods, freq=freq)
+        positions = file_snapshots.get_indexer(snapshots)
+        if (positions == -1).any():
+            raise ValueError(f"{(positions == -1).sum()} of the requested snapshots are not in {network_file}, e.g. {snapshots[positions == -1][0]}.")
+        window = ds.isel(snapshots=positions)
+
+        n.set_snapshots(snapshots)
+        snapshots = n.snapshots
+        n.snapshot_weightings = netcdf_snapshot_weightings(window, snapshots).reindex(columns=n.snapshot_weightings.columns)
+
+        for c in n.iterate_components():
+            prefix = c.list_name + '_t_'
+            for attr in input_series(c):
+                if prefix + attr not in window.data_vars:
+                    continue
+                df = window[prefix + attr].load().to_pandas()
+                df = df.loc[:, df.columns.isin(c.df.index)]
+                df.index = snapshots
+                df.columns.name = c.name
+                c.pnl[attr] = df
+
+    if s_nom is not None:
+        n.lines.s_nom = s_nom
+    return n
+
+def load_network_cached(network_file='elec_s_337.nc', periods=5, start='2019-01-01', freq='h', s_nom=1000000, components=None, cache_dir=CACHE_DIR):
+    """Load the network with the usual preprocessing (line capacities and snapshots) from a cache.
+    The preprocessed network is pickled to ``<cache_dir>/<key>.pkl``; pickle stores the tables of the network as
+    raw column buffers, which loads much faster than parsing the netCDF file. The key is made of the content hash
+    of ``network_file``, the PyPSA version, CACHE_VERSION and the overrides, so a changed file or different
+    overrides never hit a stale entry. On a cache miss only the snapshot window is read from the file, see load_network_window.
+
+    Args:
+        network_file (str): Path of the network file.
+        periods (int): Number of snapshots, None keeps the snapshots of the file.
+        start (str): First snapshot.
+        freq (str): Frequency of the snapshots.
+        s_nom (float): Nominal capacity of all lines, None keeps the capacities of the file.
+        components (list): Components to keep, None keeps all components, see load_network_window.
+        cache_dir (str): Directory of the cache.
+
+    Returns:
+        PyPSA Network: The preprocessed network.
+    """
+    overrides = {'periods': periods, 'start': start, 'freq': freq, 's_nom': s_nom, 'components': None if components is None else sorted(components)}
+    key = hashlib.sha1(
+        json.dumps([file_hash(network_file, cache_dir), pypsa.__version__, CACHE_VERSION, overrides], sort_keys=True).encode()
+    ).hexdigest()
+    cache_fn = os.path.join(cache_dir, key + '.pkl')
+
+    begin = time.perf_counter()
+    if os.path.exists(cache_fn):
+        with open(cache_fn, 'rb') as f:
+            n = pickle.load(f)
+        logger.info(f"Loaded {network_file} from {cache_fn} in {time.perf_counter() - begin:.3f} s.")
+        return n
+
+    n = load_network_window(network_file, periods, start, freq, s_nom, components)
+    atomic_write(cache_fn, pickle.dumps(n, protocol=pickle.HIGHEST_PROTOCOL))
+    logger.info(f"Loaded {network_file} in {time.perf_counter() - begin:.3f} s and cached it in {cache_fn}.")
+    return n
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Remove all cached networks and hashes."""
+    if not os.path.isdir(cache_dir):
+        return
+    for fn in os.listdir(cache_dir):
+        if fn.endswith('.pkl') or fn == 'hashes.json':
+            os.remove(os.path.join(cache_dir, fn))
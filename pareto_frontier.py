@@ -0,0 +1,119 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+import results
+from solve_network import solve_network_co2cap, solve_network_unconstrained
+
+logger = logging.getLogger(__name__)
+
+def solve_point(n, renewable_carriers, co2_emissions=None, **kwargs):
+    """Solve a copy of the network with the CO2 cap ``co2_emissions`` (unconstrained if None) and collect the point
+    of the frontier.
+
+    Returns:
+        dict: CO2 cap, objective, emissions, carbon price, the capacities and the dispatch by bus and carrier.
+    """
+    m = n.copy()
+    if co2_emissions is None:
+        status, condition = solve_network_unconstrained(m, list(renewable_carriers), **kwargs)
+    else:
+        status, condition = solve_network_co2cap(m, list(renewable_carriers), co2_emissions, **kwargs)
+    if status != 'ok':
+        raise RuntimeError(f"The solve with the CO2 cap {co2_emissions} failed: {condition}.")
+    emissions = results.emissions(m).sum()
+    return {
+        'co2 cap': emissions if co2_emissions is None else co2_emissions,
+        'objective': m.objective,
+        'emissions': emissions,
+        'carbon price': 0. if co2_emissions is None else m.sensitivity['carbon price'],
+        'capacity': results.capacities(m),
+        'dispatch': results.dispatch_by_bus_carrier(m),
+    }
+
+def same_slope(slope_a, slope_b, tolerance):
+    """Whether two slopes of the frontier are equal within the relative ``tolerance``."""
+    return abs(slope_a - slope_b) <= tolerance * max(abs(slope_a), abs(slope_b), 1.)
+
+def breakpoints(frontier, tolerance):
+    """Mark the points where the slope of the piecewise-linear curve through the solved points changes.
+    The slope of a segment is the difference quotient of its ends; where the carbon price is known it is minus the
+    carbon price of the end inside the segment, so the slope changes exactly where the carbon price changes. The
+    first and the last point are always breakpoints.
+    """
+    caps, costs, prices = frontier.index.values, frontier.objective.values, frontier['carbon price'].values
+    is_breakpoint = np.ones(len(frontier), dtype=bool)
+    for i in range(1, len(frontier) - 1):
+        left = (costs[i] - costs[i - 1]) / (caps[i] - caps[i - 1])
+        right = (costs[i + 1] - costs[i]) / (caps[i + 1] - caps[i])
+        is_breakpoint[i] = not same_slope(left, right, tolerance)
+        if not np.isnan(prices[i - 1]) and not np.isnan(prices[i + 1]):
+            is_breakpoint[i] &= not same_slope(-prices[i - 1], -prices[i + 1], tolerance)
+    return is_breakpoint
+
+def pareto_frontier(n, renewable_carriers, co2_min=0., co2_max=None, max_solves=20, tolerance=1e-4, **kwargs):
+    """Trace the system cost over the CO2 cap between ``co2_min`` and ``co2_max`` with as few solves as possible.
+    The cost of the LP is a convex piecewise-linear function of the cap, whose slope at a cap is minus the carbon
+    price of that solve (see sensitivity.carbon_price). Between two solved caps, the tangents through both points
+    intersect at the only cap where a breakpoint can be if the curve bends just once; the cap is solved next. If the
+    cost there equals the tangents, the curve is exactly the two tangents and the interval is done, otherwise both
+    halves are refined. Intervals whose ends have the same carbon price lie on one linear segment and are not solved
+    again. Without duals (NaN carbon price) the interval is bisected.
+
+    Example:
+        frontier, points = pareto_frontier(DE_1node, list_renewable_carriers, co2_min=0.2*7319)
+
+    Args:
+        n (PyPSA Network): PyPSA network, it is copied for every solve and not modified.
+        renewable_carriers (list): Carriers which are counted as renewable.
+        co2_min (float): Lowest CO2 cap, it has to be feasible.
+        co2_max (float): Highest CO2 cap, defaults to the emissions of the unconstrained solve (carbon price 0).
+        max_solves (int): Maximum number of solves, including the ends.
+        tolerance (float): Relative tolerance of the costs and carbon prices for detecting linear segments.
+        **kwargs: Passed on to the solve functions, e.g. storage_mode, solver_name or scaling.
+
+    Returns:
+        tuple: The frontier (pandas.DataFrame indexed by the CO2 cap with objective, emissions, carbon price and
+        whether the point is a breakpoint) and per breakpoint (keyed by the CO2 cap) the capacities and the dispatch.
+    """
+    points = {}
+    upper = solve_point(n, renewable_carriers, co2_max, **kwargs)
+    co2_max = upper['co2 cap']
+    points[co2_max] = upper
+    if co2_min < co2_max:
+        points[co2_min] = solve_point(n, renewable_carriers, co2_min, **kwargs)
+    min_gap = tolerance * max(co2_max - co2_min, 1.)
+
+    intervals = [(co2_min, co2_max)] if co2_min < co2_max else []
+    while intervals and len(points) < max_solves:
+        a, b = intervals.pop()
+        slope_a, slope_b = -points[a]['carbon price'], -points[b]['carbon price']
+        cost_a, cost_b = points[a]['objective'], points[b]['objective']
+        if same_slope(slope_a, slope_b, tolerance):
+            continue
+        if np.isnan(slope_a) or np.isnan(slope_b):
+            cap = (a + b) / 2
+            tangent = np.nan
+        else:
+            cap = (cost_b - cost_a + slope_a * a - slope_b * b) / (slope_a - slope_b)
+            tangent = cost_a + slope_a * (cap - a)
+        if not a + min_gap < cap < b - min_gap:
+            continue
+        logger.info(f"Frontier: solving the CO2 cap {cap:.1f} between {a:.1f} and {b:.1f}.")
+        points[cap] = solve_point(n, renewable_carriers, cap, **kwargs)
+        if abs(points[cap]['objective'] - tangent) <= tolerance * max(abs(tangent), 1.):
+            continue
+        intervals += [(a, cap), (cap, b)]
+    if intervals:
+        logger.warning(f"Frontier: stopped after {max_solves} solves with {len(intervals)} intervals left to refine.")
+
+    frontier = pd.DataFrame.from_dict(
+        {cap: {key: point[key] for key in ['objective', 'emissions', 'carbon price']} for cap, point in points.items()},
+        orient='index',
+    ).sort_index()
+    frontier.index.name = 'co2 cap'
+    frontier['breakpoint'] = breakpoints(frontier, tolerance)
+    details = {cap: {key: points[cap][key] for key in ['capacity', 'dispatch']} for cap in frontier.index[frontier.breakpoint]}
+    logger.info(f"Frontier with {frontier.breakpoint.sum()} breakpoints from {len(points)} solves:\n{frontier}")
+    return frontier, details
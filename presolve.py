@@ -0,0 +1,185 @@
+import contextlib
+import logging
+
+import numpy as np
+import pandas as pd
+from pypsa.descriptors import get_switchable_as_dense as get_as_dense
+
+from copper_plate import capacity_weights
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = ['Generator', 'StorageUnit']
+
+# Static attributes which have to be equal for components to be merged: the per unit and per component attributes
+# which enter the optimization.
+EQUAL_ATTRIBUTES = {
+    'Generator': ['bus', 'carrier', 'active', 'p_nom_extendable', 'p_nom_mod', 'capital_cost', 'sign', 'committable',
+                  'build_year', 'lifetime', 'ramp_limit_start_up', 'ramp_limit_shut_down'],
+    'StorageUnit': ['bus', 'carrier', 'active', 'p_nom_extendable', 'p_nom_mod', 'capital_cost', 'sign', 'build_year',
+                    'lifetime', 'max_hours', 'cyclic_state_of_charge', 'cyclic_state_of_charge_per_period',
+                    'state_of_charge_initial_per_period'],
+}
+# Attributes which can be time dependent and have to be equal in all snapshots.
+EQUAL_SERIES = {
+    'Generator': ['p_max_pu', 'p_min_pu', 'marginal_cost', 'efficiency', 'ramp_limit_up', 'ramp_limit_down'],
+    'StorageUnit': ['p_max_pu', 'p_min_pu', 'marginal_cost', 'marginal_cost_storage', 'spill_cost', 'efficiency_store',
+                    'efficiency_dispatch', 'standing_loss'],
+}
+# Extensive attributes (MWh) which have to be proportional to p_nom for components to be merged, they are summed.
+PROPORTIONAL_ATTRIBUTES = {
+    'Generator': ['e_sum_min', 'e_sum_max'],
+    'StorageUnit': ['state_of_charge_initial', 'state_of_charge_initial_renewable'],
+}
+# Attributes which are summed over the merged components.
+SUMMED_ATTRIBUTES = ['p_nom', 'p_nom_min', 'p_nom_max', 'e_sum_min', 'e_sum_max', 'state_of_charge_initial', 'state_of_charge_initial_renewable']
+# Results which are split over the merged components by their share, the other results are copied.
+EXTENSIVE_RESULTS = ['p', 'q', 'p_store', 'p_dispatch', 'state_of_charge', 'spill', 'state_of_charge_renewable']
+
+def removable(n, component):
+    """Components which cannot be active: non-extendable ones with p_nom = 0 and generators with p_max_pu and
+    p_min_pu zero in all snapshots (which are built at p_nom_min = 0 if extendable). Storage units with inflow
+    are kept.
+
+    Returns:
+        pandas.Index: The removable components.
+    """
+    df = n.df(component)
+    remove = ~df.p_nom_extendable & (df.p_nom == 0)
+    if component == 'Generator':
+        inactive = (get_as_dense(n, component, 'p_max_pu') == 0).all() & (get_as_dense(n, component, 'p_min_pu') == 0).all()
+        remove |= inactive & (df.p_nom_min == 0) & (df.capital_cost >= 0) & ~df.committable
+    else:
+        remove &= (get_as_dense(n, component, 'inflow') == 0).all()
+    return df.index[remove]
+
+def equivalence_key(n, component, index):
+    """Key of the components, components with equal keys are equivalent and can be merged.
+    Components whose PROPORTIONAL_ATTRIBUTES are not proportional to p_nom are not merged, neither are extendable
+    components with finite nonzero values of them (e.g. an initial state of charge or e_sum_max), whose capacity
+    is not known beforehand. Committable generators (the start up costs and minimum up times are per unit),
+    components with quadratic marginal costs and storage units with inflow or a set state of charge are not merged
+    either.
+
+    Returns:
+        pandas.DataFrame: The key columns of the components in ``index``.
+    """
+    df = n.df(component).loc[index]
+    key = df[EQUAL_ATTRIBUTES[component]].copy()
+    for attr in EQUAL_SERIES[component]:
+        key[attr] = pd.util.hash_pandas_object(get_as_dense(n, component, attr, inds=index).T, index=False).values
+    proportional = df[[attr for attr in PROPORTIONAL_ATTRIBUTES[component] if attr in df]]
+    key[proportional.columns] = proportional.div(df.p_nom.where(df.p_nom > 0), axis=0).round(9)
+    single = df.p_nom_extendable & (np.isfinite(proportional) & (proportional != 0)).any(axis=1)
+    single |= (get_as_dense(n, component, 'marginal_cost_quadratic', inds=index) != 0).any()
+    if component == 'Generator':
+        single |= df.committable
+    else:
+        single |= (get_as_dense(n, component, 'inflow', inds=index) != 0).any()
+        single |= get_as_dense(n, component, 'state_of_charge_set', inds=index).notna().any()
+    key['single'] = np.where(single, index, '')
+    return key.fillna(-1)
+
+def merge_groups(index, key):
+    """Representative (the first component) of every component in ``index`` among the components with equal key."""
+    group = key.groupby(list(key.columns), sort=False, dropna=False).ngroup()
+    return pd.Series(index, index=index).groupby(group.values).transform('first')
+
+def reduce_network(n):
+    """Merge the equivalent generators and storage units of the network and remove those which cannot be active.
+    Equivalent components share all attributes of EQUAL_ATTRIBUTES and EQUAL_SERIES and have proportional
+    PROPORTIONAL_ATTRIBUTES, see equivalence_key; they are merged into the first of them, whose capacities,
+    potentials, energy limits and initial states of charge become the sums over the group. Since the feasible
+    dispatch of the merged component is the sum of the feasible dispatches of its members, the optimum does not
+    change. The fictious storage units are merged with the same members as their real storage units.
+
+    Args:
+        n (PyPSA Network): PyPSA network, modified in place.
+
+    Returns:
+        dict: Per component a DataFrame indexed by the original components with their ``representative`` (NaN if
+        removed) and their ``share`` of the representative.
+    """
+    reductions = {}
+    for component in COMPONENTS:
+        df = n.df(component)
+        kept = df.index.difference(removable(n, component), sort=False)
+        representative = pd.Series(np.nan, index=df.index, dtype=object)
+
+        is_twin = pd.Series(False, index=kept)
+        if 'real_storage_unit' in df:
+            is_twin = df.real_storage_unit.reindex(kept).fillna('') != ''
+        real = kept[~is_twin.values]
+        representative[real] = merge_groups(real, equivalence_key(n, component, real))
+        twins = kept[is_twin.values]
+        if not twins.empty:
+            key = equivalence_key(n, component, twins)
+            key['real_storage_unit'] = df.real_storage_unit[twins].map(representative).fillna(df.real_storage_unit[twins]).values
+            representative[twins] = merge_groups(twins, key)
+
+        representative = representative.dropna()
+        weights = capacity_weights(df.loc[representative.index])
+        share = weights / weights.groupby(representative).transform('sum')
+        reductions[component] = pd.DataFrame({'representative': representative, 'share': share}).reindex(df.index)
+
+        merged = representative.index[representative.values != representative.index]
+        if len(merged):
+            summed = [attr for attr in SUMMED_ATTRIBUTES if attr in df]
+            totals = df.loc[representative.index, summed].groupby(representative).sum()
+            df.loc[totals.index, summed] = totals
+            if not twins.empty:
+                df.loc[twins, 'real_storage_unit'] = df.real_storage_unit[twins].map(representative).fillna(df.real_storage_unit[twins])
+        removed = df.index.difference(representative.index, sort=False).append(merged)
+        n.mremove(component, removed)
+        logger.info(f"Presolve reduced the {component}s from {len(df)} to {len(df) - len(removed)} ({len(merged)} merged, {len(removed) - len(merged)} removed).")
+    return reductions
+
+def restore_results(n, saved, reductions):
+    """Restore the original components and map the results of their representatives back to them.
+    Capacities and the extensive results (dispatch, state of charge, ...) are split by the share of every member,
+    the other results (e.g. the duals mu_upper and mu_lower) are copied. Removed components are at p_nom
+    (p_nom_min if extendable) and have no dispatch.
+
+    Args:
+        n (PyPSA Network): The reduced network, solved or not.
+        saved (dict): Per component the static DataFrame and the time series of the original network.
+        reductions (dict): As returned by reduce_network(n).
+    """
+    for component, (df, pnl) in saved.items():
+        reduction = reductions[component]
+        kept = reduction.representative.dropna()
+        share = reduction.share[kept.index]
+        solved, solved_pnl = n.df(component), n.pnl(component)
+        if 'p_nom_opt' in solved:
+            df['p_nom_opt'] = df.p_nom.where(~df.p_nom_extendable, df.p_nom_min)
+            df.loc[kept.index, 'p_nom_opt'] = solved.p_nom_opt.reindex(kept.values).values * share.values
+        outputs = n.component_attrs[component].index[n.component_attrs[component].status.str.startswith('Output')]
+        for attr, frame in solved_pnl.items():
+            if frame.empty or not (attr in outputs or attr in EXTENSIVE_RESULTS):
+                continue
+            frame = frame.reindex(columns=kept.values).set_axis(kept.index, axis=1)
+            if attr in EXTENSIVE_RESULTS:
+                frame = frame * share
+            pnl[attr] = frame.reindex(columns=df.index, fill_value=0.)
+        setattr(n, n.components[component]['list_name'], df)
+        target = n.pnl(component)
+        for attr, frame in pnl.items():
+            target[attr] = frame
+
+@contextlib.contextmanager
+def presolved(n):
+    """Solve the network within the block with equivalent components merged and inactive components removed, see
+    reduce_network. The original components are restored with their results when the block exits.
+
+    Args:
+        n (PyPSA Network): PyPSA network.
+
+    Yields:
+        dict: The reductions, as returned by reduce_network(n).
+    """
+    saved = {c: (n.df(c).copy(), {attr: frame.copy() for attr, frame in n.pnl(c).items()}) for c in COMPONENTS}
+    reductions = reduce_network(n)
+    try:
+        yield reductions
+    finally:
+        restore_results(n, saved, reductions)
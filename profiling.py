@@ -0,0 +1,97 @@
+import contextlib
+import functools
+import json
+import time
+import tracemalloc
+
+# Root span of the active profiling() block, None when profiling is disabled.
+_root = None
+_stack = []
+
+@contextlib.contextmanager
+def _record(name):
+    parent = _stack[-1]
+    node = {'name': name, 'wall time [s]': None, 'memory delta [MB]': None, 'children': []}
+    parent['children'].append(node)
+    _stack.append(node)
+    memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+    start = time.perf_counter()
+    try:
+        yield node
+    finally:
+        node['wall time [s]'] = time.perf_counter() - start
+        if memory is not None:
+            node['memory delta [MB]'] = (tracemalloc.get_traced_memory()[0] - memory) / 2**20
+        _stack.pop()
+
+_disabled = contextlib.nullcontext()
+
+def span(name):
+    """Context manager recording a timing span named ``name`` inside the current span.
+    Without an active profiling() block a shared no-op context manager is returned, so instrumented code costs
+    only one function call per span when profiling is disabled.
+    """
+    if _root is None:
+        return _disabled
+    return _record(name)
+
+def profiled(function):
+    """Decorator recording every call of ``function`` as a span named after the function."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _root is None:
+            return function(*args, **kwargs)
+        with _record(function.__name__):
+            return function(*args, **kwargs)
+    return wrapper
+
+def folded_stacks(node, prefix=()):
+    """Yield the spans in the folded stack format of flamegraph.pl and speedscope ("a;b;c <self time in us>")."""
+    path = prefix + (node['name'],)
+    children_time = sum(child['wall time [s]'] or 0 for child in node['children'])
+    self_time = max((node['wall time [s]'] or 0) - children_time, 0)
+    yield f"{';'.join(path)} {round(self_time * 1e6)}"
+    for child in node['children']:
+        yield from folded_stacks(child, path)
+
+@contextlib.contextmanager
+def profiling(fn=None, flamegraph_fn=None, memory=True):
+    """Record the spans of the instrumented code (solve functions, constraint families, model creation, solver and
+    reading back the solution) within the block.
+
+    Example:
+        with profiling('profile.json', 'profile.folded') as profile:
+            solve_network_co2cap(n, renewable_carriers, co2_emissions)
+
+    Args:
+        fn (str): JSON file the span tree is written to.
+        flamegraph_fn (str): File the spans are written to in folded stack format.
+        memory (bool): Record the change of the memory allocated within every span (tracemalloc, slows down the code).
+
+    Yields:
+        dict: The root span, filled when the block exits.
+    """
+    global _root
+    if _root is not None:
+        raise RuntimeError("Profiling is already active.")
+    root = {'name': 'root', 'wall time [s]': None, 'memory delta [MB]': None, 'children': []}
+    _root = root
+    _stack.append(root)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield root
+    finally:
+        root['wall time [s]'] = time.perf_counter() - start
+        if started_tracing:
+            tracemalloc.stop()
+        _stack.clear()
+        _root = None
+        if fn is not None:
+            with open(fn, 'w') as f:
+                json.dump(root, f, indent=1)
+        if flamegraph_fn is not None:
+            with open(flamegraph_fn, 'w') as f:
+                f.write('\n'.join(folded_stacks(root)) + '\n')
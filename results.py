@@ -0,0 +1,173 @@
+import os
+
+import pandas as pd
+import scipy.sparse as sp
+
+def incidence(df, index, by=('bus', 'carrier')):
+    """Sparse incidence matrix of the components ``index`` on the groups given by the columns ``by`` of ``df``.
+
+    Args:
+        df (pandas.DataFrame): Static component table, e.g. n.generators.
+        index (pandas.Index): Components in the order of the columns of the time series.
+        by (tuple): Columns of ``df`` to group by.
+
+    Returns:
+        tuple: scipy.sparse.csr_matrix components x groups and the pandas.MultiIndex of the groups.
+    """
+    keys = pd.MultiIndex.from_frame(df.loc[index, list(by)])
+    codes, groups = keys.factorize()
+    matrix = sp.csr_matrix(([1.] * len(codes), (range(len(codes)), codes)), shape=(len(codes), len(groups)))
+    return matrix, groups.set_names(list(by))
+
+def dispatch_by_bus_carrier(n, components=('Generator', 'StorageUnit'), attr='p'):
+    """Aggregate the dispatch of all generators and storage units by bus and carrier in every snapshot.
+    Every component is aggregated with one sparse matrix multiply of its time series with its incidence matrix.
+
+    Args:
+        n (PyPSA Network): Solved PyPSA network.
+        components (tuple): Components to aggregate.
+        attr (str): Time series to aggregate.
+
+    Returns:
+        pandas.DataFrame: Snapshots x (component, bus, carrier).
+    """
+    frames = {}
+    for component in components:
+        series = n.pnl(component)[attr]
+        matrix, groups = incidence(n.df(component), series.columns)
+        frames[component] = pd.DataFrame((matrix.T @ series.values.T).T, index=series.index, columns=groups)
+    return pd.concat(frames, axis=1, names=['component'])
+
+def dispatch_by_carrier(dispatch, component):
+    """Sum the dispatch of ``component`` over the buses.
+
+    Args:
+        dispatch (pandas.DataFrame): As returned by dispatch_by_bus_carrier(n).
+        component (str): E.g. "Generator" or "StorageUnit".
+
+    Returns:
+        pandas.DataFrame: Snapshots x carrier.
+    """
+    return dispatch[component].T.groupby(level='carrier').sum().T
+
+# Column labels of the totals as in the case scripts, the other carriers are labelled "Combined <carrier>".
+TOTAL_LABELS = {
+    'solar': 'Combined Solar', 'onwind': 'Combined Wind', 'CCGT': 'Combined ccgt', 'offwind-ac': 'Combined offwindac',
+    'offwind-dc': 'Combined offwinddc', 'Renewable_Storage': 'Combined Renewable',
+}
+
+def total_labels(carriers):
+    """Column label of the total of every carrier, see TOTAL_LABELS."""
+    return [TOTAL_LABELS.get(carrier, 'Combined ' + carrier) for carrier in carriers]
+
+def production_total(dispatch):
+    """Generator dispatch per carrier and snapshot, the columns are labelled as in the case scripts (TOTAL_LABELS),
+    e.g. "Combined Solar" or "Combined coal"."""
+    totals = dispatch_by_carrier(dispatch, 'Generator')
+    return totals.set_axis(total_labels(totals.columns), axis=1)
+
+def storage_units_total(dispatch):
+    """Storage unit dispatch per carrier and snapshot, the columns are labelled as in the case scripts
+    (TOTAL_LABELS), e.g. "Combined PHS" or "Combined Renewable"."""
+    totals = dispatch_by_carrier(dispatch, 'StorageUnit')
+    return totals.set_axis(total_labels(totals.columns), axis=1)
+
+def market(dispatch, scale=2e6):
+    """Generator dispatch per bus and carrier, divided by ``scale`` for the bus sizes of the network plot.
+
+    Returns:
+        pandas.DataFrame: (bus, carrier) x snapshots.
+    """
+    return dispatch['Generator'].T.div(scale)
+
+def emissions(n):
+    """CO2 emissions of every generator over the snapshots, weighted by the generator snapshot weightings."""
+    energy = n.snapshot_weightings.generators @ n.generators_t.p
+    return (energy / n.generators.efficiency * n.generators.carrier.map(n.carriers.co2_emissions)).fillna(0)
+
+def sparse_dispatch(n, components=('Generator', 'StorageUnit'), attr='p', tolerance=1e-6):
+    """Dispatch in long format without the entries that are (numerically) zero.
+
+    Returns:
+        pandas.DataFrame: Columns snapshot, component, name, carrier, bus and ``attr``.
+    """
+    frames = []
+    for component in components:
+        series = n.pnl(component)[attr]
+        values = series.values
+        rows, cols = (abs(values) > tolerance).nonzero()
+        names = series.columns[cols]
+        df = n.df(component)
+        frames.append(pd.DataFrame({
+            'snapshot': series.index[rows],
+            'component': component,
+            'name': names,
+            'carrier': df.carrier.reindex(names).values,
+            'bus': df.bus.reindex(names).values,
+            attr: values[rows, cols],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def capacities(n, components=('Generator', 'StorageUnit')):
+    """Optimized capacities of the components.
+
+    Returns:
+        pandas.DataFrame: Columns component, name, carrier, bus and p_nom_opt.
+    """
+    frames = []
+    for component in components:
+        df = n.df(component)
+        frames.append(pd.DataFrame({
+            'component': component,
+            'name': df.index,
+            'carrier': df.carrier.values,
+            'bus': df.bus.values,
+            'p_nom_opt': df.p_nom_opt.values,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+RESULT_TABLES = ['summary', 'capacity', 'dispatch']
+
+def write_results(n, results_dir, **parameters):
+    """Write the results of a solved network to a Parquet dataset, one file per run and table.
+    Every table is written to ``<results_dir>/<table>/<parameter>-<value>_....parquet`` with the parameters (e.g.
+    case and value of a sweep) as columns, so many runs can be compared by reading a few columns of the summary
+    table and filtering on the parameters. Writing the same parameters again replaces the run. The dispatch is
+    stored sparsely in long format (see sparse_dispatch) and all tables are compressed with zstd.
+
+    Args:
+        n (PyPSA Network): Solved PyPSA network.
+        results_dir (str): Root directory of the dataset.
+        **parameters: Keys and values of the run, e.g. case='co2cap', value=3659.5.
+    """
+    tables = {
+        'summary': pd.DataFrame({
+            'objective': [n.objective],
+            'co2 emissions': [emissions(n).sum()],
+            'total load': [n.loads_t.p.sum().sum()],
+        }),
+        'capacity': capacities(n),
+        'dispatch': sparse_dispatch(n),
+    }
+    run = '_'.join(f"{key}-{value}" for key, value in parameters.items()) or 'run'
+    for table, df in tables.items():
+        for key, value in parameters.items():
+            df[key] = value
+        os.makedirs(os.path.join(results_dir, table), exist_ok=True)
+        df.to_parquet(os.path.join(results_dir, table, run + '.parquet'), compression='zstd', index=False)
+
+def read_results(results_dir, table='summary', columns=None, filters=None):
+    """Read a table of the results dataset written by write_results.
+
+    Args:
+        results_dir (str): Root directory of the dataset.
+        table (str): One of RESULT_TABLES.
+        columns (list): Columns to read, None reads all columns including the parameters.
+        filters (list): Row filters, e.g. [('case', '=', 'co2cap')].
+
+    Returns:
+        pandas.DataFrame: The requested part of the table.
+    """
+    if table not in RESULT_TABLES:
+        raise ValueError(f"Unknown results table '{table}', choose one of {RESULT_TABLES}.")
+    return pd.read_parquet(os.path.join(results_dir, table), columns=columns, filters=filters)
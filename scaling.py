@@ -0,0 +1,142 @@
+import contextlib
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Exponents (currency, power) of the units of the PyPSA attributes, a value v in such a unit is scaled to
+# v / (cost_scale ** currency * power_scale ** power). The electrical, per unit and time attributes and the
+# emission intensities do not depend on the power or cost unit. The dual of a GlobalConstraint (currency/constant)
+# depends on the type of the constraint and is scaled with the constants, it maps to None.
+UNIT_EXPONENTS = {
+    'MW': (0, 1),
+    'MWh': (0, 1),
+    'MVA': (0, 1),
+    'MVar': (0, 1),
+    'kW': (0, 1),
+    'currency': (1, 0),
+    'currency/h': (1, 0),
+    'currency/MW': (1, -1),
+    'currency/MWh': (1, -1),
+    'currency/MWh/h': (1, -1),
+    'currency/MVA': (1, -1),
+    'currency/constant': None,
+    'tonnes/MWh': (0, 0),
+    'per unit': (0, 0),
+    'per unit of p_nom': (0, 0),
+    'Percent': (0, 0),
+    'hours': (0, 0),
+    'snapshots': (0, 0),
+    'year': (0, 0),
+    'years': (0, 0),
+    'kV': (0, 0),
+    'kA': (0, 0),
+    'Hz': (0, 0),
+    'Ohm': (0, 0),
+    'Ohm per km': (0, 0),
+    'Siemens': (0, 0),
+    'nF per km': (0, 0),
+    'mm2': (0, 0),
+    'km': (0, 0),
+    'Degrees': (0, 0),
+    'radians': (0, 0),
+}
+
+# Columns added by solve_network which are not part of the PyPSA component attributes, all in MW or MWh.
+EXTRA_ENERGY_COLUMNS = {
+    'StorageUnit': ['state_of_charge_initial_renewable', 'state_of_charge_renewable', 'p_store_renewable', 'p_dispatch_renewable'],
+}
+
+def rescale(n, power_scale, cost_scale):
+    """Divide all power and energy values of the network by ``power_scale`` and all costs by ``cost_scale``.
+    Inputs and outputs (dispatch, capacities, prices, the objective) are rescaled alike, so applying
+    rescale(n, 1 / power_scale, 1 / cost_scale) afterwards restores the original units. Quantities per power
+    (capital and marginal costs, prices, including the prices of the windows of a rolling horizon) are scaled by
+    power_scale / cost_scale, the constants of the GlobalConstraints (e.g. the CO2 limit in t, which scales with the
+    energy) by power_scale or, for cost limits, by cost_scale.
+
+    Args:
+        n (PyPSA Network): PyPSA network, modified in place.
+        power_scale (float): E.g. 1e3 for MW to GW.
+        cost_scale (float): E.g. 1e3 for EUR to kEUR.
+
+    Raises:
+        ValueError: If an attribute has a unit which is not in UNIT_EXPONENTS.
+    """
+    units = pd.concat([c.attrs.unit for c in n.iterate_components()]).dropna()
+    unknown = set(units) - set(UNIT_EXPONENTS)
+    if unknown:
+        raise ValueError(f"Unknown units {sorted(unknown)}, add them to scaling.UNIT_EXPONENTS.")
+
+    for c in n.iterate_components():
+        for attr, unit in c.attrs.unit.dropna().items():
+            if UNIT_EXPONENTS[unit] in [None, (0, 0)]:
+                continue
+            currency, power = UNIT_EXPONENTS[unit]
+            factor = cost_scale ** currency * power_scale ** power
+            if attr in c.df and pd.api.types.is_float_dtype(c.df[attr]):
+                c.df[attr] /= factor
+            if attr in c.pnl and not c.pnl[attr].empty:
+                c.pnl[attr] = c.pnl[attr] / factor
+        for attr in EXTRA_ENERGY_COLUMNS.get(c.name, []):
+            if attr in c.df:
+                c.df[attr] /= power_scale
+            if attr in c.pnl and not c.pnl[attr].empty:
+                c.pnl[attr] = c.pnl[attr] / power_scale
+
+    gc = n.global_constraints
+    if not gc.empty:
+        is_cost = gc.type == 'transmission_expansion_cost_limit'
+        gc.loc[is_cost, 'constant'] /= cost_scale
+        gc.loc[~is_cost, 'constant'] /= power_scale
+        gc.loc[~is_cost, 'mu'] *= power_scale / cost_scale
+    for name, prices in getattr(n, 'window_prices', {}).items():
+        n.window_prices[name] = prices * power_scale / cost_scale
+
+    for attr in ['objective', 'objective_constant']:
+        if getattr(n, attr, None) is not None:
+            setattr(n, attr, getattr(n, attr) / cost_scale)
+
+@contextlib.contextmanager
+def scaled_units(n, power_scale=1e3, cost_scale=1e3):
+    """Solve the network within the block in scaled units (by default GW and kEUR instead of MW and EUR).
+    With s_nom = 1000000 next to marginal costs of 0.01 the LP mixes very large and very small numbers, scaling
+    the units moves the right hand sides and bounds towards 1 without changing the solution. The results are
+    converted back to MW and EUR when the block exits. The model in ``n.model`` stays in the scaled units, they are
+    kept in ``n.model_scaling`` to convert its duals and right hand sides, see sensitivity.model_scaling.
+
+    Args:
+        n (PyPSA Network): PyPSA network.
+        power_scale (float): E.g. 1e3 for MW to GW.
+        cost_scale (float): E.g. 1e3 for EUR to kEUR.
+    """
+    rescale(n, power_scale, cost_scale)
+    try:
+        yield n
+    finally:
+        rescale(n, 1 / power_scale, 1 / cost_scale)
+        n.model_scaling = (power_scale, cost_scale)
+
+def scaling_effect(n, solve, scaling=(1e3, 1e3), **kwargs):
+    """Solve copies of the same network without and with scaling and compare iterations, solve time and objective.
+
+    Args:
+        n (PyPSA Network): PyPSA network, it is copied for every solve and not modified.
+        solve (callable): One of the solve_network_* functions.
+        scaling (tuple): power_scale and cost_scale.
+        **kwargs: Passed on to solve, e.g. renewable_carriers or co2_emissions.
+
+    Returns:
+        pandas.DataFrame: Rows "unscaled" and "scaled" with wall time, iteration counts, status and objective.
+    """
+    records = {}
+    for label, value in [('unscaled', None), ('scaled', scaling)]:
+        network = n.copy()
+        solve(network, scaling=value, **kwargs)
+        record = dict(network.solver_statistics[-1])
+        record['objective'] = network.objective
+        records[label] = record
+    report = pd.DataFrame.from_dict(records, orient='index')
+    logger.info(f"Effect of scaling the units by {scaling}:\n{report}")
+    return report
@@ -0,0 +1,151 @@
+#%%
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from network_cache import load_network_cached
+from results import write_results
+from solve_network import *
+
+logger = logging.getLogger(__name__)
+
+CASES = ['unconstrained', 'co2cap', 'certificates']
+
+list_renewable_carriers = ['solar','offwind-ac', 'onwind', 'biomass','ror', 'geothermal','hydro', 'offwind-ac', 'offwind-dc', 'Renewable_Storage']
+
+def load_network(network_file='elec_s_337.nc', periods=5):
+    """Load the Germany network the same way as case_selection does, from the network cache.
+
+    Args:
+        network_file (str): Path of the network file.
+        periods (int): Number of hourly snapshots starting at 2019-01-01.
+
+    Returns:
+        PyPSA Network: The network with unconstrained lines and the selected snapshots.
+    """
+    return load_network_cached(network_file, periods=periods)
+
+def solve_case(n, case, value, renewable_carriers, **kwargs):
+    """Solve the network for one case.
+
+    Args:
+        n (PyPSA Network): PyPSA network to be solved.
+        case (str): One of CASES.
+        value (float): The co2_emissions cap for 'co2cap', the renewable share (equal in every snapshot) for 'certificates', ignored for 'unconstrained'.
+        renewable_carriers (list): Carriers which are counted as renewable.
+        **kwargs: Passed on to the solve function.
+
+    Returns:
+        tuple: Status and termination condition of the solve.
+    """
+    if case == 'unconstrained':
+        return solve_network_unconstrained(n, renewable_carriers=renewable_carriers, **kwargs)
+    if case == 'co2cap':
+        return solve_network_co2cap(n, renewable_carriers=renewable_carriers, co2_emissions=value, **kwargs)
+    if case == 'certificates':
+        renewable_shares = pd.Series(value, index=n.snapshots)
+        return solve_network_certificates(n, renewable_shares=renewable_shares, renewable_carriers=renewable_carriers, **kwargs)
+    raise ValueError(f"Unknown case '{case}', choose one of {CASES}.")
+
+def summarize_network(n):
+    """Collect the outputs case_selection prints for a solved network.
+
+    Args:
+        n (PyPSA Network): Solved PyPSA network.
+
+    Returns:
+        dict: Objective, system cost, CO2 emissions, the carbon price and the mean certificate price (if the solve
+        function reported them, see sensitivity.sensitivity_report), installed capacity and production share per
+        carrier, keyed by (group, name).
+    """
+    co2_emissions = np.nansum((n.snapshot_weightings.generators @ n.generators_t.p) / n.generators.efficiency * n.generators.carrier.map(n.carriers.co2_emissions))
+    load = n.loads_t.p.sum().sum()
+
+    capacity = pd.concat([n.generators.p_nom_opt.groupby(n.generators.carrier).sum(), n.storage_units.p_nom_opt.groupby(n.storage_units.carrier).sum()])
+    production = pd.concat([n.generators_t.p.sum().groupby(n.generators.carrier).sum(), n.storage_units_t.p.sum().groupby(n.storage_units.carrier).sum()])
+    production_share = production.groupby(level=0).sum() / production.sum()
+
+    summary = {
+        ('system', 'objective'): n.objective,
+        ('system', 'system cost [euro/MWh]'): n.objective / load,
+        ('system', 'co2 emissions'): co2_emissions,
+        ('system', 'total load'): load,
+    }
+    sensitivity = getattr(n, 'sensitivity', {})
+    if 'carbon price' in sensitivity:
+        summary[('system', 'carbon price [euro/t]')] = np.mean(sensitivity['carbon price'])
+    if 'certificate prices' in sensitivity:
+        summary[('system', 'mean certificate price [euro/MWh]')] = sensitivity['certificate prices'].mean()
+    summary.update({('capacity', carrier): value for carrier, value in capacity.groupby(level=0).sum().items()})
+    summary.update({('production share', carrier): value for carrier, value in production_share.items()})
+    return summary
+
+def run_scenario(case, value, network_file='elec_s_337.nc', periods=5, renewable_carriers=None, threads=1, results_dir=None, **kwargs):
+    """Load, solve and summarize one scenario. Runs in a worker process of sweep.
+
+    Args:
+        case (str): One of CASES.
+        value (float): Parameter of the case, see solve_case.
+        network_file (str): Path of the network file.
+        periods (int): Number of hourly snapshots.
+        renewable_carriers (list): Carriers which are counted as renewable, defaults to list_renewable_carriers.
+        threads (int): Number of solver threads of this worker.
+        results_dir (str): Directory of the results dataset the solved network is written to, see write_results.
+        **kwargs: Passed on to the solve function (solver_name, solver_profile, storage_mode, ...).
+
+    Returns:
+        dict: Scenario, solver status and the summary of the solved network.
+    """
+    renewable_carriers = list(list_renewable_carriers if renewable_carriers is None else renewable_carriers)
+    solver_profile = f"{kwargs.pop('solver_profile', 'default')},threads={threads}"
+    record = {('scenario', 'case'): case, ('scenario', 'value'): value}
+
+    n = load_network(network_file, periods)
+    status, condition = solve_case(n, case, value, renewable_carriers, solver_profile=solver_profile, **kwargs)
+    record[('scenario', 'status')] = status
+    record[('scenario', 'condition')] = condition
+    if status == 'ok':
+        record.update(summarize_network(n))
+        if results_dir is not None:
+            write_results(n, results_dir, case=case, value=np.nan if value is None else float(value))
+    return record
+
+def sweep(scenarios, processes=None, threads=1, **kwargs):
+    """Run a grid of scenarios concurrently in a process pool and collect the results in a single table.
+
+    Args:
+        scenarios (dict or list): Either a dict mapping each case to a list of values, e.g.
+            {'co2cap': [0, 3000, 7319], 'certificates': [0.5, 0.8, 1], 'unconstrained': [None]},
+            or a list of (case, value) tuples.
+        processes (int): Number of worker processes, defaults to the number of CPUs.
+        threads (int): Number of solver threads per worker.
+        **kwargs: Passed on to run_scenario (network_file, periods, renewable_carriers, results_dir, storage_mode, ...).
+
+    Returns:
+        pandas.DataFrame: One row per scenario with the outputs of summarize_network.
+    """
+    if isinstance(scenarios, dict):
+        scenarios = [(case, value) for case, values in scenarios.items() for value in values]
+
+    records = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {executor.submit(run_scenario, case, value, threads=threads, **kwargs): (case, value) for case, value in scenarios}
+        for future, (case, value) in futures.items():
+            try:
+                records.append(future.result())
+            except Exception:
+                logger.exception(f"Scenario {case} = {value} failed.")
+                records.append({('scenario', 'case'): case, ('scenario', 'value'): value, ('scenario', 'status'): 'error'})
+
+    results = pd.DataFrame(records)
+    results.columns = pd.MultiIndex.from_tuples(results.columns)
+    return results
+
+
+if __name__=="__main__":
+    scenarios = {
+        'unconstrained': [None],
+        'co2cap': [0.25*7319, 0.5*7319, 0.75*7319],
+        'certificates': [0.5, 0.75, 1],
+    }
+    results = sweep(scenarios, processes=4, threads=2)
+    print(results.T)
@@ -0,0 +1,181 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CO2_LIMIT = 'GlobalConstraint-CO2Limit'
+PRODUCTION_SHARE = 'Generator-production_share'
+
+def flat(data):
+    """A DataArray of a constraint family (labels, rhs, duals) as a Series with one entry per row."""
+    data = data.to_pandas() if data.ndim else pd.Series([data.item()])
+    return data.stack() if isinstance(data, pd.DataFrame) else data
+
+def model_scaling(n):
+    """Power and cost scale of the units ``n.model`` was solved in, (1, 1) for MW and EUR, see scaling.scaled_units.
+    Duals of the model are multiplied by cost_scale / power_scale and right hand sides by power_scale to convert
+    them to MW and EUR."""
+    return getattr(n, 'model_scaling', (1., 1.))
+
+def constraint_duals(n, name):
+    """Duals of a constraint family of the solved model, the change of the objective per unit increase of the right
+    hand side (positive for binding >= constraints, negative for binding <= constraints).
+
+    Returns:
+        pandas.Series: Dual per row, indexed by the coordinates of the constraint; a scalar for a single row.
+    """
+    dual = n.model.constraints[name].dual
+    if dual.ndim == 0:
+        return float(dual)
+    return dual.to_pandas()
+
+def carbon_price(n):
+    """Carbon price of the CO2Limit in currency per t: the saving of the objective per t the cap is relaxed.
+    It is read from n.global_constraints.mu, which is converted back to MW and EUR after a scaled solve."""
+    return -n.global_constraints.at['CO2Limit', 'mu']
+
+def certificate_prices(n):
+    """Price of the renewable certificates in currency per MWh, per snapshot or per settlement period (see
+    fix_bus_production): the increase of the objective per MWh of additionally required renewable production.
+    The duals of the per snapshot constraint include the snapshot weightings of the objective, they are divided by
+    them.
+    """
+    power_scale, cost_scale = model_scaling(n)
+    prices = constraint_duals(n, PRODUCTION_SHARE) * cost_scale / power_scale
+    if prices.index.name == 'snapshot':
+        prices = prices / n.snapshot_weightings.objective.loc[prices.index]
+    return prices.rename('certificate price')
+
+def window_prices(n, snapshots):
+    """Carbon price and certificate prices of the window of a rolling horizon which was solved last, see
+    optimize_network. Certificate prices per snapshot are restricted to ``snapshots``, the snapshots of the window
+    which no later window solves again.
+
+    Returns:
+        dict: "carbon price" (float) and "certificate prices" (pandas.Series), for the constraints of the model only.
+    """
+    prices = {}
+    if CO2_LIMIT in n.model.constraints:
+        prices['carbon price'] = carbon_price(n)
+    if PRODUCTION_SHARE in n.model.constraints:
+        certificates = certificate_prices(n)
+        prices['certificate prices'] = certificates.loc[snapshots] if certificates.index.name == 'snapshot' else certificates
+    return prices
+
+def assemble_window_prices(prices):
+    """Combine the prices of the windows of a rolling horizon, as returned by window_prices for every window.
+
+    Returns:
+        dict: "carbon price" per window and "certificate prices" per snapshot or per window and settlement period
+        (pandas.Series), for the constraints of the model only.
+    """
+    assembled = {}
+    if prices and 'carbon price' in prices[0]:
+        assembled['carbon price'] = pd.Series([p['carbon price'] for p in prices], name='carbon price').rename_axis('window')
+    if prices and 'certificate prices' in prices[0]:
+        certificates = pd.concat({i: p['certificate prices'] for i, p in enumerate(prices)}, names=['window'])
+        if certificates.index.names[1] == 'snapshot':
+            certificates = certificates.droplevel('window')
+        assembled['certificate prices'] = certificates
+    return assembled
+
+def solver_model_rows(m, name):
+    """Labels of the active rows of a constraint family and their position in the matrices passed to the solver."""
+    stacked = flat(m.constraints[name].labels)
+    stacked = stacked[stacked != -1]
+    position = pd.Series(np.arange(len(m.matrices.clabels)), index=m.matrices.clabels)
+    return stacked, position.reindex(stacked.values).values
+
+def rhs_ranging(n, name):
+    """Range of the right hand side of every row of a constraint family within which the optimal basis and therefore
+    the dual stay the same; within it the objective changes linearly with the dual.
+    Ranging needs the basis of a simplex solve (or a barrier solve with crossover) of the model passed in memory
+    (io_api='direct') to Gurobi or HiGHS. The range is converted back to MW (or t of CO2) after a solve with scaling.
+
+    Args:
+        n (PyPSA Network): Solved PyPSA network, ``n.model.solver_model`` is queried.
+        name (str): Name of the constraint family, e.g. CO2_LIMIT or PRODUCTION_SHARE.
+
+    Returns:
+        pandas.DataFrame: Columns "rhs", "lower" and "upper" per row, NaN where ranging is not available.
+    """
+    m = n.model
+    rows, positions = solver_model_rows(m, name)
+    ranging = pd.DataFrame({'rhs': flat(m.constraints[name].rhs).reindex(rows.index).values, 'lower': np.nan, 'upper': np.nan}, index=rows.index)
+
+    solver_model = getattr(m, 'solver_model', None)
+    if solver_model is None:
+        logger.warning("No solver model to query for ranging, solve with io_api='direct'.")
+        return ranging
+    try:
+        if type(solver_model).__module__.startswith('gurobipy'):
+            constraints = [solver_model.getConstrByName(f"c{label}") for label in rows.values]
+            ranging['lower'] = solver_model.getAttr('SARHSLow', constraints)
+            ranging['upper'] = solver_model.getAttr('SARHSUp', constraints)
+        else:
+            result = solver_model.getRanging()
+            ranging_result = result[1] if isinstance(result, tuple) else result
+            ranging['lower'] = np.asarray(ranging_result.row_bound_dn.value_)[positions]
+            ranging['upper'] = np.asarray(ranging_result.row_bound_up.value_)[positions]
+    except Exception as e:
+        logger.warning(f"Ranging of {name} is not available: {e}")
+    return ranging * model_scaling(n)[0]
+
+def sensitivity_report(n, ranging=False):
+    """Prices and, optionally, the ranging of the CO2Limit and production_share constraints of a solved network.
+    With the carbon price and the certificate prices, the cost of a slightly tighter cap or higher share follows from
+    one solve; the ranging tells how far the cap or the shares may move before the prices change, see what_if.
+    With a rolling horizon the report holds the prices of every window (``n.window_prices``), the ranging is not
+    available. All values are in MW and EUR, also after a solve with scaling.
+
+    Args:
+        n (PyPSA Network): Solved PyPSA network with its model.
+        ranging (bool): Query the right hand side ranging from the solver, see rhs_ranging.
+
+    Returns:
+        dict: "carbon price" (float, per window with a rolling horizon), "certificate prices" (pandas.Series) and with ranging "CO2Limit ranging" and
+        "production_share ranging" (pandas.DataFrame), for the constraints of the model only.
+    """
+    if getattr(n, 'window_prices', None):
+        if ranging:
+            logger.warning("Ranging is not available with a rolling horizon.")
+        return dict(n.window_prices)
+    report = {}
+    if CO2_LIMIT in n.model.constraints:
+        report['carbon price'] = carbon_price(n)
+        if ranging:
+            report['CO2Limit ranging'] = rhs_ranging(n, CO2_LIMIT)
+    if PRODUCTION_SHARE in n.model.constraints:
+        report['certificate prices'] = certificate_prices(n)
+        if ranging:
+            report['production_share ranging'] = rhs_ranging(n, PRODUCTION_SHARE)
+    return report
+
+def what_if(n, name, rhs):
+    """Objective after changing the right hand side of a constraint family, from the duals of one solve.
+    The estimate is exact if the changes stay within the ranging by the 100 % rule (the sum over the rows of the
+    change divided by the allowed change in its direction is at most 1), otherwise None is returned and the network
+    has to be solved again.
+
+    Example:
+        what_if(n, CO2_LIMIT, 0.9 * n.global_constraints.at['CO2Limit', 'constant'])
+
+    Args:
+        n (PyPSA Network): Solved PyPSA network with its model.
+        name (str): Name of the constraint family, e.g. CO2_LIMIT or PRODUCTION_SHARE.
+        rhs (float or pandas.Series): New right hand side, per row as in rhs_ranging(n, name).
+
+    Returns:
+        float or None: The objective with the new right hand side, None outside of the ranging.
+    """
+    ranging = rhs_ranging(n, name)
+    delta = (pd.Series(rhs, index=ranging.index) if np.isscalar(rhs) else pd.Series(rhs).reindex(ranging.index)) - ranging.rhs
+    allowed = (ranging.upper - ranging.rhs).where(delta > 0, ranging.rhs - ranging.lower)
+    fraction = (delta.abs() / allowed).where(delta != 0, 0.)
+    if not fraction.notna().all() or fraction.sum() > 1:
+        return None
+    power_scale, cost_scale = model_scaling(n)
+    duals = flat(n.model.constraints[name].dual).reindex(ranging.index) * cost_scale / power_scale
+    return n.objective + float((duals.values * delta.values).sum())
@@ -30,7 +30,6 @@ def case_selection(case):
 
     DE_1node.add('Load', 'DE_Load', bus='DE', p_set = [load for _ in range(snapshot)])
 
-    storage_map = {}    
     
     list_renewable_carriers =  ['Renewable','Solar', 'solar','offwind-ac', 'Wind', 'onwind', 'biomass','ror', 'geothermal','hydro', 'offwind-ac', 'offwind-dc', 'Renewable_Storage']  #['Solar','solar', 'onwind', 'biomass', 'geothermal', 'ror', 'offwind-ac', 'hydro', 'offwind-dc', 'PHS', 'Renewable_Storage','Wind']
     if case=='unconstrained':
@@ -7,16 +7,74 @@ Created on Fri Jan  6 18:36:04 2023
 
 import pypsa
 import pandas as pd
-from pypsa.linopt import get_var, linexpr, define_constraints
+import hashlib
+import json
+import glob
+import os
+import tempfile
+import xarray as xr
+from linopy.matrices import MatrixAccessor
+from pypsa.descriptors import get_switchable_as_dense as get_as_dense, nominal_attrs
 import logging
 import numpy as np
 
+from feasibility import precheck_co2_limit, precheck_renewable_shares, renewable_demand
+from network_cache import atomic_write
+from presolve import presolved
+from profiling import profiled, span
+from scaling import scaled_units
+from sensitivity import assemble_window_prices, sensitivity_report, window_prices
+from solver_profiles import solve_with_statistics, solver_settings, timed_solve
+
 logger = logging.getLogger(__name__)
 
+def as_dataarray(data, dim):
+    """Convert a pandas object to a DataArray with the dimension names of the PyPSA model.
+
+    Args:
+        data (pandas.Series or pandas.DataFrame): A Series indexed by ``dim`` or a DataFrame indexed by snapshots with ``dim`` as columns.
+        dim (str): Name of the dimension, e.g. "snapshot" or "StorageUnit".
+
+    Returns:
+        xarray.DataArray: The data with the dimensions ("snapshot", dim) or (dim,).
+    """
+    if isinstance(data, pd.DataFrame):
+        return xr.DataArray(data.values, coords={'snapshot': data.index, dim: data.columns}, dims=['snapshot', dim])
+    return xr.DataArray(data.values, coords={dim: data.index}, dims=[dim])
+
+def renewable_storage_expressions(n, renewable_carriers):
+    """Return the renewable energy that is stored in and dispatched from the storage units per snapshot.
+    This covers the storage units with a renewable carrier (including the fictious storage units) and, in the
+    "soc_share" storage mode, the renewable share variables defined by renewable_soc_share_constraints(n, snapshots)
+    of the other storage units; storage units with a renewable carrier are counted in full and not a second time
+    through their renewable share.
+
+    Args:
+        n (PyPSA Network): PyPSA network to which the constraint is added.
+        renewable_carriers (list): Carriers which are counted as renewable.
+
+    Returns:
+        tuple: The store terms (with a negative sign) and the dispatch terms, both lists of linopy expressions over snapshots.
+    """
+    m = n.model
+    renewable_storage_units = n.storage_units[n.storage_units.carrier.isin(renewable_carriers)].index
+    store, dispatch = [], []
+    if not renewable_storage_units.empty:
+        store.append(-m["StorageUnit-p_store"].sel(StorageUnit=renewable_storage_units).sum("StorageUnit"))
+        dispatch.append(m["StorageUnit-p_dispatch"].sel(StorageUnit=renewable_storage_units).sum("StorageUnit"))
+    if "StorageUnit-p_store_renewable" in m.variables:
+        shared = m["StorageUnit-p_store_renewable"].indexes['StorageUnit'].difference(renewable_storage_units)
+        if not shared.empty:
+            store.append(-m["StorageUnit-p_store_renewable"].sel(StorageUnit=shared).sum("StorageUnit"))
+            dispatch.append(m["StorageUnit-p_dispatch_renewable"].sel(StorageUnit=shared).sum("StorageUnit"))
+    return store, dispatch
+
+@profiled
 def storage_restriction(n, snapshots,renewable_carriers):
     """Define the constraint that ensure that energy generated by renewable resources that has been stored in storage units a
     fictious storage unit was added for each normal storage unit that would only allow charging using generation units with 
     the carrier "Renewable" (this is defined in the function storage_restriction(n,snapshots)).
+    The renewable energy stored per snapshot can not exceed the renewable feed-in of the same snapshot.
 
     Args:
         n (PyPSA Network): PyPSA network to which the constraint is added.
@@ -24,18 +82,16 @@ def storage_restriction(n, snapshots,renewable_carriers):
     """
 
     renewable_generators = n.generators[n.generators.carrier.isin(renewable_carriers)].index
-    renewable_storage_units = n.storage_units[n.storage_units.carrier.isin(renewable_carriers)].index
-    storage_units  = n.storage_units[~(n.storage_units.carrier.isin(renewable_carriers))].index
 
-    renewable_generators_feed_in = (linexpr((1, get_var(n, "Generator", "p")[renewable_generators]))).sum(axis=1)
-    renewable_storage_units_store = (linexpr((1, get_var(n, "StorageUnit", "p_store")[renewable_storage_units]))).sum(axis=1)
-    renewable_storage_units_dispatch = (linexpr((1, get_var(n, "StorageUnit", "p_dispatch")[renewable_storage_units]))).sum(axis=1)
+    renewable_generators_feed_in = n.model["Generator-p"].sel(Generator=renewable_generators).sum("Generator")
+    renewable_storage_units_store, renewable_storage_units_dispatch = renewable_storage_expressions(n, renewable_carriers)
 
-    define_constraints(
-        n, renewable_generators_feed_in +renewable_storage_units_store, ">=", 0, "Generator", "restrict_renewable_storages_share"
+    n.model.add_constraints(
+        sum(renewable_storage_units_store, renewable_generators_feed_in) >= 0, name="Generator-restrict_renewable_storages_share"
     )
 
-def storage_variables_constraints(n, snapshots,renewable_carriers):
+@profiled
+def storage_variables_constraints(n, snapshots,storage_map):
     """Define the constraint that coupple the fictious and real storage variables together
     To ensure the fictious storage units do not extent the normal (conventional) storage units or 
     in other words provide more storage possibility to the system and stay purely fictious, the optimization
@@ -43,196 +99,930 @@ def storage_variables_constraints(n, snapshots,renewable_carriers):
     This means that the sum of both storage units (fictious + conventional) is limited by the maximum/minimum
     properties of the corresponding normal storage unit.
 
+    Each constraint family is built for all storage units at once: the variables of the fictious units are
+    relabelled with the name of their normal storage unit, so the coupled expressions are a single aligned
+    array (snapshots x storage units). For extendable units the capacity enters the left hand side as
+    the ``p_nom`` variable, for non-extendable units it enters the right hand side as a constant.
+
     Args:
         n (PyPSA Network): PyPSA network to which the constraint is added.
         snapshots (list or pandas.Index): List of snapshots or time steps. All time-dependent series quantities are indexed by network.snapshots.
+        storage_map (pandas.Series): Fictious storage unit per real storage unit, as returned by get_storage_map(n).
     """    
-    renewable_storage_units = n.storage_units[n.storage_units.carrier.isin(renewable_carriers)].index
-    renewable_storage_units_ext = n.storage_units[n.storage_units.carrier.isin(renewable_carriers) & n.storage_units.p_nom_extendable].index
-    storage_units  = n.storage_units[~(n.storage_units.carrier.isin(renewable_carriers))].index
-    storage_units_ext = n.storage_units[~(n.storage_units.carrier.isin(renewable_carriers)) & n.storage_units.p_nom_extendable].index
-    storage_units_non_ext = n.storage_units[~(n.storage_units.carrier.isin(renewable_carriers)) & ~(n.storage_units.p_nom_extendable)].index
+    m = n.model
+    storage_units = storage_map.index
+    renewable_storage_units = pd.Index(storage_map.values)
+    if storage_units.empty:
+        return
 
-    renewable_storage_units_store = (linexpr((1, get_var(n, "StorageUnit", "p_store")[renewable_storage_units])))
-    storage_units_store = (linexpr((1, get_var(n, "StorageUnit", "p_store")[storage_units])))
+    extendable = n.storage_units.p_nom_extendable
+    is_ext = extendable[storage_units].values & extendable[renewable_storage_units].values
+    storage_units_ext = storage_units[is_ext]
+    is_ext = xr.DataArray(is_ext, coords={'StorageUnit': storage_units}, dims=['StorageUnit'])
 
-    renewable_storage_units_dispatch = (linexpr((1, get_var(n, "StorageUnit", "p_dispatch")[renewable_storage_units])))
-    storage_units_dispatch = (linexpr((1, get_var(n, "StorageUnit", "p_dispatch")[storage_units]))) 
+    def coupled(attr):
+        """Sum of the real and the fictious storage variable, labelled by the real storage unit."""
+        var = m[f"StorageUnit-{attr}"]
+        return var.sel(StorageUnit=storage_units) + var.sel(StorageUnit=renewable_storage_units).assign_coords(StorageUnit=storage_units)
 
-    renewable_storage_units_soc = (linexpr((1, get_var(n, "StorageUnit", "state_of_charge")[renewable_storage_units])))
-    storage_units_soc = (linexpr((1, get_var(n, "StorageUnit", "state_of_charge")[storage_units])))
-    storage_units_store_max_non_ext = (linexpr((-1, (n.storage_units.p_nom*n.storage_units.p_max_pu)[storage_units_non_ext])))
-    try:
-        storage_units_store_max_ext = (linexpr((-1, (get_var(n, "StorageUnit", "p_nom")*n.storage_units.p_max_pu)[storage_units_ext])))
-        storage_units_dispatch_max_ext = (linexpr((-1, (get_var(n, "StorageUnit", "p_nom")*n.storage_units.p_min_pu)[storage_units_ext])))
-        storage_units_soc_max_ext = (linexpr((-n.storage_units.max_hours[storage_units_ext], (get_var(n, "StorageUnit", "p_nom"))[storage_units_ext])))
-    except KeyError:
-        storage_units_store_max_ext = None
-        storage_units_dispatch_max_ext = None
-        storage_units_soc_max_ext = None
+    def capacity_bound(attr, coefficient):
+        """Bound the coupled variable by ``coefficient * p_nom`` of the real storage unit."""
+        coefficient = as_dataarray(coefficient, 'StorageUnit')
+        lhs = coupled(attr)
+        rhs = coefficient * as_dataarray(n.storage_units.p_nom[storage_units], 'StorageUnit')
+        if not storage_units_ext.empty:
+            p_nom = m["StorageUnit-p_nom"].rename({"StorageUnit-ext": "StorageUnit"}).reindex(StorageUnit=storage_units)
+            lhs = lhs - p_nom * coefficient.where(is_ext, 0)
+            rhs = rhs.where(~is_ext, 0)
+        return lhs, rhs
 
-    storage_units_dispatch_max_non_ext = (linexpr((-1, (n.storage_units.p_nom*n.storage_units.p_min_pu)[storage_units_non_ext])))
-    storage_units_soc_max_non_ext = (linexpr((-n.storage_units.max_hours[storage_units_non_ext], (n.storage_units.p_nom)[storage_units_non_ext])))
+    p_max_pu = get_as_dense(n, "StorageUnit", "p_max_pu", snapshots)[storage_units]
+    p_min_pu = get_as_dense(n, "StorageUnit", "p_min_pu", snapshots)[storage_units]
+    max_hours = pd.DataFrame(
+        np.tile(n.storage_units.max_hours[storage_units].values, (len(snapshots), 1)),
+        index=snapshots, columns=storage_units,
+    )
 
-    try:
-        renewable_storage_units_extension = (linexpr((1, (get_var(n, "StorageUnit", "p_nom"))[renewable_storage_units_ext])))
-        storage_units_extension = (linexpr((-1, (get_var(n, "StorageUnit", "p_nom"))[storage_units_ext])))
-    except KeyError:
-        logger.warning("No storage unit extension is allowed.")
+    with span("StorageUnit-max_store"):
+        lhs, rhs = capacity_bound("p_store", -p_min_pu)
+        m.add_constraints(lhs <= rhs, name="StorageUnit-max_store")
 
-    for s, name in enumerate(storage_units):
-        if name in storage_units_ext:
-            define_constraints(
-                n, renewable_storage_units_store[renewable_storage_units[s]] + storage_units_store[storage_units[s]] + storage_units_store_max_ext[storage_units[s]], "<=", 0, "StorageUnit", "max_store"
-                )
-
-            define_constraints(
-                n, renewable_storage_units_dispatch[renewable_storage_units[s]] + storage_units_dispatch[storage_units[s]] + storage_units_dispatch_max_ext[storage_units[s]], "<=", 0, "StorageUnit", "max_dispatch"
-                )
-
-            define_constraints(
-                n,  storage_units_soc_max_ext[storage_units[s]] + renewable_storage_units_soc[renewable_storage_units[s]] + storage_units_soc[storage_units[s]], "<=", 0, "StorageUnit", "state_of_charge_restriction"
-                )
-            define_constraints(
-                n, renewable_storage_units_extension[renewable_storage_units[s]] + storage_units_extension[storage_units[s]], "==", 0, "StorageUnit", "storage_extension"
-                )
-        else:
-            define_constraints(
-                n, renewable_storage_units_store[renewable_storage_units[s]] + storage_units_store[storage_units[s]] + storage_units_store_max_non_ext[storage_units[s]], "<=", 0, "StorageUnit", "max_store"
-                )
+    with span("StorageUnit-max_dispatch"):
+        lhs, rhs = capacity_bound("p_dispatch", p_max_pu)
+        m.add_constraints(lhs <= rhs, name="StorageUnit-max_dispatch")
 
-            define_constraints(
-                n, renewable_storage_units_dispatch[renewable_storage_units[s]] + storage_units_dispatch[storage_units[s]] + storage_units_dispatch_max_non_ext[storage_units[s]], "<=", 0, "StorageUnit", "max_dispatch"
-                )
+    with span("StorageUnit-state_of_charge_restriction"):
+        lhs, rhs = capacity_bound("state_of_charge", max_hours)
+        m.add_constraints(lhs <= rhs, name="StorageUnit-state_of_charge_restriction")
+
+    if storage_units_ext.empty:
+        logger.warning("No storage unit extension is allowed.")
+        return
 
-            define_constraints(
-                n,  storage_units_soc_max_non_ext[storage_units[s]] + renewable_storage_units_soc[renewable_storage_units[s]] + storage_units_soc[storage_units[s]], "<=", 0, "StorageUnit", "state_of_charge_restriction"
-                )
+    with span("StorageUnit-storage_extension"):
+        p_nom = m["StorageUnit-p_nom"].rename({"StorageUnit-ext": "StorageUnit"})
+        lhs = (
+            p_nom.sel(StorageUnit=storage_map[storage_units_ext].values).assign_coords(StorageUnit=storage_units_ext)
+            - p_nom.sel(StorageUnit=storage_units_ext)
+        )
+        m.add_constraints(lhs == 0, name="StorageUnit-storage_extension")
             
+@profiled
+def renewable_soc_share_constraints(n, snapshots):
+    """Define the renewable share of the storage units without fictious storage units ("soc_share" storage mode).
+    Instead of adding a fictious copy of every storage unit, three auxiliary variables are defined per storage unit
+    and snapshot: the renewable part of the charging power (p_store_renewable), of the discharging power
+    (p_dispatch_renewable) and of the state of charge (state_of_charge_renewable). Each of them is bounded by the
+    corresponding variable of the storage unit, and the renewable state of charge follows the same energy balance
+    as the state of charge of the storage unit (efficiencies, standing losses and snapshot weightings). The
+    renewable state of charge starts from the column ``state_of_charge_initial_renewable`` of ``n.storage_units``
+    (empty if the column does not exist), or is cyclic for storage units with cyclic_state_of_charge.
+
+    Args:
+        n (PyPSA Network): PyPSA network to which the variables and constraints are added.
+        snapshots (list or pandas.Index): List of snapshots or time steps. All time-dependent series quantities are indexed by network.snapshots.
+    """
+    m = n.model
+    storage_units = n.storage_units.index
+    if storage_units.empty:
+        return
+
+    coords = [pd.Index(snapshots, name='snapshot'), storage_units.rename('StorageUnit')]
+    renewable_store = m.add_variables(lower=0, coords=coords, name="StorageUnit-p_store_renewable")
+    renewable_dispatch = m.add_variables(lower=0, coords=coords, name="StorageUnit-p_dispatch_renewable")
+    renewable_soc = m.add_variables(lower=0, coords=coords, name="StorageUnit-state_of_charge_renewable")
+
+    for attr, renewable_var in [("p_store", renewable_store), ("p_dispatch", renewable_dispatch), ("state_of_charge", renewable_soc)]:
+        m.add_constraints(renewable_var - m[f"StorageUnit-{attr}"] <= 0, name=f"StorageUnit-max_{attr}_renewable")
+
+    weightings = n.snapshot_weightings.stores.loc[snapshots]
+    efficiency_store = get_as_dense(n, "StorageUnit", "efficiency_store", snapshots)[storage_units]
+    efficiency_dispatch = get_as_dense(n, "StorageUnit", "efficiency_dispatch", snapshots)[storage_units]
+    standing_loss = get_as_dense(n, "StorageUnit", "standing_loss", snapshots)[storage_units]
+
+    eff_standing = (1 - standing_loss).pow(weightings, axis=0)
+    cyclic = n.storage_units.cyclic_state_of_charge[storage_units]
+    initial = n.storage_units.get('state_of_charge_initial_renewable', pd.Series(0., index=n.storage_units.index))
+    rhs = pd.DataFrame(0., index=snapshots, columns=storage_units)
+    rhs.iloc[0] = -(eff_standing.iloc[0] * initial.fillna(0)[storage_units]).where(~cyclic, 0)
+    eff_standing.iloc[0] = eff_standing.iloc[0].where(cyclic, 0)
+
+    lhs = (
+        renewable_soc.roll(snapshot=1) * as_dataarray(eff_standing, 'StorageUnit')
+        - renewable_soc
+        + renewable_store * as_dataarray(efficiency_store.mul(weightings, axis=0), 'StorageUnit')
+        - renewable_dispatch * as_dataarray((1 / efficiency_dispatch).mul(weightings, axis=0), 'StorageUnit')
+    )
+    m.add_constraints(lhs == as_dataarray(rhs, 'StorageUnit'), name="StorageUnit-state_of_charge_renewable")
+
+@profiled
+def assign_renewable_soc_solution(n, snapshots):
+    """Write the renewable state of charge of the "soc_share" storage mode to ``n.storage_units_t.state_of_charge_renewable``.
+
+    Args:
+        n (PyPSA Network): Solved PyPSA network.
+        snapshots (list or pandas.Index): Snapshots of the solved model.
+    """
+    if "StorageUnit-state_of_charge_renewable" not in n.model.variables:
+        return
+    solution = n.model["StorageUnit-state_of_charge_renewable"].solution.to_pandas()
+    if 'state_of_charge_renewable' not in n.storage_units_t:
+        n.storage_units_t['state_of_charge_renewable'] = pd.DataFrame(index=n.snapshots, columns=n.storage_units.index, dtype=float)
+    n.storage_units_t['state_of_charge_renewable'].loc[snapshots, solution.columns] = solution.loc[snapshots].values
+
+# Costs per unit of capacity of a storage unit, the fictious storage units do not pay them.
+CAPACITY_COSTS = ['capital_cost']
+
+@profiled
 def create_fictious_storage_units(n):
     """Create fictious storage units for each storage unit.
     The fictious storage units are created in order to be able to model the share of renewable storage units in the system.
     The share of renewable storage units is defined by the user and is used to limit the share of renewable storage units in the system.
+    Every fictious storage unit records the name of its real storage unit in the column ``real_storage_unit``, so the
+    pairing is attached to the components themselves and survives reordering or filtering of ``n.storage_units``.
+    Storage units which already have a fictious twin are skipped.
+    The initial state of charge is split as in the "soc_share" storage mode: the fictious storage unit starts with
+    the renewable part ``state_of_charge_initial_renewable`` (0 if the column does not exist) and the real storage
+    unit with the rest, so the initial energy is counted once.
+    The capacity of a fictious storage unit is tied to the capacity of its real storage unit and is not built
+    again, so its per capacity costs (CAPACITY_COSTS) are 0 and the capacity is only paid for once.
     Args:
         n (PyPSA Network): PyPSA network to which the new storage units are added.
+
+    Returns:
+        pandas.Series: Fictious storage unit per real storage unit, see get_storage_map(n).
     """    
-    n.madd('StorageUnit',
-        n.storage_units.index,
-        suffix='_Renewable',
-        carrier='Renewable_Storage',
-        **n.storage_units.drop('carrier', axis=1))
+    storage_map = get_storage_map(n)
+    is_twin = n.storage_units.index.isin(storage_map.values)
+    real_storage_units = n.storage_units[~is_twin & ~n.storage_units.index.isin(storage_map.index)]
+    if not real_storage_units.empty:
+        initial_renewable = real_storage_units.get('state_of_charge_initial_renewable', pd.Series(0., index=real_storage_units.index)).fillna(0.)
+        n.madd('StorageUnit',
+            real_storage_units.index,
+            suffix='_Renewable',
+            carrier='Renewable_Storage',
+            real_storage_unit=pd.Series(real_storage_units.index, index=real_storage_units.index),
+            state_of_charge_initial=initial_renewable,
+            **{attr: 0. for attr in CAPACITY_COSTS},
+            **real_storage_units.drop(['carrier', 'real_storage_unit', 'state_of_charge_initial', 'state_of_charge_initial_renewable', *CAPACITY_COSTS], axis=1, errors='ignore'))
+        n.storage_units.loc[real_storage_units.index, 'state_of_charge_initial'] -= initial_renewable
+
+    return get_storage_map(n)
+
+def get_storage_map(n):
+    """Return the pairing of the real storage units with their fictious renewable storage units.
+    The pairing is read from the ``real_storage_unit`` column written by create_fictious_storage_units(n) and is
+    label based, pairs whose real or fictious storage unit is not part of the network are dropped.
+    Args:
+        n (PyPSA Network): PyPSA network with fictious storage units.
+
+    Returns:
+        pandas.Series: Indexed by the real storage units, holding the name of the corresponding fictious storage unit.
+    """
+    if 'real_storage_unit' not in n.storage_units:
+        return pd.Series(dtype=object, name='fictious_storage_unit')
+    real = n.storage_units.real_storage_unit.dropna()
+    real = real[real.isin(n.storage_units.index) & (real != '')]
+    return pd.Series(real.index, index=pd.Index(real.values, name='StorageUnit'), name='fictious_storage_unit')
+
+def topology_key(n, snapshots, tag=''):
+    """Return a key that identifies the structure of the model of a network.
+    The key is a hash of the names of all components, their extendability, the snapshots and a tag (e.g. the case
+    and the storage mode), so networks which lead to the same variables and constraints share the same key.
+
+    Args:
+        n (PyPSA Network): PyPSA network.
+        snapshots (list or pandas.Index): Snapshots of the model.
+        tag (str): Additional description of the model, e.g. the case.
+
+    Returns:
+        str: Hexadecimal hash.
+    """
+    key = hashlib.sha1()
+    for c in n.iterate_components():
+        key.update(c.name.encode())
+        key.update('\n'.join(c.df.index.astype(str)).encode())
+        if c.name in nominal_attrs:
+            key.update(c.df[nominal_attrs[c.name] + '_extendable'].values.tobytes())
+    key.update('\n'.join(pd.Index(snapshots).astype(str)).encode())
+    key.update(tag.encode())
+    return key.hexdigest()
+
+def cold_solve(warm_start_dir, key):
+    """Solver time and simplex iterations of the first cold solve of a model recorded by any process, None if there
+    was none."""
+    for statistics_fn in sorted(glob.glob(os.path.join(warm_start_dir, key + '.*.json'))):
+        with open(statistics_fn) as f:
+            cold = json.load(f)['cold solve']
+        if cold is not None:
+            return cold
+    return None
+
+def solve_with_warm_start(n, snapshots, solve, warm_start_dir=None, tag='', **kwargs):
+    """Call ``solve(**kwargs)`` warm started from the stored basis of the same model and store its final basis.
+    The basis is stored as ``<warm_start_dir>/<topology_key>.bas``, so later solves of related scenarios, also in
+    other processes, start from it. The solver writes the final basis to a temporary file which then replaces the
+    stored basis, so processes solving in parallel never read a partially written basis. The solver time and the
+    simplex iterations of every solve (see solver_profiles.solve_with_statistics) are appended to
+    ``<topology_key>.<process id>.json`` next to the basis, one file per process, together with what a warm
+    started solve saved against the first (cold) solve of the same model. Only the solver is compared, building
+    the model takes as long with and without warm start.
+
+    Args:
+        n (PyPSA Network): PyPSA network to be solved.
+        snapshots (list or pandas.Index): Snapshots of the model.
+        solve (callable): Function solving the network, it receives ``warmstart_fn`` and ``basis_fn``.
+            The wall time and iteration counts of every solve are recorded by solver_profiles.solve_with_statistics.
+        warm_start_dir (str): Directory of the stored bases, None solves without warm start.
+        tag (str): Additional description of the model, see topology_key.
+        **kwargs: Passed on to solve, except ``solver_profile`` which only labels the recorded statistics.
+
+    Returns:
+        tuple: Status and termination condition of the solve.
+    """
+    solver_profile = kwargs.pop('solver_profile', 'default')
+    if warm_start_dir is None:
+        return solve_with_statistics(n, solve, solver_profile, **kwargs)
+
+    os.makedirs(warm_start_dir, exist_ok=True)
+    key = topology_key(n, snapshots, tag)
+    basis_fn = os.path.join(warm_start_dir, key + '.bas')
+    statistics_fn = os.path.join(warm_start_dir, f"{key}.{os.getpid()}.json")
+    warm_start = os.path.exists(basis_fn)
+    if warm_start:
+        kwargs.setdefault('warmstart_fn', basis_fn)
+    fd, solved_basis_fn = tempfile.mkstemp(dir=warm_start_dir, prefix=key + '.tmp.', suffix='.bas')
+    os.close(fd)
+    kwargs.setdefault('basis_fn', solved_basis_fn)
+
+    try:
+        status, condition = solve_with_statistics(n, solve, solver_profile, **kwargs)
+    finally:
+        if os.path.getsize(solved_basis_fn) > 0:
+            os.replace(solved_basis_fn, basis_fn)
+        else:
+            os.remove(solved_basis_fn)
+    solved = {attr: n.solver_statistics[-1][attr] for attr in ['solver time [s]', 'simplex iterations']}
+
+    statistics = {'cold solve': None, 'solves': []}
+    if os.path.exists(statistics_fn):
+        with open(statistics_fn) as f:
+            statistics = json.load(f)
+    if not warm_start and statistics['cold solve'] is None:
+        statistics['cold solve'] = solved
+    cold = cold_solve(warm_start_dir, key) if warm_start else None
+    saved = {
+        name: cold[attr] - solved[attr] if cold is not None and None not in (cold[attr], solved[attr]) else None
+        for name, attr in [('solver time saved [s]', 'solver time [s]'), ('simplex iterations saved', 'simplex iterations')]
+    }
+    statistics['solves'].append({'warm start': warm_start, **solved, **saved, 'status': status})
+    atomic_write(statistics_fn, json.dumps(statistics, indent=1).encode())
+
+    if warm_start:
+        logger.info(f"Warm started solve: {solved}, saved against the cold solve: {saved}.")
+    else:
+        logger.info(f"Cold solve: {solved}, basis stored in {basis_fn}.")
+    return status, condition
+
+def optimize_stages(n, snapshots, multi_investment_periods=False, transmission_losses=0, linearized_unit_commitment=False, model_kwargs={}, extra_functionality=None, assign_all_duals=False, solver_name='glpk', solver_options={}, **kwargs):
+    """Optimize the network like n.optimize, but stage by stage, so every stage is recorded as a profiling span:
+    the consistency check, the creation of the model, the extra functionality, the solver (including writing the
+    problem and reading the solution into the model, which linopy does in one call) and the assignment of the
+    solution to the network.
+
+    Args:
+        n (PyPSA Network): PyPSA network to be solved.
+        snapshots (pandas.Index): Snapshots to optimize.
+        multi_investment_periods (bool): Optimize over the investment periods of the snapshots, see n.optimize.
+        transmission_losses (int): Number of segments of the linearized transmission losses, see n.optimize.
+        linearized_unit_commitment (bool): Linearize the unit commitment, see n.optimize.
+        model_kwargs (dict): Passed on to the linopy model, e.g. solver_dir or chunk.
+        extra_functionality (callable): Called as ``extra_functionality(n, snapshots)`` after the model is created.
+        assign_all_duals (bool): Assign all duals to the network, see n.optimize.
+        solver_name (str): Name of the solver.
+        solver_options (dict): Options of the solver.
+        **kwargs: Passed on to the solve of the linopy model (io_api, warmstart_fn, basis_fn, ...).
+
+    Returns:
+        tuple: Status and termination condition of the solve.
+    """
+    with span('consistency check'):
+        n.consistency_check()
+    with span('create model'):
+        n.optimize.create_model(snapshots, multi_investment_periods, transmission_losses, linearized_unit_commitment, consistency_check=False, **model_kwargs)
+    if extra_functionality is not None:
+        with span('extra functionality'):
+            extra_functionality(n, snapshots)
+    return solve_model(n, solver_name, solver_options, assign_all_duals, **kwargs)
+
+def solve_model(n, solver_name='glpk', solver_options={}, assign_all_duals=False, **kwargs):
+    """Solve the model in ``n.model`` and assign the solution to the network like n.optimize.solve_model. The
+    solver and the assignment are recorded as profiling spans and the time of the solver in ``n.solver_time``,
+    see solver_profiles.timed_solve.
+
+    Args:
+        n (PyPSA Network): PyPSA network with a model.
+        solver_name (str): Name of the solver.
+        solver_options (dict): Options of the solver.
+        assign_all_duals (bool): Assign all duals to the network, see n.optimize.
+        **kwargs: Passed on to the solve of the linopy model (io_api, warmstart_fn, basis_fn, ...).
+
+    Returns:
+        tuple: Status and termination condition of the solve.
+    """
+    with span('solver'):
+        status, condition = timed_solve(n, solver_name=solver_name, **solver_options, **kwargs)
+    if status == 'ok':
+        with span('assign solution'):
+            n.optimize.assign_solution()
+            n.optimize.assign_duals(assign_all_duals=assign_all_duals)
+            n.optimize.post_processing()
+    return status, condition
+
+# Dispatch variable of every component which carries the marginal costs in the objective, as in pypsa.
+OPERATION_ATTRIBUTES = {'Generator': 'p', 'StorageUnit': 'p_dispatch', 'Store': 'p', 'Link': 'p0'}
+
+def operational_costs(n, snapshots):
+    """Marginal costs of the solved dispatch in the snapshots, weighted by the objective snapshot weightings as in
+    the objective."""
+    weighting = n.snapshot_weightings.objective.loc[snapshots]
+    cost = 0.
+    for component, attr in OPERATION_ATTRIBUTES.items():
+        dispatch = n.pnl(component)[attr]
+        if dispatch.empty:
+            continue
+        dispatch = dispatch.loc[snapshots]
+        marginal_cost = get_as_dense(n, component, 'marginal_cost', snapshots, dispatch.columns)
+        cost += weighting @ (dispatch * marginal_cost).sum(axis=1)
+    return cost
+
+def primary_energy_emissions(n, snapshots, carrier_attribute='co2_emissions'):
+    """Emissions of the solved dispatch in the snapshots as a "primary_energy" GlobalConstraint counts them: the
+    generation of the emitting generators divided by their efficiency, weighted by the generator snapshot
+    weightings, and the energy the non-cyclic storage units with an emitting carrier released between their initial
+    state of charge and the last of the snapshots."""
+    emissions = n.carriers[carrier_attribute][lambda ds: ds != 0]
+    generators = n.generators.index[n.generators.carrier.isin(emissions.index)]
+    weighting = n.snapshot_weightings.generators.loc[snapshots]
+    efficiency = get_as_dense(n, 'Generator', 'efficiency', snapshots, generators)
+    intensity = n.generators.carrier[generators].map(emissions)
+    total = weighting @ (n.generators_t.p.loc[snapshots, generators] / efficiency * intensity).sum(axis=1)
+    storage_units = n.storage_units.index[n.storage_units.carrier.isin(emissions.index) & ~n.storage_units.cyclic_state_of_charge]
+    if not storage_units.empty:
+        released = n.storage_units.state_of_charge_initial[storage_units] - n.storage_units_t.state_of_charge.loc[snapshots[-1], storage_units]
+        total += (released * n.storage_units.carrier[storage_units].map(emissions)).sum()
+    return total
+
+@profiled
+def optimize_network(n, snapshots=None, horizon=None, overlap=0, warm_start_dir=None, tag='', scaling=None, presolve=False, **kwargs):
+    """Optimize the network over all snapshots at once or with a rolling horizon.
+    With a rolling horizon the snapshots are solved in windows of ``horizon`` snapshots, consecutive windows share
+    ``overlap`` snapshots and the later window overwrites the results of the shared snapshots. Only one window is
+    held in memory as a model at a time. The state of charge of all storage units (real and fictious) and the
+    renewable state of charge of the "soc_share" storage mode are carried from the last snapshot before a window
+    into the window as its initial state of charge; storage units are therefore not cyclic within the windows.
+    The constants of the "primary_energy" GlobalConstraints (e.g. CO2Limit) are split over the windows: each window
+    gets the part of the remaining constant proportional to its snapshot weightings, and only the emissions of the
+    snapshots it keeps are subtracted from the remaining constant. The last window gets all that remains, so the
+    kept snapshots of all windows together stay within the constant. ``n.objective`` is the sum of the objectives
+    of the windows without the marginal costs of the snapshots a later window solves again, and the carbon price and
+    the certificate prices of every window are kept in ``n.window_prices``, see sensitivity.window_prices. The capacities
+    are not optimized with a rolling horizon, every window would build its own; networks with extendable components
+    are rejected, fix their capacities first (e.g. to the p_nom_opt of a solve over all snapshots).
+    With ``scaling`` the network is solved in scaled units and the results are converted back, see
+    scaling.scaled_units. With ``presolve`` equivalent generators and storage units are merged and components which
+    cannot be active are removed before the model is built, the results are mapped back to the original components,
+    see presolve.presolved.
+
+    Args:
+        n (PyPSA Network): PyPSA network to be solved.
+        snapshots (list or pandas.Index): Snapshots to optimize, defaults to n.snapshots.
+        horizon (int): Number of snapshots per window, None optimizes all snapshots at once.
+        overlap (int): Number of snapshots shared by consecutive windows.
+        warm_start_dir (str): Directory of the stored bases for warm starts, see solve_with_warm_start.
+        tag (str): Description of the model (case and storage mode) for the key of the stored bases.
+        scaling (bool or tuple): (power_scale, cost_scale) to solve in, True for GW and kEUR (1e3, 1e3), None solves in MW and EUR.
+        presolve (bool): Solve the reduced network.
+        **kwargs: Passed on to optimize_stages.
+
+    Returns:
+        tuple: Status and termination condition of the (last) solve.
+
+    Raises:
+        ValueError: If the overlap is not smaller than the horizon or, with a rolling horizon, if the network has
+            extendable components.
+    """
+    n.window_prices = {}
+    if presolve:
+        with presolved(n):
+            return optimize_network(n, snapshots, horizon, overlap, warm_start_dir, tag, scaling, **kwargs)
+
+    if scaling:
+        power_scale, cost_scale = (1e3, 1e3) if scaling is True else scaling
+        with scaled_units(n, power_scale, cost_scale):
+            return optimize_network(n, snapshots, horizon, overlap, warm_start_dir, tag, **kwargs)
+
+    n.model_scaling = (1., 1.)
+    snapshots = n.snapshots if snapshots is None else pd.Index(snapshots)
+    if horizon is None:
+        status, condition = solve_with_warm_start(n, snapshots, lambda **kw: optimize_stages(n, snapshots, **kw), warm_start_dir, tag, **kwargs)
+        if status == 'ok':
+            assign_renewable_soc_solution(n, snapshots)
+        return status, condition
+    if not 0 <= overlap < horizon:
+        raise ValueError(f"The overlap ({overlap}) has to be smaller than the horizon ({horizon}).")
+    extendable = [c for c, attr in nominal_attrs.items() if n.df(c)[attr + '_extendable'].any()]
+    if extendable:
+        raise ValueError(
+            f"The rolling horizon would optimize the capacities of the extendable {', '.join(extendable)} components "
+            f"in every window; fix their capacities first, e.g. to the p_nom_opt of a solve over all snapshots."
+        )
+
+    cyclic = n.storage_units.cyclic_state_of_charge.copy()
+    initial = n.storage_units.state_of_charge_initial.copy()
+    initial_renewable = n.storage_units.get('state_of_charge_initial_renewable')
+    constants = n.global_constraints.constant.copy()
+    is_primary_energy = n.global_constraints.type == 'primary_energy'
+    weightings = n.snapshot_weightings.generators.loc[snapshots]
+    remaining = constants[is_primary_energy].copy()
+    objective, prices = 0., []
+
+    n.storage_units.cyclic_state_of_charge = False
+    try:
+        for start in range(0, len(snapshots), horizon - overlap):
+            window = snapshots[start:start + horizon]
+            if start:
+                previous = snapshots[start - 1]
+                n.storage_units.state_of_charge_initial = n.storage_units_t.state_of_charge.loc[previous]
+                if 'state_of_charge_renewable' in n.storage_units_t:
+                    n.storage_units['state_of_charge_initial_renewable'] = n.storage_units_t.state_of_charge_renewable.loc[previous]
+            last = start + horizon >= len(snapshots)
+            kept = window if last else window[:horizon - overlap]
+            n.global_constraints.loc[is_primary_energy, 'constant'] = remaining * weightings.loc[window].sum() / weightings.iloc[start:].sum()
+
+            logger.info(f"Optimizing snapshots {window[0]} to {window[-1]}.")
+            status, condition = solve_with_warm_start(n, window, lambda **kw: optimize_stages(n, window, **kw), warm_start_dir, tag, **kwargs)
+            if status != 'ok':
+                logger.warning(f"Optimization of snapshots {window[0]} to {window[-1]} failed with {condition}.")
+                break
+            assign_renewable_soc_solution(n, window)
+            for name in remaining.index:
+                remaining[name] -= primary_energy_emissions(n, kept, n.global_constraints.at[name, 'carrier_attribute'])
+            objective += n.objective - operational_costs(n, window.difference(kept, sort=False))
+            prices.append(window_prices(n, kept))
+            if last:
+                break
+    finally:
+        n.storage_units.cyclic_state_of_charge = cyclic
+        n.storage_units.state_of_charge_initial = initial
+        if initial_renewable is None:
+            n.storage_units.drop('state_of_charge_initial_renewable', axis=1, inplace=True, errors='ignore')
+        else:
+            n.storage_units['state_of_charge_initial_renewable'] = initial_renewable
+        n.global_constraints.constant = constants
+
+    if status == 'ok':
+        n.objective = objective
+        n.window_prices = assemble_window_prices(prices)
+    return status, condition
 
-def solve_network_unconstrained(n, renewable_carriers, *args, **kwargs):
+STORAGE_MODES = ['fictious', 'soc_share']
+
+def prepare_renewable_storage(n, renewable_carriers, storage_mode='fictious'):
+    """Prepare the network for tracking the renewable energy in the storage units.
+    In the "fictious" storage mode a fictious storage unit is created for each storage unit, in the "soc_share"
+    storage mode the components are left untouched and the renewable share is tracked by the auxiliary variables
+    of renewable_soc_share_constraints(n, snapshots).
+
+    Args:
+        n (PyPSA Network): PyPSA network to be solved.
+        renewable_carriers (list): Carriers which are counted as renewable.
+        storage_mode (str): One of STORAGE_MODES.
+
+    Returns:
+        pandas.Series or None: Fictious storage unit per real storage unit, None in the "soc_share" storage mode.
+    """
+    if storage_mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown storage mode '{storage_mode}', choose one of {STORAGE_MODES}.")
+    if storage_mode == 'soc_share':
+        return None
+
+    storage_map = create_fictious_storage_units(n)
+    if 'Renewable_Storage' not in renewable_carriers:
+        renewable_carriers.append('Renewable_Storage')
+    return storage_map
+
+def renewable_storage_constraints(n, snapshots, renewable_carriers, storage_map):
+    """Define the constraints that track the renewable energy in the storage units.
+
+    Args:
+        n (PyPSA Network): PyPSA network to which the constraint is added.
+        snapshots (list or pandas.Index): List of snapshots or time steps. All time-dependent series quantities are indexed by network.snapshots.
+        renewable_carriers (list): Carriers which are counted as renewable.
+        storage_map (pandas.Series or None): As returned by prepare_renewable_storage(n, renewable_carriers, storage_mode).
+            The pairing itself is read from the network again, so storage units merged by the presolve are respected.
+    """
+    if storage_map is None:
+        renewable_soc_share_constraints(n, snapshots)
+    else:
+        storage_variables_constraints(n, snapshots, get_storage_map(n))
+    storage_restriction(n, snapshots, renewable_carriers)
+
+def add_co2_limit(n, co2_emissions):
+    """Add the CO2Limit GlobalConstraint to the network, or update its constant if it already exists.
+
+    Args:
+        n (PyPSA Network): PyPSA network to which the constraint is added.
+        co2_emissions (float): Maximum CO2 emissions over the optimized snapshots.
+    """
+    if 'CO2Limit' in n.global_constraints.index:
+        n.global_constraints.loc['CO2Limit', 'constant'] = co2_emissions
+    else:
+        n.add("GlobalConstraint", "CO2Limit",carrier_attribute="co2_emissions", sense="<=", constant=co2_emissions)
+
+@profiled
+def solve_network_unconstrained(n, renewable_carriers, *args, snapshots=None, horizon=None, overlap=0, storage_mode='fictious', io_api='direct', warm_start_dir=None, solver_name=None, solver_profile='default', **kwargs):
     """Solve the network.
     Args:
         n (PyPSA Network): PyPSA network to be solved.
+        snapshots (list or pandas.Index): Snapshots to optimize, defaults to n.snapshots.
+        horizon (int): Number of snapshots per window of a rolling horizon optimization, None solves all snapshots at once.
+        overlap (int): Number of snapshots shared by consecutive windows, see optimize_network.
+        storage_mode (str): How the renewable energy in storage units is tracked, one of STORAGE_MODES.
+        io_api (str): How the model is passed to the solver. 'direct' hands it over in memory, 'lp' or 'mps' write a problem file.
+        warm_start_dir (str): Directory in which the final basis is stored and from which the solve is warm started, see solve_with_warm_start.
+        solver_name (str): One of solver_profiles.SOLVERS, defaults to gurobi if it is available and HiGHS otherwise.
+        solver_profile (str): Solver options by name, e.g. "barrier-no-crossover" or "dual-simplex,threads=4", see solver_profiles.solver_settings.
+        **kwargs: Passed on to optimize_network, e.g. scaling=True to solve in GW and kEUR or presolve=True.
         """           
     def extra_functionalities(n, snapshots):
-        storage_restriction(n,snapshots,renewable_carriers)
-        storage_variables_constraints(n,snapshots,renewable_carriers)
+        renewable_storage_constraints(n, snapshots, renewable_carriers, storage_map)
     
-    create_fictious_storage_units(n)
-
-    if 'Renewable_Storage' not in renewable_carriers:
-        renewable_carriers.append('Renewable_Storage')
+    storage_map = prepare_renewable_storage(n, renewable_carriers, storage_mode)
 
+    solver_name, solver_options, io_api = solver_settings(solver_name, solver_profile, io_api, kwargs.pop('solver_options', None))
 
-    n.lopf(
-        n.snapshots[:6],
-        solver_name='gurobi',
-        pyomo=False,
+    return optimize_network(
+        n,
+        snapshots,
+        horizon,
+        overlap,
+        solver_name=solver_name,
+        solver_options=solver_options,
+        solver_profile=solver_profile,
         extra_functionality=extra_functionalities,
+        io_api=io_api,
+        warm_start_dir=warm_start_dir,
+        tag=f'unconstrained-{storage_mode}',
+        **kwargs,
     )
 
-def solve_network_co2cap(n, renewable_carriers,co2_emissions, *args, **kwargs):
+@profiled
+def solve_network_co2cap(n, renewable_carriers,co2_emissions, *args, snapshots=None, horizon=None, overlap=0, storage_mode='fictious', io_api='direct', warm_start_dir=None, solver_name=None, solver_profile='default', precheck=True, ranging=False, **kwargs):
     """Solve the network.
     Args:
         n (PyPSA Network): PyPSA network to be solved.
+        snapshots (list or pandas.Index): Snapshots to optimize, defaults to n.snapshots.
+        horizon (int): Number of snapshots per window of a rolling horizon optimization, None solves all snapshots at once.
+        overlap (int): Number of snapshots shared by consecutive windows, see optimize_network.
+        storage_mode (str): How the renewable energy in storage units is tracked, one of STORAGE_MODES.
+        io_api (str): How the model is passed to the solver. 'direct' hands it over in memory, 'lp' or 'mps' write a problem file.
+        warm_start_dir (str): Directory in which the final basis is stored and from which the solve is warm started, see solve_with_warm_start.
+        solver_name (str): One of solver_profiles.SOLVERS, defaults to gurobi if it is available and HiGHS otherwise.
+        solver_profile (str): Solver options by name, e.g. "barrier-no-crossover" or "dual-simplex,threads=4", see solver_profiles.solver_settings.
+        precheck (bool): Reject CO2 caps which are provably infeasible before the model is built, see feasibility.precheck_co2_limit.
+        ranging (bool): Add the right hand side ranging of the constraints to the sensitivity report, see sensitivity.rhs_ranging.
+        **kwargs: Passed on to optimize_network, e.g. scaling=True to solve in GW and kEUR or presolve=True.
+
+    Returns:
+        tuple: Status and termination condition. The carbon price (the dual of the CO2Limit) is kept in
+        ``n.sensitivity``, see sensitivity.sensitivity_report.
     """
 
     def extra_functionalities(n, snapshots):
-        storage_restriction(n,snapshots,renewable_carriers)
-        storage_variables_constraints(n,snapshots,renewable_carriers)  
-        
-    create_fictious_storage_units(n)
+        renewable_storage_constraints(n, snapshots, renewable_carriers, storage_map)
 
-    if 'Renewable_Storage' not in renewable_carriers:
-        renewable_carriers.append('Renewable_Storage')   
+    if precheck:
+        precheck_co2_limit(n, co2_emissions, snapshots)
+
+    storage_map = prepare_renewable_storage(n, renewable_carriers, storage_mode)
     
-    n.add("GlobalConstraint", "CO2Limit",carrier_attribute="co2_emissions", sense="<=", constant=co2_emissions)
+    add_co2_limit(n, co2_emissions)
     
-    n.lopf(
-        n.snapshots[:6],
-        solver_name='gurobi',
-        pyomo=False,
+    solver_name, solver_options, io_api = solver_settings(solver_name, solver_profile, io_api, kwargs.pop('solver_options', None))
+
+    status, condition = optimize_network(
+        n,
+        snapshots,
+        horizon,
+        overlap,
+        solver_name=solver_name,
+        solver_options=solver_options,
+        solver_profile=solver_profile,
         extra_functionality=extra_functionalities,
+        io_api=io_api,
+        warm_start_dir=warm_start_dir,
+        tag=f'co2cap-{storage_mode}',
+        **kwargs,
+    )
+    if status == 'ok':
+        n.sensitivity = sensitivity_report(n, ranging)
+    return status, condition
+
+SETTLEMENTS = {'snapshot': None, 'day': 'D', 'week': 'W', 'month': 'M', 'year': 'Y', 'total': None}
+
+def settlement_periods(snapshots, settlement='snapshot'):
+    """Return the settlement period of every snapshot.
+
+    Args:
+        snapshots (pandas.Index): Snapshots.
+        settlement (str): One of SETTLEMENTS or a pandas frequency, e.g. "3M" for quarters.
+
+    Returns:
+        pandas.Series or None: Period label per snapshot, None if every snapshot is settled on its own.
+    """
+    if settlement == 'snapshot':
+        return None
+    if settlement == 'total':
+        return pd.Series('total', index=snapshots, name='period')
+    freq = SETTLEMENTS.get(settlement, settlement)
+    return pd.Series(pd.DatetimeIndex(snapshots).to_period(freq).astype(str), index=snapshots, name='period')
+
+def renewable_requirement(n, snapshots, renewable_shares, settlement='snapshot'):
+    """Right hand side of the production_share constraint: the renewable production required per snapshot or,
+    weighted by the snapshot weightings, per settlement period.
+
+    Returns:
+        xarray.DataArray: Required renewable production over the dimension "snapshot" or "period".
+    """
+    required = renewable_demand(n, snapshots) * renewable_shares.loc[snapshots]
+    periods = settlement_periods(snapshots, settlement)
+    if periods is None:
+        return as_dataarray(required, 'snapshot')
+    weights = n.snapshot_weightings.generators.loc[snapshots]
+    return as_dataarray((required * weights).groupby(periods, sort=False).sum(), 'period')
+
+@profiled
+def fix_bus_production(n, snapshots, renewable_carriers, renewable_shares, settlement='snapshot'):
+    """Define the constraint that the renewable generation must reach the minimum required renewable share of the demand.
+    By default the share has to be reached in each snapshot. With a settlement period (e.g. "month" or "year") the
+    renewable production and the demand are weighted by the snapshot weightings and summed over each period, as in
+    certificate schemes which settle monthly or annually; this gives one row per period instead of one per snapshot
+    and stays correct on aggregated snapshots (time_aggregation). With a rolling horizon each window settles the
+    part of the periods it covers.
+
+    Args:
+        n (PyPSA Network): PyPSA network to which the constraint is added.
+        snapshots (list or pandas.Index): List of snapshots or time steps. All time-dependent series quantities are indexed by network.snapshots.
+        renewable_carriers (list): Carriers which are counted as renewable.
+        renewable_shares (pandas.Series): Minimum renewable share per snapshot, as returned by define_RE_share(n, renewable_share).
+        settlement (str): Settlement period, one of SETTLEMENTS or a pandas frequency, see settlement_periods.
+    """
+
+    renewable_generators = n.generators[n.generators.carrier.isin(renewable_carriers)].index
+    renewable_storage_units_store, renewable_storage_units_dispatch = renewable_storage_expressions(n, renewable_carriers)
+
+    renewable_generation = n.model["Generator-p"].sel(Generator=renewable_generators).sum("Generator")
+    renewable_production = sum(renewable_storage_units_dispatch + renewable_storage_units_store, renewable_generation)
+
+    periods = settlement_periods(pd.Index(snapshots), settlement)
+    if periods is not None:
+        weights = as_dataarray(n.snapshot_weightings.generators.loc[snapshots], 'snapshot')
+        renewable_production = (renewable_production * weights).groupby(
+            xr.DataArray(periods.values, coords={'snapshot': periods.index}, dims=['snapshot'], name='period')
+        ).sum()
+
+    n.model.add_constraints(
+        renewable_production >= renewable_requirement(n, snapshots, renewable_shares, settlement),
+        name="Generator-production_share"
     )
 
-def solve_network_certificates(n, renewable_shares, renewable_carriers, *args, **kwargs):
+def define_RE_share(n, renewable_share):
+    """Define the share of renewable storage units in the system. and check if the length of the share is equal to the number of snapshots, 
+    and has similar index as the snapshots."""
+    if len(renewable_share) > len(n.snapshots):
+        logger.warning(
+            "The length of passed renewable share per snapshots is greater than the number of snapshots."
+            )
+        logger.warning(
+            f"Only taking the first {len(n.snapshots)} values."
+        )
+        temp_renewable_share = pd.Series(renewable_share[:len(n.snapshots)], index=n.snapshots)
+    elif len(renewable_share) < len(n.snapshots):
+        logger.warning(
+            "The length of passed renewable share per snapshots is less than the number of snapshots."
+            )
+        logger.warning("Filling the missing values with 0s.")
+        temp_renewable_share = pd.Series(0, index=n.snapshots)
+        temp_renewable_share[:len(renewable_share)] = pd.Series(renewable_share, index=n.snapshots[:len(renewable_share)])
+    else:
+        temp_renewable_share = pd.Series(renewable_share, index=n.snapshots)
+
+    return temp_renewable_share
+
+@profiled
+def solve_network_certificates(n, renewable_shares, renewable_carriers, *args, snapshots=None, horizon=None, overlap=0, storage_mode='fictious', io_api='direct', warm_start_dir=None, solver_name=None, solver_profile='default', precheck=True, ranging=False, settlement='snapshot', **kwargs):
     """Solve the network.
     Args:
         n (PyPSA Network): PyPSA network to be solved.
+        snapshots (list or pandas.Index): Snapshots to optimize, defaults to n.snapshots.
+        horizon (int): Number of snapshots per window of a rolling horizon optimization, None solves all snapshots at once.
+        overlap (int): Number of snapshots shared by consecutive windows, see optimize_network.
+        storage_mode (str): How the renewable energy in storage units is tracked, one of STORAGE_MODES.
+        io_api (str): How the model is passed to the solver. 'direct' hands it over in memory, 'lp' or 'mps' write a problem file.
+        warm_start_dir (str): Directory in which the final basis is stored and from which the solve is warm started, see solve_with_warm_start.
+        solver_name (str): One of solver_profiles.SOLVERS, defaults to gurobi if it is available and HiGHS otherwise.
+        solver_profile (str): Solver options by name, e.g. "barrier-no-crossover" or "dual-simplex,threads=4", see solver_profiles.solver_settings.
+        settlement (str): Period over which the renewable share is settled, e.g. "snapshot", "month" or "year", see fix_bus_production.
+        precheck (bool): Reject renewable shares which are provably infeasible before the model is built, see feasibility.precheck_renewable_shares.
+        ranging (bool): Add the right hand side ranging of the constraints to the sensitivity report, see sensitivity.rhs_ranging.
+        **kwargs: Passed on to optimize_network, e.g. scaling=True to solve in GW and kEUR or presolve=True.
+
+    Returns:
+        tuple: Status and termination condition. The certificate prices (the duals of the production_share
+        constraint) are kept in ``n.sensitivity``, see sensitivity.sensitivity_report.
     """
-    def fix_bus_production(n, snapshots):
-        """Define the constraint that the sum of the renewable generation in each snapshot must be equal to the minimum required renewable share.
-
-        Args:
-            n (PyPSA Network): PyPSA network to which the constraint is added.
-            snapshots (list or pandas.Index): List of snapshots or time steps. All time-dependent series quantities are indexed by network.snapshots.
-        """
-
-        demand_at_t = n.loads_t.p_set.loc[snapshots].sum(axis=1)
-
-        renewable_generators = n.generators[n.generators.carrier.isin(renewable_carriers)].index
-        renewable_storage_units = n.storage_units[n.storage_units.carrier.isin(renewable_carriers)].index
-        renewable_storage_units_store = (linexpr((-1, get_var(n, "StorageUnit", "p_store")[renewable_storage_units]))).sum(axis=1)
-        
-        renewable_generation = (linexpr((1, get_var(n, "StorageUnit", "p_dispatch")[renewable_storage_units]))).sum(axis=1) + (linexpr((1, get_var(n, "Generator", "p")[renewable_generators]))).sum(axis=1)
-        
-        define_constraints(
-            n, renewable_generation + renewable_storage_units_store, ">=", demand_at_t *renewable_shares , "Generator", "production_share"
-        )    
-            
     def extra_functionalities(n, snapshots):
-        fix_bus_production(n, snapshots)
-        storage_restriction(n,snapshots,renewable_carriers)
-        storage_variables_constraints(n,snapshots,renewable_carriers)
-
-    def define_RE_share(n, renewable_share):
-        """Define the share of renewable storage units in the system. and check if the length of the share is equal to the number of snapshots, 
-        and has similar index as the snapshots."""
-        if len(renewable_share) > len(n.snapshots):
-            logger.warning(
-                "The length of passed renewable share per snapshots is greater than the number of snapshots."
-                )
-            logger.warning(
-                f"Only taking the first {len(n.snapshots)} values."
-            )
-            temp_renewable_share = pd.Series(renewable_share[:len(n.snapshots)], index=n.snapshots)
-        elif len(renewable_share) < len(n.snapshots):
-            logger.warning(
-                "The length of passed renewable share per snapshots is less than the number of snapshots."
-                )
-            logger.warning("Filling the missing values with 0s.")
-            temp_renewable_share = pd.Series(0, index=n.snapshots)
-            temp_renewable_share[:len(renewable_share)] = pd.Series(renewable_share, index=n.snapshots[:len(renewable_share)])
-        else:
-            temp_renewable_share = pd.Series(renewable_share, index=n.snapshots)
-
-        return temp_renewable_share
+        renewable_storage_constraints(n, snapshots, renewable_carriers, storage_map)
+        fix_bus_production(n, snapshots, renewable_carriers, renewable_shares, settlement)
 
     renewable_shares = define_RE_share(n, renewable_shares)
+    if precheck:
+        checked = n.snapshots if snapshots is None else pd.Index(snapshots)
+        precheck_renewable_shares(n, renewable_shares, renewable_carriers, checked, settlement_periods(checked, settlement))
 
-    create_fictious_storage_units(n)
-
-    if 'Renewable_Storage' not in renewable_carriers:
-        renewable_carriers.append('Renewable_Storage')
-        
+    storage_map = prepare_renewable_storage(n, renewable_carriers, storage_mode)
     
-    n.lopf(
-        n.snapshots[:6],
-        solver_name='gurobi',
-        pyomo=False,
+    solver_name, solver_options, io_api = solver_settings(solver_name, solver_profile, io_api, kwargs.pop('solver_options', None))
+
+    status, condition = optimize_network(
+        n,
+        snapshots,
+        horizon,
+        overlap,
+        solver_name=solver_name,
+        solver_options=solver_options,
+        solver_profile=solver_profile,
         extra_functionality=extra_functionalities,
+        io_api=io_api,
+        warm_start_dir=warm_start_dir,
+        tag=f'certificates-{storage_mode}-{settlement}',
+        **kwargs,
     )
+    if status == 'ok':
+        n.sensitivity = sensitivity_report(n, ranging)
+    return status, condition
+
+
+@profiled
+def create_persistent_model(n, case, renewable_carriers, co2_emissions=None, renewable_shares=None, snapshots=None, storage_mode='fictious', settlement='snapshot'):
+    """Build the model of a case once, so it can be re-solved with different parameters without rebuilding it.
+    The model is kept in ``n.model``. Between solves only the right hand sides (update_co2_limit,
+    update_renewable_shares) or the objective coefficients (update_costs) are changed in place, the topology and all
+    other constraints stay as they are. Re-solve with solve_persistent_model(n).
+
+    Args:
+        n (PyPSA Network): PyPSA network to be solved.
+        case (str): 'unconstrained', 'co2cap' or 'certificates'.
+        renewable_carriers (list): Carriers which are counted as renewable.
+        co2_emissions (float): Initial CO2 cap of the 'co2cap' case.
+        renewable_shares (list or pandas.Series): Initial renewable share per snapshot of the 'certificates' case.
+        snapshots (list or pandas.Index): Snapshots to optimize, defaults to n.snapshots.
+        storage_mode (str): How the renewable energy in storage units is tracked, one of STORAGE_MODES.
+        settlement (str): Settlement period of the renewable share of the 'certificates' case, see fix_bus_production.
+
+    Returns:
+        linopy.Model: The model, also available as ``n.model``.
+    """
+    snapshots = n.snapshots if snapshots is None else pd.Index(snapshots)
+    storage_map = prepare_renewable_storage(n, renewable_carriers, storage_mode)
+    if case == 'co2cap':
+        add_co2_limit(n, co2_emissions)
 
+    n.optimize.create_model(snapshots)
+    n.model_scaling = (1., 1.)
+    renewable_storage_constraints(n, snapshots, renewable_carriers, storage_map)
+    if case == 'certificates':
+        fix_bus_production(n, snapshots, renewable_carriers, define_RE_share(n, renewable_shares), settlement)
+    return n.model
+
+def refresh_matrices(n):
+    """Drop the matrices linopy caches from the constraints and variables of ``n.model`` (flat_cons, flat_vars), so
+    the next solve with io_api='direct' passes the updated right hand sides and coefficients to the solver. Newer
+    linopy versions build the matrices on every access, there is nothing to drop."""
+    if not isinstance(getattr(type(n.model), 'matrices', None), property):
+        n.model.matrices = MatrixAccessor(n.model)
+
+def update_co2_limit(n, co2_emissions):
+    """Change the CO2 cap of a persistent model in place.
+
+    Args:
+        n (PyPSA Network): PyPSA network with a model built by create_persistent_model(n, 'co2cap', ...).
+        co2_emissions (float): New maximum CO2 emissions.
+    """
+    con = n.model.constraints["GlobalConstraint-CO2Limit"]
+    con.rhs = con.rhs + (co2_emissions - n.global_constraints.at['CO2Limit', 'constant'])
+    n.global_constraints.loc['CO2Limit', 'constant'] = co2_emissions
+    refresh_matrices(n)
+
+def update_renewable_shares(n, renewable_shares, settlement='snapshot'):
+    """Change the minimum renewable share per snapshot of a persistent model in place.
+
+    Args:
+        n (PyPSA Network): PyPSA network with a model built by create_persistent_model(n, 'certificates', ...).
+        renewable_shares (list or pandas.Series): New renewable share per snapshot, see define_RE_share.
+        settlement (str): Settlement period the model was built with.
+    """
+    con = n.model.constraints["Generator-production_share"]
+    snapshots = n.model["Generator-p"].indexes['snapshot']
+    con.rhs = renewable_requirement(n, snapshots, define_RE_share(n, renewable_shares), settlement)
+    refresh_matrices(n)
+
+def update_costs(n, component, attr, values):
+    """Change the capital or marginal costs of a persistent model in place.
+    The difference to the current costs is added to the objective of ``n.model`` and the costs of the network are
+    updated. Capital costs only enter the model for extendable components. Marginal costs can only be changed for
+    components with static marginal costs, the model ignores the static value of components with time dependent
+    marginal costs in the ``_t`` tables.
+
+    Args:
+        n (PyPSA Network): PyPSA network with a model built by create_persistent_model.
+        component (str): Component name, e.g. "Generator" or "StorageUnit".
+        attr (str): 'capital_cost' or 'marginal_cost'.
+        values (pandas.Series): New costs, indexed by the component names to change.
+
+    Raises:
+        ValueError: If marginal costs of components with time dependent marginal costs are changed.
+    """
+    m = n.model
+    df = n.df(component)
+    delta = values - df.loc[values.index, attr]
+    delta = delta[delta != 0]
+    if delta.empty:
+        return
+
+    if attr == 'capital_cost':
+        delta = delta[df.loc[delta.index, nominal_attrs[component] + '_extendable']].rename_axis(f"{component}-ext")
+        var = m[f"{component}-{nominal_attrs[component]}"].sel({f"{component}-ext": delta.index})
+        change = (var * as_dataarray(delta, f"{component}-ext")).sum()
+        # PyPSA subtracts the capital costs of the existing capacity (p_nom) with the fixed variable objective_constant.
+        constant = (delta * df.loc[delta.index, nominal_attrs[component]]).sum()
+        if constant != 0:
+            if 'objective_constant' in m.variables:
+                # Move the bound in the direction of the shift first, so lower never exceeds upper.
+                existing = m.variables['objective_constant']
+                if constant > 0:
+                    existing.upper = existing.upper + constant
+                    existing.lower = existing.lower + constant
+                else:
+                    existing.lower = existing.lower + constant
+                    existing.upper = existing.upper + constant
+            else:
+                change = change - m.add_variables(constant, constant, name='objective_constant')
+            n.objective_constant = getattr(n, 'objective_constant', 0) + constant
+    elif attr == 'marginal_cost':
+        time_dependent = delta.index.intersection(n.pnl(component)['marginal_cost'].columns)
+        if not time_dependent.empty:
+            raise ValueError(
+                f"The marginal costs of {', '.join(time_dependent)} are time dependent, only static marginal costs "
+                f"can be updated; rebuild the model to change them."
+            )
+        dispatch = 'p_dispatch' if component == 'StorageUnit' else 'p'
+        var = m[f"{component}-{dispatch}"].sel({component: delta.index})
+        snapshots = var.indexes['snapshot']
+        weightings = n.snapshot_weightings.objective.loc[snapshots]
+        coefficient = pd.DataFrame(np.outer(weightings, delta), index=snapshots, columns=delta.index)
+        change = (var * as_dataarray(coefficient, component)).sum()
+    else:
+        raise ValueError(f"Only 'capital_cost' and 'marginal_cost' can be updated, not '{attr}'.")
+
+    objective = m.objective.expression if hasattr(m.objective, 'expression') else m.objective
+    m.objective = objective + change
+    df.loc[values.index, attr] = values
+    refresh_matrices(n)
+
+@profiled
+def solve_persistent_model(n, solver_name=None, solver_profile='default', io_api='direct', warm_start_dir=None, **kwargs):
+    """Solve the model in ``n.model`` (built by create_persistent_model) and write the results to the network.
+
+    Args:
+        n (PyPSA Network): PyPSA network with a persistent model.
+        solver_name (str): One of solver_profiles.SOLVERS, defaults to gurobi if it is available and HiGHS otherwise.
+        solver_profile (str): Solver options by name, see solver_profiles.solver_settings.
+        io_api (str): How the model is passed to the solver, see solve_network_unconstrained.
+        warm_start_dir (str): Directory of the stored bases for warm starts, see solve_with_warm_start.
+        **kwargs: Passed on to solve_model.
+
+    Returns:
+        tuple: Status and termination condition of the solve.
+    """
+    snapshots = n.model["Generator-p"].indexes['snapshot']
+    tag = f"persistent-{n.model.nvars}-{n.model.ncons}"
+    solver_name, solver_options, io_api = solver_settings(solver_name, solver_profile, io_api, kwargs.pop('solver_options', None))
+    status, condition = solve_with_warm_start(
+        n, snapshots, lambda **kw: solve_model(n, **kw), warm_start_dir, tag,
+        solver_name=solver_name, solver_options=solver_options, solver_profile=solver_profile, io_api=io_api, **kwargs
+    )
+    if status == 'ok':
+        assign_renewable_soc_solution(n, snapshots)
+    return status, condition
@@ -0,0 +1,197 @@
+import logging
+import os
+import re
+import tempfile
+import time
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SOLVERS = ['gurobi', 'highs', 'cbc', 'glpk']
+
+# Solvers to which linopy can pass the model in memory (io_api='direct').
+DIRECT_SOLVERS = ['gurobi', 'highs']
+
+SOLVER_PROFILES = {
+    'default': {
+        'gurobi': {},
+        'highs': {},
+        'cbc': {},
+        'glpk': {},
+    },
+    'barrier-no-crossover': {
+        'gurobi': {'Method': 2, 'Crossover': 0},
+        'highs': {'solver': 'ipm', 'run_crossover': 'off'},
+        'cbc': {'barrier': ''},
+        'glpk': {'interior': ''},
+    },
+    'barrier': {
+        'gurobi': {'Method': 2},
+        'highs': {'solver': 'ipm', 'run_crossover': 'on'},
+        'cbc': {'barrier': ''},
+        'glpk': {'interior': ''},
+    },
+    'dual-simplex': {
+        'gurobi': {'Method': 1},
+        'highs': {'solver': 'simplex', 'simplex_strategy': 1},
+        'cbc': {'dualSimplex': ''},
+        'glpk': {'dual': ''},
+    },
+    'primal-simplex': {
+        'gurobi': {'Method': 0},
+        'highs': {'solver': 'simplex', 'simplex_strategy': 4},
+        'cbc': {'primalSimplex': ''},
+        'glpk': {'primal': ''},
+    },
+}
+
+THREADS_OPTION = {'gurobi': 'Threads', 'highs': 'threads', 'cbc': 'threads'}
+
+def default_solver():
+    """Return gurobi if it is available to linopy and HiGHS otherwise."""
+    try:
+        from linopy import available_solvers
+    except ImportError:
+        return 'highs'
+    return 'gurobi' if 'gurobi' in available_solvers else 'highs'
+
+def solver_settings(solver_name=None, solver_profile='default', io_api='direct', solver_options=None):
+    """Translate a solver profile into the options of a solver.
+    A profile is a comma separated list of names of SOLVER_PROFILES and ``threads=N``, e.g.
+    "barrier-no-crossover,threads=4". Options given in ``solver_options`` take precedence over the profile.
+
+    Args:
+        solver_name (str): One of SOLVERS, None chooses default_solver().
+        solver_profile (str): The profile.
+        io_api (str): Requested interface to the solver, 'direct' falls back to 'lp' for solvers without direct interface.
+        solver_options (dict): Additional solver specific options.
+
+    Returns:
+        tuple: Solver name, solver options and io_api.
+    """
+    solver_name = default_solver() if solver_name is None else solver_name
+    if solver_name not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver_name}', choose one of {SOLVERS}.")
+
+    options = {}
+    for part in (solver_profile or 'default').split(','):
+        part = part.strip()
+        if part.startswith('threads='):
+            if solver_name in THREADS_OPTION:
+                options[THREADS_OPTION[solver_name]] = int(part[len('threads='):])
+            else:
+                logger.warning(f"The number of threads can not be set for {solver_name}.")
+        elif part in SOLVER_PROFILES:
+            options.update(SOLVER_PROFILES[part][solver_name])
+        else:
+            raise ValueError(f"Unknown solver profile '{part}', choose from {list(SOLVER_PROFILES)} and threads=N.")
+    options.update(solver_options or {})
+
+    if io_api == 'direct' and solver_name not in DIRECT_SOLVERS:
+        io_api = 'lp'
+    return solver_name, options, io_api
+
+def iteration_counts(m, solver_name, log_fn=None):
+    """Read the number of simplex and barrier iterations of the last solve.
+    Gurobi and HiGHS report them through the solver model kept by linopy, for CBC and GLPK the log file is parsed.
+
+    Args:
+        m (linopy.Model): The solved model.
+        solver_name (str): Name of the solver.
+        log_fn (str): Log file of the solver.
+
+    Returns:
+        dict: Simplex and barrier iterations, None where they are not known.
+    """
+    counts = {'simplex iterations': None, 'barrier iterations': None}
+    solver_model = getattr(m, 'solver_model', None)
+    try:
+        if solver_name == 'gurobi' and solver_model is not None:
+            counts['simplex iterations'] = int(solver_model.IterCount)
+            counts['barrier iterations'] = int(solver_model.BarIterCount)
+        elif solver_name == 'highs' and solver_model is not None:
+            info = solver_model.getInfo()
+            counts['simplex iterations'] = int(info.simplex_iteration_count)
+            counts['barrier iterations'] = int(info.ipm_iteration_count)
+        elif log_fn is not None and os.path.exists(log_fn):
+            with open(log_fn) as f:
+                log = f.read()
+            if solver_name == 'cbc':
+                iterations = re.findall(r'(\d+) iterations', log)
+            else:
+                iterations = re.findall(r'^\*?\s*(\d+):', log, re.MULTILINE)
+            if iterations:
+                counts['simplex iterations'] = int(iterations[-1])
+    except Exception as err:
+        logger.debug(f"Could not read the iteration counts of {solver_name}: {err}")
+    return counts
+
+def timed_solve(n, **kwargs):
+    """Call ``n.model.solve(**kwargs)`` and record its duration in ``n.solver_time``, see solve_with_statistics."""
+    start = time.perf_counter()
+    try:
+        return n.model.solve(**kwargs)
+    finally:
+        n.solver_time = time.perf_counter() - start
+
+def solve_with_statistics(n, solve, solver_profile='default', **kwargs):
+    """Call ``solve(**kwargs)`` and record the wall time and iteration counts in ``n.solver_statistics``.
+    The wall time covers the whole call, so it includes building the model when ``solve`` builds it. The solver
+    time only covers the solve of the linopy model (writing the problem, the solver and reading the solution),
+    it is recorded when ``solve`` solves the model through timed_solve and None otherwise.
+
+    Args:
+        n (PyPSA Network): PyPSA network to be solved.
+        solve (callable): Function solving the network, it receives ``solver_name`` among kwargs.
+        solver_profile (str): Profile the solver options were built from, see solver_settings.
+        **kwargs: Passed on to solve.
+
+    Returns:
+        tuple: Status and termination condition of the solve.
+    """
+    solver_name = kwargs.get('solver_name')
+    temporary_log = solver_name in ['cbc', 'glpk'] and kwargs.get('log_fn') is None
+    if temporary_log:
+        fd, kwargs['log_fn'] = tempfile.mkstemp(prefix='solver-', suffix='.log')
+        os.close(fd)
+
+    n.solver_time = None
+    start = time.perf_counter()
+    status, condition = solve(**kwargs)
+    wall_time = time.perf_counter() - start
+
+    statistics = {
+        'solver': solver_name, 'profile': solver_profile, 'wall time [s]': wall_time, 'solver time [s]': n.solver_time,
+        'status': status, 'condition': condition,
+    }
+    statistics.update(iteration_counts(n.model, solver_name, kwargs.get('log_fn')))
+    if temporary_log:
+        os.remove(kwargs['log_fn'])
+
+    if not hasattr(n, 'solver_statistics'):
+        n.solver_statistics = []
+    n.solver_statistics.append(statistics)
+    logger.info(f"Solved with {solver_name} ({solver_profile}) in {wall_time:.2f} s (solver {n.solver_time if n.solver_time is not None else float('nan'):.2f} s): {statistics}")
+    return status, condition
+
+def compare_solver_profiles(n, solve, profiles, **kwargs):
+    """Solve copies of the same network with several solvers and profiles and compare their performance.
+
+    Args:
+        n (PyPSA Network): PyPSA network, it is copied for every solve and not modified.
+        solve (callable): One of the solve_network_* functions, called as ``solve(network, solver_name=..., solver_profile=..., **kwargs)``.
+        profiles (list): (solver_name, solver_profile) tuples.
+        **kwargs: Passed on to solve, e.g. renewable_carriers or co2_emissions.
+
+    Returns:
+        pandas.DataFrame: One row per solver and profile with wall time, solver time, iteration counts, status and objective.
+    """
+    records = []
+    for solver_name, solver_profile in profiles:
+        network = n.copy()
+        solve(network, solver_name=solver_name, solver_profile=solver_profile, **kwargs)
+        record = dict(network.solver_statistics[-1])
+        record['objective'] = network.objective
+        records.append(record)
+    return pd.DataFrame(records).set_index(['solver', 'profile'])
@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+import pypsa
+
+# co2_emissions [t/MWh_th], efficiency, marginal_cost [euro/MWh], capital_cost [euro/MW/a], p_nom per bus [MW], extendable
+GENERATOR_CARRIERS = pd.DataFrame(
+    [
+        ['solar', 0.0, 1.0, 0.01, 37000, 300, True],
+        ['onwind', 0.0, 1.0, 0.015, 96000, 400, True],
+        ['offwind-ac', 0.0, 1.0, 0.02, 160000, 200, True],
+        ['offwind-dc', 0.0, 1.0, 0.02, 180000, 200, True],
+        ['ror', 0.0, 1.0, 0.0, 270000, 50, False],
+        ['biomass', 0.0, 0.45, 7.0, 230000, 100, False],
+        ['geothermal', 0.0, 0.1, 0.0, 900000, 5, False],
+        ['nuclear', 0.0, 0.33, 10.0, 650000, 300, False],
+        ['lignite', 0.407, 0.4, 25.0, 350000, 400, False],
+        ['coal', 0.336, 0.4, 28.2, 350000, 400, False],
+        ['CCGT', 0.2, 0.55, 45.0, 90000, 400, False],
+        ['OCGT', 0.2, 0.4, 65.0, 47000, 200, False],
+        ['oil', 0.266, 0.35, 90.0, 40000, 50, False],
+    ],
+    columns=['carrier', 'co2_emissions', 'efficiency', 'marginal_cost', 'capital_cost', 'p_nom', 'p_nom_extendable'],
+).set_index('carrier')
+
+# max_hours, efficiency_store, efficiency_dispatch, capital_cost [euro/MW/a], p_nom per bus [MW]
+STORAGE_CARRIERS = pd.DataFrame(
+    [
+        ['PHS', 6, 0.866, 0.866, 160000, 200],
+        ['hydro', 500, 1.0, 0.9, 270000, 100],
+    ],
+    columns=['carrier', 'max_hours', 'efficiency_store', 'efficiency_dispatch', 'capital_cost', 'p_nom'],
+).set_index('carrier')
+
+def solar_profile(snapshots, rng):
+    """Daily bell curve, scaled by the season and by random cloudiness per day."""
+    hour = snapshots.hour.values + snapshots.minute.values / 60
+    day = snapshots.dayofyear.values
+    daylight = np.clip(np.sin(np.pi * (hour - 6) / 12), 0, None)
+    season = 0.6 + 0.4 * np.cos(2 * np.pi * (day - 172) / 365)
+    clouds = rng.uniform(0.3, 1.0, size=day.max() + 1)[day]
+    return daylight * season * clouds
+
+def wind_profile(snapshots, rng, mean=0.3, persistence=0.95):
+    """Autocorrelated (AR(1)) capacity factor around ``mean``, more wind in winter."""
+    noise = rng.normal(size=len(snapshots))
+    state = np.empty(len(snapshots))
+    value = 0.
+    for i, e in enumerate(noise):
+        value = persistence * value + np.sqrt(1 - persistence ** 2) * e
+        state[i] = value
+    season = 1 + 0.3 * np.cos(2 * np.pi * (snapshots.dayofyear.values - 15) / 365)
+    return np.clip(mean * season * np.exp(0.6 * state - 0.18), 0, 1)
+
+def load_profile(snapshots, rng):
+    """Daily and weekly load pattern around 1 with a winter peak and small noise."""
+    hour = snapshots.hour.values
+    daily = 1 + 0.15 * np.sin(np.pi * (hour - 6) / 12) * (hour >= 6) * (hour <= 22) - 0.1 * (hour < 6)
+    weekly = np.where(snapshots.dayofweek.values >= 5, 0.85, 1.)
+    season = 1 + 0.1 * np.cos(2 * np.pi * (snapshots.dayofyear.values - 15) / 365)
+    return daily * weekly * season * rng.normal(1, 0.02, size=len(snapshots))
+
+def synthetic_network(buses=10, snapshots=24, lines_per_bus=2, carriers=None, storage_units=True, load_per_bus=2000, start='2019-01-01', freq='h', seed=0):
+    """Create a deterministic PyPSA network shaped like the Germany network of the case scripts.
+    The buses are placed at random in the area of Germany and connected by lines to their nearest neighbours (the
+    buses are first chained from west to east, so the network is always connected). Every bus gets one load, one
+    generator per carrier of GENERATOR_CARRIERS (named "<bus> <carrier>" as in the Germany network) and the first
+    ``storage_units`` buses one storage unit per carrier of STORAGE_CARRIERS. Solar, wind, run of river and load get
+    synthetic profiles, hydro gets an inflow. The capital costs are annual costs scaled to the length of the
+    snapshots. The same arguments always give the same network.
+
+    Args:
+        buses (int): Number of buses.
+        snapshots (int): Number of snapshots.
+        lines_per_bus (int): Number of nearest neighbours each bus is connected to.
+        carriers (list): Generator carriers to add, defaults to all carriers of GENERATOR_CARRIERS.
+        storage_units (bool or int): Number of buses with PHS and hydro storage units, True adds them at every bus.
+        load_per_bus (float): Mean load per bus [MW].
+        start (str): First snapshot.
+        freq (str): Frequency of the snapshots.
+        seed (int): Seed of the random numbers.
+
+    Returns:
+        PyPSA Network: The network.
+    """
+    rng = np.random.default_rng(seed)
+    generator_carriers = GENERATOR_CARRIERS if carriers is None else GENERATOR_CARRIERS.loc[carriers]
+
+    n = pypsa.Network()
+    n.set_snapshots(pd.date_range(start, periods=snapshots, freq=freq))
+    hours_per_snapshot = pd.Timedelta(pd.tseries.frequencies.to_offset(freq)) / pd.Timedelta('1h')
+    n.snapshot_weightings.loc[:, :] = hours_per_snapshot
+    annuity_share = len(n.snapshots) * hours_per_snapshot / 8760
+
+    for carrier, co2_emissions in generator_carriers.co2_emissions.items():
+        n.add('Carrier', carrier, co2_emissions=co2_emissions)
+    if storage_units:
+        n.madd('Carrier', STORAGE_CARRIERS.index, co2_emissions=0.)
+
+    x = rng.uniform(6, 15, size=buses)
+    y = rng.uniform(47.5, 55, size=buses)
+    bus_names = pd.Index([f"DE0 {i}" for i in range(buses)])
+    n.madd('Bus', bus_names, x=x, y=y, carrier='AC', v_nom=380.)
+
+    order = np.argsort(x)
+    edges = {tuple(sorted(pair)) for pair in zip(order[:-1], order[1:])}
+    distance = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+    for i in range(buses):
+        for j in np.argsort(distance[i])[1:lines_per_bus + 1]:
+            edges.add(tuple(sorted((i, j))))
+    edges = sorted(edges)
+    if edges:
+        bus0, bus1 = np.array(edges).T
+        length = 111 * distance[bus0, bus1]
+        n.madd(
+            'Line', [f"{i}" for i in range(len(edges))],
+            bus0=bus_names[bus0], bus1=bus_names[bus1], length=length,
+            x=0.25 * length, r=0.03 * length, s_nom=rng.choice([1700., 3400., 5100.], size=len(edges)),
+        )
+
+    load = load_per_bus * rng.uniform(0.5, 1.5, size=buses)
+    n.madd(
+        'Load', bus_names,
+        bus=bus_names,
+        p_set=pd.DataFrame(
+            np.column_stack([mean_load * load_profile(n.snapshots, rng) for mean_load in load]),
+            index=n.snapshots, columns=bus_names,
+        ),
+    )
+
+    for carrier, attrs in generator_carriers.iterrows():
+        names = bus_names + ' ' + carrier
+        if carrier == 'solar':
+            p_max_pu = np.column_stack([solar_profile(n.snapshots, rng) for _ in range(buses)])
+        elif carrier in ['onwind', 'offwind-ac', 'offwind-dc']:
+            mean = 0.25 if carrier == 'onwind' else 0.4
+            p_max_pu = np.column_stack([wind_profile(n.snapshots, rng, mean) for _ in range(buses)])
+        elif carrier == 'ror':
+            p_max_pu = np.clip(rng.normal(0.5, 0.05, size=(len(n.snapshots), buses)), 0, 1)
+        else:
+            p_max_pu = None
+        n.madd(
+            'Generator', names,
+            bus=bus_names,
+            carrier=carrier,
+            p_nom=attrs.p_nom * rng.uniform(0.5, 1.5, size=buses),
+            p_nom_extendable=attrs.p_nom_extendable,
+            efficiency=attrs.efficiency,
+            marginal_cost=attrs.marginal_cost,
+            capital_cost=attrs.capital_cost * annuity_share,
+            p_max_pu=1. if p_max_pu is None else pd.DataFrame(p_max_pu, index=n.snapshots, columns=names),
+        )
+
+    storage_buses = bus_names[:buses if storage_units is True else int(storage_units)]
+    if len(storage_buses):
+        for carrier, attrs in STORAGE_CARRIERS.iterrows():
+            names = storage_buses + ' ' + carrier
+            inflow = None
+            if carrier == 'hydro':
+                inflow = pd.DataFrame(
+                    rng.uniform(0.1, 0.3, size=(len(n.snapshots), len(names))) * attrs.p_nom, index=n.snapshots, columns=names
+                )
+            n.madd(
+                'StorageUnit', names,
+                bus=storage_buses,
+                carrier=carrier,
+                p_nom=attrs.p_nom * rng.uniform(0.5, 1.5, size=len(names)),
+                max_hours=attrs.max_hours,
+                efficiency_store=attrs.efficiency_store,
+                efficiency_dispatch=attrs.efficiency_dispatch,
+                capital_cost=attrs.capital_cost * annuity_share,
+                cyclic_state_of_charge=True,
+                inflow=0. if inflow is None else inflow,
+            )
+
+    return n
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('highspy')
+
+from synthetic_network import synthetic_network
+
+RENEWABLE_CARRIERS = ['solar', 'onwind', 'offwind-ac', 'offwind-dc', 'ror', 'biomass']
+
+def small_network():
+    """Small synthetic network with extendable renewables and storage units, solved in well below a second."""
+    return synthetic_network(buses=4, snapshots=12, storage_units=2, seed=0)
+
+@pytest.fixture
+def renewable_carriers():
+    return list(RENEWABLE_CARRIERS)
+
+@pytest.fixture
+def co2_cap():
+    """A binding CO2 cap of the small network, about 75 % of its unconstrained emissions."""
+    n = small_network()
+    return 0.1 * n.loads_t.p_set.sum().sum()
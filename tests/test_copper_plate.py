@@ -0,0 +1,50 @@
+import pandas as pd
+import pypsa
+import pytest
+
+from conftest import small_network
+from copper_plate import is_uncongested, solve_copper_plate
+from solve_network import solve_network_co2cap, solve_network_unconstrained
+
+def two_bus_network(s_nom):
+    n = pypsa.Network()
+    n.set_snapshots(pd.date_range('2019-01-01', periods=2, freq='h'))
+    n.add('Bus', 'a')
+    n.add('Bus', 'b')
+    n.add('Line', 'ab', bus0='a', bus1='b', x=0.1, r=0.01, s_nom=s_nom)
+    n.add('Load', 'load', bus='b', p_set=pd.Series([80., 100.], index=n.snapshots))
+    return n
+
+def test_storage_charging_counts_as_withdrawal():
+    assert is_uncongested(two_bus_network(100.))
+    n = two_bus_network(100.)
+    n.add('StorageUnit', 'storage', bus='b', p_nom=50., max_hours=2.)
+    assert not is_uncongested(n)
+    n = two_bus_network(150.)
+    n.add('StorageUnit', 'storage', bus='b', p_nom=50., max_hours=2.)
+    assert is_uncongested(n)
+
+def test_stores_count_as_congested():
+    n = two_bus_network(1e6)
+    n.add('Store', 'store', bus='b', e_nom=10.)
+    assert not is_uncongested(n)
+
+@pytest.mark.parametrize('case', ['unconstrained', 'co2cap'])
+def test_copper_plate_matches_uncongested_network(renewable_carriers, co2_cap, case):
+    def solve(n):
+        if case == 'co2cap':
+            return solve_network_co2cap(n, list(renewable_carriers), co2_cap, solver_name='highs')
+        return solve_network_unconstrained(n, list(renewable_carriers), solver_name='highs')
+
+    full = small_network()
+    full.lines.s_nom = 1e6
+    assert is_uncongested(full)
+    assert solve(full)[0] == 'ok'
+
+    n = small_network()
+    n.lines.s_nom = 1e6
+    solve_copper_plate(n, lambda cp, *args, **kwargs: solve(cp))
+    assert n.objective == pytest.approx(full.objective, rel=1e-6)
+    dispatch = n.generators_t.p.T.groupby(n.generators.carrier).sum().sum(axis=1)
+    full_dispatch = full.generators_t.p.T.groupby(full.generators.carrier).sum().sum(axis=1)
+    pd.testing.assert_series_equal(dispatch, full_dispatch, rtol=1e-4, atol=1e-2)
@@ -0,0 +1,44 @@
+import pandas as pd
+import pypsa
+import pytest
+
+from feasibility import precheck_co2_limit, precheck_renewable_shares
+from solve_network import solve_network_certificates, solve_network_co2cap
+
+def one_bus_network(load=100., solar=50., static_load=0.):
+    """One bus with a load, non-extendable solar and a gas generator emitting 0.4 t per MWh of electricity."""
+    n = pypsa.Network()
+    n.set_snapshots(pd.date_range('2019-01-01', periods=4, freq='h'))
+    n.add('Carrier', 'solar', co2_emissions=0.)
+    n.add('Carrier', 'gas', co2_emissions=0.2)
+    n.add('Bus', 'bus')
+    n.add('Load', 'load', bus='bus', p_set=pd.Series(load, index=n.snapshots))
+    if static_load:
+        n.add('Load', 'static load', bus='bus', p_set=static_load)
+    n.add('Generator', 'solar', bus='bus', carrier='solar', p_nom=solar, marginal_cost=0.)
+    n.add('Generator', 'gas', bus='bus', carrier='gas', p_nom=1000., efficiency=0.5, marginal_cost=50.)
+    return n
+
+def test_co2_cap_at_the_bound_is_not_rejected():
+    # 4 x 50 MWh have to come from gas, at least 80 t.
+    n = one_bus_network()
+    precheck_co2_limit(n, 80.)
+    with pytest.raises(ValueError, match='infeasible'):
+        precheck_co2_limit(n, 79.)
+    assert solve_network_co2cap(n, ['solar'], 80., solver_name='highs')[0] == 'ok'
+
+def test_co2_cap_with_stores_is_not_rejected():
+    # The store releases 100 MWh, which lowers the emissions to 40 t.
+    n = one_bus_network()
+    n.add('Store', 'store', bus='bus', e_nom=100., e_initial=100.)
+    precheck_co2_limit(n, 40.)
+    assert solve_network_co2cap(n, ['solar'], 40., solver_name='highs')[0] == 'ok'
+
+def test_renewable_share_at_the_bound_is_not_rejected():
+    # The shares refer to the time dependent load only, 50 % of 100 MW can be covered by the solar generator.
+    n = one_bus_network(static_load=50.)
+    shares = pd.Series(0.5, index=n.snapshots)
+    precheck_renewable_shares(n, shares, ['solar'])
+    with pytest.raises(ValueError, match='infeasible'):
+        precheck_renewable_shares(n, pd.Series(0.51, index=n.snapshots), ['solar'])
+    assert solve_network_certificates(n, shares, ['solar'], solver_name='highs')[0] == 'ok'
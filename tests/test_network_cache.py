@@ -0,0 +1,33 @@
+import pandas as pd
+import pypsa
+import pytest
+
+from conftest import small_network
+from network_cache import load_network_window
+
+@pytest.fixture
+def network_file(tmp_path):
+    n = small_network()
+    n.snapshot_weightings.loc[:, 'objective'] = 2.
+    n.snapshot_weightings.loc[:, 'generators'] = 3.
+    fn = str(tmp_path / 'small.nc')
+    n.export_to_netcdf(fn)
+    return fn
+
+def test_window_matches_full_import(network_file):
+    n = load_network_window(network_file, periods=6, start='2019-01-01 03:00', s_nom=None)
+    full = pypsa.Network(network_file)
+    full.set_snapshots(full.snapshots[3:9])
+
+    assert n.snapshots.equals(full.snapshots)
+    pd.testing.assert_frame_equal(n.snapshot_weightings, full.snapshot_weightings, check_freq=False)
+    for c in ['generators', 'loads', 'storage_units']:
+        for attr, df in getattr(full, c + '_t').items():
+            if df.empty or attr not in getattr(n, c + '_t'):
+                continue
+            pd.testing.assert_frame_equal(getattr(n, c + '_t')[attr], df, check_names=False, check_freq=False)
+    pd.testing.assert_series_equal(n.lines.s_nom, full.lines.s_nom)
+
+def test_missing_snapshots_raise(network_file):
+    with pytest.raises(ValueError, match='snapshots'):
+        load_network_window(network_file, periods=6, start='2019-01-01 09:00')
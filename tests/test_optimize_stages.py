@@ -0,0 +1,24 @@
+import pytest
+
+from conftest import small_network
+from solve_network import optimize_stages
+
+def test_model_kwargs_reach_the_model():
+    n = small_network()
+    status, _ = optimize_stages(
+        n, n.snapshots, linearized_unit_commitment=True, model_kwargs={'force_dim_names': True},
+        solver_name='highs', io_api='direct',
+    )
+    assert status == 'ok'
+
+    reference = small_network()
+    reference.optimize(reference.snapshots, linearized_unit_commitment=True, solver_name='highs')
+    assert n.objective == pytest.approx(reference.objective, rel=1e-6)
+
+def test_consistency_check_runs_once(monkeypatch):
+    n = small_network()
+    calls = []
+    consistency_check = n.consistency_check
+    monkeypatch.setattr(n, 'consistency_check', lambda *args, **kwargs: calls.append(1) or consistency_check(*args, **kwargs))
+    assert optimize_stages(n, n.snapshots, solver_name='highs')[0] == 'ok'
+    assert len(calls) == 1
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from conftest import small_network
+from pareto_frontier import pareto_frontier
+
+def test_frontier_is_convex_with_breakpoints_at_carbon_price_changes(renewable_carriers, co2_cap):
+    frontier, details = pareto_frontier(small_network(), list(renewable_carriers), co2_min=0.5 * co2_cap, solver_name='highs')
+    caps, costs, prices = frontier.index.values, frontier.objective.values, frontier['carbon price'].values
+    slopes = np.diff(costs) / np.diff(caps)
+    assert (np.diff(slopes) >= -1e-3).all()
+    assert (np.diff(prices) <= 1e-6).all()
+
+    for i in range(1, len(frontier) - 1):
+        if frontier.breakpoint.iloc[i]:
+            assert prices[i - 1] > prices[i + 1] + 1e-3
+        else:
+            # A point within a linear segment has the slope of the segment as carbon price.
+            assert -slopes[i - 1] == pytest.approx(prices[i], rel=1e-2)
+            assert -slopes[i] == pytest.approx(prices[i], rel=1e-2)
+    assert frontier.breakpoint.iloc[[0, -1]].all() and 2 < frontier.breakpoint.sum() < len(frontier)
+    assert set(details) == set(frontier.index[frontier.breakpoint])
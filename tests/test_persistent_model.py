@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from conftest import small_network
+from solve_network import (
+    create_persistent_model, solve_network_certificates, solve_network_co2cap, solve_persistent_model,
+    update_co2_limit, update_costs, update_renewable_shares,
+)
+
+def shares(n, value):
+    return pd.Series(value, index=n.snapshots)
+
+def test_co2_cap_is_binding(renewable_carriers, co2_cap):
+    n = small_network()
+    assert solve_network_co2cap(n, list(renewable_carriers), co2_cap, solver_name='highs')[0] == 'ok'
+    assert n.sensitivity['carbon price'] > 1e-6
+
+def test_update_co2_limit_matches_fresh_solve(renewable_carriers, co2_cap):
+    n = small_network()
+    create_persistent_model(n, 'co2cap', list(renewable_carriers), co2_emissions=co2_cap)
+    assert solve_persistent_model(n, 'highs')[0] == 'ok'
+    first = n.objective
+    update_co2_limit(n, 0.5 * co2_cap)
+    assert solve_persistent_model(n, 'highs')[0] == 'ok'
+
+    fresh = small_network()
+    solve_network_co2cap(fresh, list(renewable_carriers), 0.5 * co2_cap, solver_name='highs')
+    assert n.objective > first
+    assert n.objective == pytest.approx(fresh.objective, rel=1e-6)
+
+@pytest.mark.parametrize('settlement', ['snapshot', 'year'])
+def test_update_renewable_shares_matches_fresh_solve(renewable_carriers, settlement):
+    n = small_network()
+    create_persistent_model(n, 'certificates', list(renewable_carriers), renewable_shares=shares(n, 0.3), settlement=settlement)
+    assert solve_persistent_model(n, 'highs')[0] == 'ok'
+    update_renewable_shares(n, shares(n, 0.6), settlement)
+    assert solve_persistent_model(n, 'highs')[0] == 'ok'
+
+    fresh = small_network()
+    solve_network_certificates(fresh, shares(fresh, 0.6), list(renewable_carriers), solver_name='highs', settlement=settlement)
+    assert n.objective == pytest.approx(fresh.objective, rel=1e-6)
+
+@pytest.mark.parametrize('attr', ['marginal_cost', 'capital_cost'])
+def test_update_costs_matches_fresh_solve(renewable_carriers, co2_cap, attr):
+    n = small_network()
+    create_persistent_model(n, 'co2cap', list(renewable_carriers), co2_emissions=co2_cap)
+    assert solve_persistent_model(n, 'highs')[0] == 'ok'
+    if attr == 'capital_cost':
+        changed = n.generators.index[n.generators.p_nom_extendable]
+    else:
+        changed = n.generators.index[n.generators.marginal_cost > 0]
+    values = 2 * n.generators.loc[changed, attr]
+    update_costs(n, 'Generator', attr, values)
+    assert solve_persistent_model(n, 'highs')[0] == 'ok'
+
+    fresh = small_network()
+    fresh.generators.loc[changed, attr] = values
+    solve_network_co2cap(fresh, list(renewable_carriers), co2_cap, solver_name='highs')
+    assert n.objective == pytest.approx(fresh.objective, rel=1e-6)
+
+def test_update_time_dependent_marginal_cost_raises(renewable_carriers, co2_cap):
+    n = small_network()
+    coal = n.generators.index[n.generators.carrier == 'coal']
+    n.generators_t.marginal_cost = pd.DataFrame(30., index=n.snapshots, columns=coal)
+    create_persistent_model(n, 'co2cap', list(renewable_carriers), co2_emissions=co2_cap)
+    before = n.generators.loc[coal, 'marginal_cost'].copy()
+    with pytest.raises(ValueError, match='time dependent'):
+        update_costs(n, 'Generator', 'marginal_cost', 2 * before)
+    assert n.generators.loc[coal, 'marginal_cost'].equals(before)
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from conftest import small_network
+from presolve import reduce_network
+from solve_network import solve_network_co2cap
+
+def network_with_equivalent_components():
+    """The small network with copies of an extendable and a non-extendable generator and of a storage unit, and a
+    generator which cannot be active. Returns the network and the original component of every copy."""
+    n = small_network()
+    copies = {'DE0 0 solar copy': 'DE0 0 solar', 'DE0 1 coal copy': 'DE0 1 coal'}
+    for copy, original in copies.items():
+        n.add('Generator', copy, **n.generators.loc[original, ['bus', 'carrier', 'p_nom', 'p_nom_extendable', 'p_nom_max', 'capital_cost', 'marginal_cost', 'efficiency']])
+        if original in n.generators_t.p_max_pu:
+            n.generators_t.p_max_pu[copy] = n.generators_t.p_max_pu[original]
+    n.add('Generator', 'DE0 2 unused', bus='DE0 2', carrier='coal', p_nom=0., marginal_cost=1.)
+    n.add('StorageUnit', 'DE0 0 PHS copy', **n.storage_units.loc['DE0 0 PHS', ['bus', 'carrier', 'p_nom', 'p_nom_extendable', 'max_hours', 'capital_cost', 'efficiency_store', 'efficiency_dispatch', 'cyclic_state_of_charge']])
+    copies['DE0 0 PHS copy'] = 'DE0 0 PHS'
+    return n, copies
+
+@pytest.mark.parametrize('storage_mode', ['fictious', 'soc_share'])
+def test_presolve_keeps_the_optimum(renewable_carriers, co2_cap, storage_mode):
+    solved = {}
+    for presolve in [False, True]:
+        n, copies = network_with_equivalent_components()
+        status, _ = solve_network_co2cap(n, list(renewable_carriers), co2_cap, solver_name='highs', storage_mode=storage_mode, presolve=presolve)
+        assert status == 'ok'
+        solved[presolve] = n
+
+    assert solved[True].objective == pytest.approx(solved[False].objective, rel=1e-6)
+    for c in ['generators', 'storage_units']:
+        reduced, full = getattr(solved[True], c), getattr(solved[False], c)
+        assert reduced.index.equals(full.index)
+        # Equivalent components may split their capacity differently, their total is the same.
+        group = pd.Series(full.index, index=full.index).replace(copies)
+        pd.testing.assert_series_equal(
+            reduced.p_nom_opt.groupby(group).sum(), full.p_nom_opt.groupby(group).sum(), rtol=1e-5, atol=1e-3
+        )
+
+def network_with_ramp_limited_copy():
+    """The small network with a copy of a coal generator which differs from it only in its ramp limits."""
+    n = small_network()
+    original = 'DE0 1 coal'
+    n.add('Generator', 'DE0 1 coal ramp limited', **n.generators.loc[original, ['bus', 'carrier', 'p_nom', 'p_nom_extendable', 'p_nom_max', 'capital_cost', 'marginal_cost', 'efficiency']])
+    n.generators.loc['DE0 1 coal ramp limited', ['ramp_limit_up', 'ramp_limit_down']] = 0.05
+    return n
+
+def test_ramp_limits_prevent_merging(renewable_carriers, co2_cap):
+    n = network_with_ramp_limited_copy()
+    representative = reduce_network(n)['Generator'].representative
+    assert representative['DE0 1 coal ramp limited'] == 'DE0 1 coal ramp limited'
+    assert representative['DE0 1 coal'] == 'DE0 1 coal'
+
+    objectives = []
+    for presolve in [False, True]:
+        n = network_with_ramp_limited_copy()
+        status, _ = solve_network_co2cap(n, list(renewable_carriers), co2_cap, solver_name='highs', presolve=presolve)
+        assert status == 'ok'
+        objectives.append(n.objective)
+    assert objectives[1] == pytest.approx(objectives[0], rel=1e-6)
+
+def test_energy_limits_are_summed():
+    n = small_network()
+    original = n.generators.loc['DE0 1 coal']
+    n.add('Generator', 'DE0 1 coal copy', **original[['bus', 'carrier', 'p_nom', 'p_nom_extendable', 'p_nom_max', 'capital_cost', 'marginal_cost', 'efficiency']])
+    n.generators.loc[['DE0 1 coal', 'DE0 1 coal copy'], 'e_sum_max'] = 2 * original.p_nom
+    reduce_network(n)
+    assert 'DE0 1 coal copy' not in n.generators.index
+    assert n.generators.at['DE0 1 coal', 'e_sum_max'] == pytest.approx(4 * original.p_nom)
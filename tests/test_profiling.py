@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from conftest import small_network
+from profiling import profiling, span
+from solve_network import solve_network_co2cap
+
+def span_names(node):
+    yield node['name']
+    for child in node['children']:
+        yield from span_names(child)
+
+def test_profile_records_the_solve_stages(tmp_path, renewable_carriers, co2_cap):
+    fn, flamegraph_fn = tmp_path / 'profile.json', tmp_path / 'profile.folded'
+    n = small_network()
+    with profiling(str(fn), str(flamegraph_fn), memory=False) as root:
+        solve_network_co2cap(n, list(renewable_carriers), co2_cap, solver_name='highs')
+
+    with open(fn) as f:
+        assert json.load(f) == root
+    names = set(span_names(root))
+    assert {'solve_network_co2cap', 'consistency check', 'create model', 'solver', 'assign solution'} <= names
+    for child in root['children']:
+        assert child['wall time [s]'] <= root['wall time [s]']
+
+    lines = flamegraph_fn.read_text().splitlines()
+    assert lines[0].startswith('root ')
+    assert any(line.rsplit(' ', 1)[0].endswith(';solver') for line in lines)
+    # The self times of the folded stacks add up to the wall time of the root span.
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == pytest.approx(root['wall time [s]'] * 1e6, rel=1e-3, abs=len(lines))
+
+def test_spans_are_no_ops_without_profiling():
+    with span('outside'):
+        pass
+    with profiling(memory=False) as root:
+        with span('outer'):
+            with span('inner'):
+                pass
+    assert [child['name'] for child in root['children']] == ['outer']
+    assert [child['name'] for child in root['children'][0]['children']] == ['inner']
+    with pytest.raises(RuntimeError, match='already active'):
+        with profiling(memory=False):
+            with profiling(memory=False):
+                pass
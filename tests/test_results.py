@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+import results
+from conftest import small_network
+from solve_network import solve_network_co2cap
+
+def test_totals_keep_the_labels_of_the_case_scripts():
+    n = small_network()
+    n.generators_t.p = pd.DataFrame(1., index=n.snapshots, columns=n.generators.index)
+    n.storage_units_t.p = pd.DataFrame(1., index=n.snapshots, columns=n.storage_units.index)
+    n.storage_units.loc[n.storage_units.index[0], 'carrier'] = 'Renewable_Storage'
+    dispatch = results.dispatch_by_bus_carrier(n)
+
+    production = results.production_total(dispatch)
+    assert {'Combined Solar', 'Combined Wind', 'Combined coal', 'Combined offwindac'} <= set(production.columns)
+    assert production['Combined Solar'].iloc[0] == (n.generators.carrier == 'solar').sum()
+    assert 'Combined Renewable' in results.storage_units_total(dispatch).columns
+
+def test_results_round_trip(tmp_path, renewable_carriers, co2_cap):
+    solved = {}
+    for value in [co2_cap, 2 * co2_cap]:
+        n = small_network()
+        assert solve_network_co2cap(n, list(renewable_carriers), value, solver_name='highs')[0] == 'ok'
+        results.write_results(n, str(tmp_path), case='co2cap', value=value)
+        solved[value] = n
+    # Writing the same parameters again replaces the run.
+    results.write_results(solved[co2_cap], str(tmp_path), case='co2cap', value=co2_cap)
+
+    summary = results.read_results(str(tmp_path)).set_index('value').sort_index()
+    assert summary.objective.tolist() == pytest.approx([solved[value].objective for value in summary.index])
+
+    n = solved[co2_cap]
+    capacity = results.read_results(str(tmp_path), 'capacity', filters=[('value', '=', co2_cap)])
+    pd.testing.assert_frame_equal(capacity.drop(columns=['case', 'value']), results.capacities(n))
+    dispatch = results.read_results(str(tmp_path), 'dispatch', columns=['component', 'name', 'p'], filters=[('value', '=', co2_cap)])
+    totals = dispatch[dispatch.component == 'Generator'].groupby('name').p.sum()
+    pd.testing.assert_series_equal(totals, n.generators_t.p.sum()[totals.index], check_names=False, atol=1e-6 * len(n.snapshots))
+    assert len(totals) == (n.generators_t.p.abs() > 1e-6).any().sum()
+
+    with pytest.raises(ValueError, match='Unknown results table'):
+        results.read_results(str(tmp_path), 'prices')
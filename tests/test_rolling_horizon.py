@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from conftest import small_network
+from solve_network import operational_costs, primary_energy_emissions, solve_network_certificates, solve_network_co2cap, solve_network_unconstrained
+
+def fixed_capacity_network(renewable_carriers):
+    """The small network with the capacities of its extendable components fixed to their optimum."""
+    solved = small_network()
+    solve_network_unconstrained(solved, list(renewable_carriers), solver_name='highs')
+    n = small_network()
+    for df, optimum in [(n.generators, solved.generators.p_nom_opt), (n.storage_units, solved.storage_units.p_nom_opt)]:
+        df['p_nom'] = optimum.reindex(df.index)
+        df['p_nom_extendable'] = False
+    return n
+
+def test_horizon_rejects_extendable_components(renewable_carriers):
+    n = small_network()
+    with pytest.raises(ValueError, match='extendable'):
+        solve_network_unconstrained(n, list(renewable_carriers), solver_name='highs', horizon=6)
+
+def test_horizon_objective_excludes_overlap(renewable_carriers):
+    n = fixed_capacity_network(renewable_carriers)
+    status, _ = solve_network_unconstrained(n, list(renewable_carriers), solver_name='highs', horizon=6, overlap=2)
+    assert status == 'ok'
+    assert n.objective == pytest.approx(operational_costs(n, n.snapshots), rel=1e-6)
+
+def test_single_window_matches_full_solve(renewable_carriers):
+    full = fixed_capacity_network(renewable_carriers)
+    full.storage_units.cyclic_state_of_charge = False
+    solve_network_unconstrained(full, list(renewable_carriers), solver_name='highs')
+    n = fixed_capacity_network(renewable_carriers)
+    solve_network_unconstrained(n, list(renewable_carriers), solver_name='highs', horizon=len(n.snapshots))
+    assert n.objective == pytest.approx(full.objective, rel=1e-6)
+
+def test_horizon_prices_per_window(renewable_carriers, co2_cap):
+    n = fixed_capacity_network(renewable_carriers)
+    status, _ = solve_network_co2cap(n, list(renewable_carriers), co2_cap, solver_name='highs', horizon=6, overlap=2)
+    assert status == 'ok'
+    assert len(n.sensitivity['carbon price']) == 3
+
+    n = fixed_capacity_network(renewable_carriers)
+    shares = pd.Series(0.3, index=n.snapshots)
+    status, _ = solve_network_certificates(n, shares, list(renewable_carriers), solver_name='highs', horizon=6, overlap=2)
+    assert status == 'ok'
+    assert n.sensitivity['certificate prices'].index.equals(n.snapshots)
+
+def test_horizon_emissions_within_cap(renewable_carriers, co2_cap):
+    n = fixed_capacity_network(renewable_carriers)
+    # Each window also emits in its overlap, the emissions of the kept snapshots still have to stay within the cap.
+    status, _ = solve_network_co2cap(n, list(renewable_carriers), 0.75 * co2_cap, solver_name='highs', horizon=6, overlap=4)
+    assert status == 'ok'
+    assert primary_energy_emissions(n, n.snapshots) <= 0.75 * co2_cap * (1 + 1e-6)
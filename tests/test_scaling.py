@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+import scaling
+from conftest import small_network
+from scaling import rescale
+from solve_network import solve_network_certificates
+
+def test_scaled_solve_reports_original_units(renewable_carriers):
+    results = {}
+    for label, value in [('unscaled', None), ('scaled', True)]:
+        n = small_network()
+        shares = pd.Series(0.6, index=n.snapshots)
+        status, _ = solve_network_certificates(n, shares, list(renewable_carriers), solver_name='highs', storage_mode='soc_share', ranging=True, scaling=value)
+        assert status == 'ok'
+        results[label] = n
+
+    unscaled, scaled = results['unscaled'], results['scaled']
+    assert scaled.objective == pytest.approx(unscaled.objective, rel=1e-6)
+    for attr in ['state_of_charge_renewable', 'p_store_renewable', 'p_dispatch_renewable']:
+        assert scaled.storage_units_t[attr].sum().sum() == pytest.approx(unscaled.storage_units_t[attr].sum().sum(), rel=1e-4, abs=1e-3)
+    pd.testing.assert_series_equal(scaled.sensitivity['certificate prices'], unscaled.sensitivity['certificate prices'], rtol=1e-4, atol=1e-6)
+    pd.testing.assert_frame_equal(scaled.sensitivity['production_share ranging'], unscaled.sensitivity['production_share ranging'], rtol=1e-4)
+
+def test_unknown_unit_raises(monkeypatch):
+    n = small_network()
+    monkeypatch.delitem(scaling.UNIT_EXPONENTS, 'MW')
+    with pytest.raises(ValueError, match='MW'):
+        rescale(n, 1e3, 1e3)
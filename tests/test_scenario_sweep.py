@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+from conftest import small_network
+from scenario_sweep import sweep
+
+def test_sweep_returns_one_row_per_scenario(tmp_path, monkeypatch, renewable_carriers, co2_cap):
+    network_file = str(tmp_path / 'small.nc')
+    n = small_network()
+    n.export_to_netcdf(network_file)
+    # The workers load the network through the cache in the working directory.
+    monkeypatch.chdir(tmp_path)
+
+    scenarios = {'unconstrained': [None], 'co2cap': [co2_cap, 2 * co2_cap], 'certificates': [0.3]}
+    results = sweep(
+        scenarios, processes=2, network_file=network_file, periods=len(n.snapshots),
+        renewable_carriers=list(renewable_carriers), solver_name='highs',
+    )
+
+    assert len(results) == 4
+    assert isinstance(results.columns, pd.MultiIndex)
+    assert {'scenario', 'system', 'capacity', 'production share'} <= set(results.columns.get_level_values(0))
+    assert results[('scenario', 'case')].tolist() == ['unconstrained', 'co2cap', 'co2cap', 'certificates']
+    assert (results[('scenario', 'status')] == 'ok').all()
+    assert results[('system', 'co2 emissions')].iloc[1] <= co2_cap * (1 + 1e-6)
+    assert results['production share'].sum(axis=1).tolist() == pytest.approx([1.] * 4)
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from conftest import small_network
+from solve_network import renewable_requirement, settlement_periods, solve_network_certificates
+
+def test_settlement_periods():
+    snapshots = pd.date_range('2019-01-31', periods=48, freq='h')
+    assert settlement_periods(snapshots) is None
+    assert settlement_periods(snapshots, 'total').unique().tolist() == ['total']
+    assert settlement_periods(snapshots, 'day').unique().tolist() == ['2019-01-31', '2019-02-01']
+    assert settlement_periods(snapshots, 'month').unique().tolist() == ['2019-01', '2019-02']
+
+def test_period_requirement_is_weighted_sum():
+    n = small_network()
+    n.snapshot_weightings.loc[:, :] = 2.
+    shares = pd.Series(0.4, index=n.snapshots)
+    per_snapshot = renewable_requirement(n, n.snapshots, shares)
+    total = renewable_requirement(n, n.snapshots, shares, 'total')
+    assert per_snapshot.dims == ('snapshot',)
+    assert total.dims == ('period',)
+    assert float(total.sum()) == pytest.approx(2 * float(per_snapshot.sum()))
+
+def test_longer_settlement_is_cheaper(renewable_carriers):
+    objectives = {}
+    for settlement in ['snapshot', 'day', 'total']:
+        n = small_network()
+        status, _ = solve_network_certificates(n, pd.Series(0.6, index=n.snapshots), list(renewable_carriers), solver_name='highs', settlement=settlement)
+        assert status == 'ok'
+        objectives[settlement] = n.objective
+        if settlement != 'snapshot':
+            assert n.sensitivity['certificate prices'].index.name == 'period'
+    # All 12 snapshots of the network are on one day, settling daily and in total is the same.
+    assert objectives['day'] == pytest.approx(objectives['total'], rel=1e-6)
+    assert objectives['total'] <= objectives['snapshot'] * (1 + 1e-9)
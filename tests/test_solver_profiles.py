@@ -0,0 +1,52 @@
+import pytest
+
+from conftest import small_network
+from solve_network import solve_network_co2cap
+from solver_profiles import SOLVER_PROFILES, solver_settings
+
+def test_profiles_cover_all_solvers():
+    solvers = {solver for options in SOLVER_PROFILES.values() for solver in options}
+    for profile, options in SOLVER_PROFILES.items():
+        assert set(options) == solvers, profile
+
+def test_solver_settings_combines_profiles_threads_and_options():
+    solver_name, options, io_api = solver_settings('highs', 'barrier-no-crossover,threads=4', 'direct', {'run_crossover': 'on'})
+    assert solver_name == 'highs'
+    assert options == {'solver': 'ipm', 'run_crossover': 'on', 'threads': 4}
+    assert io_api == 'direct'
+
+def test_solver_settings_falls_back_to_lp_files():
+    assert solver_settings('glpk', 'dual-simplex', 'direct') == ('glpk', {'dual': ''}, 'lp')
+
+@pytest.mark.parametrize('solver_name, solver_profile', [('xpress', 'default'), ('highs', 'simplex')])
+def test_solver_settings_rejects_unknown_names(solver_name, solver_profile):
+    with pytest.raises(ValueError, match='Unknown solver'):
+        solver_settings(solver_name, solver_profile)
+
+@pytest.mark.parametrize('solver_profile', list(SOLVER_PROFILES))
+def test_highs_profiles_reach_the_solver(renewable_carriers, co2_cap, solver_profile):
+    reference = small_network()
+    solve_network_co2cap(reference, list(renewable_carriers), co2_cap, solver_name='highs')
+
+    n = small_network()
+    status, _ = solve_network_co2cap(n, list(renewable_carriers), co2_cap, solver_name='highs', solver_profile=solver_profile)
+    assert status == 'ok'
+    assert n.objective == pytest.approx(reference.objective, rel=1e-5)
+    _, options, _ = solver_settings('highs', solver_profile)
+    for option, value in options.items():
+        assert n.model.solver_model.getOptionValue(option)[1] == value
+    statistics = n.solver_statistics[-1]
+    assert statistics['profile'] == solver_profile
+    if options.get('solver') == 'ipm':
+        assert statistics['barrier iterations'] > 0
+
+def test_highs_solver_options_override_the_profile(renewable_carriers, co2_cap):
+    n = small_network()
+    solve_network_co2cap(n, list(renewable_carriers), co2_cap, solver_name='highs', solver_profile='dual-simplex', solver_options={'simplex_strategy': 4})
+    assert n.model.solver_model.getOptionValue('simplex_strategy')[1] == 4
+
+def test_solver_time_excludes_model_creation(renewable_carriers, co2_cap):
+    n = small_network()
+    solve_network_co2cap(n, list(renewable_carriers), co2_cap, solver_name='highs')
+    statistics = n.solver_statistics[-1]
+    assert 0 < statistics['solver time [s]'] < statistics['wall time [s]']
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from conftest import small_network
+from solve_network import STORAGE_MODES, solve_network_certificates, solve_network_co2cap
+
+# hydro and PHS are the carriers of the storage units of the synthetic network.
+CARRIER_SETS = {'generators only': [], 'renewable storage carrier': ['hydro']}
+
+def non_cyclic_network():
+    """The small network with non-cyclic storage units which start a quarter full."""
+    n = small_network()
+    n.storage_units.cyclic_state_of_charge = False
+    n.storage_units.state_of_charge_initial = 0.25 * n.storage_units.p_nom * n.storage_units.max_hours
+    return n
+
+def extendable_storage_network():
+    """The small network with cheap extendable storage units, so they are extended."""
+    n = small_network()
+    n.storage_units.p_nom_extendable = True
+    n.storage_units.capital_cost *= 0.01
+    n.storage_units.p_nom_max = 4 * n.storage_units.p_nom
+    return n
+
+def objectives(solve, network=small_network):
+    values = []
+    for storage_mode in STORAGE_MODES:
+        n = network()
+        status, condition = solve(n, storage_mode)
+        assert status == 'ok', condition
+        values.append(n.objective)
+    return values
+
+@pytest.mark.parametrize('extra_carriers', CARRIER_SETS.values(), ids=CARRIER_SETS.keys())
+def test_certificates_objective_independent_of_storage_mode(renewable_carriers, extra_carriers):
+    carriers = renewable_carriers + extra_carriers
+    values = objectives(lambda n, storage_mode: solve_network_certificates(
+        n, pd.Series(0.6, index=n.snapshots), list(carriers), solver_name='highs', storage_mode=storage_mode))
+    assert values == pytest.approx([values[0]] * len(values), rel=1e-6)
+
+@pytest.mark.parametrize('extra_carriers', CARRIER_SETS.values(), ids=CARRIER_SETS.keys())
+def test_co2cap_objective_independent_of_storage_mode(renewable_carriers, co2_cap, extra_carriers):
+    carriers = renewable_carriers + extra_carriers
+    values = objectives(lambda n, storage_mode: solve_network_co2cap(
+        n, list(carriers), co2_cap, solver_name='highs', storage_mode=storage_mode))
+    assert values == pytest.approx([values[0]] * len(values), rel=1e-6)
+
+@pytest.mark.parametrize('extra_carriers', CARRIER_SETS.values(), ids=CARRIER_SETS.keys())
+def test_initial_energy_independent_of_storage_mode(renewable_carriers, co2_cap, extra_carriers):
+    carriers = renewable_carriers + extra_carriers
+    values = objectives(lambda n, storage_mode: solve_network_certificates(
+        n, pd.Series(0.6, index=n.snapshots), list(carriers), solver_name='highs', storage_mode=storage_mode), non_cyclic_network)
+    assert values == pytest.approx([values[0]] * len(values), rel=1e-6)
+    values = objectives(lambda n, storage_mode: solve_network_co2cap(
+        n, list(carriers), co2_cap, solver_name='highs', storage_mode=storage_mode), non_cyclic_network)
+    assert values == pytest.approx([values[0]] * len(values), rel=1e-6)
+
+@pytest.mark.parametrize('extra_carriers', CARRIER_SETS.values(), ids=CARRIER_SETS.keys())
+def test_extendable_storage_objective_independent_of_storage_mode(renewable_carriers, co2_cap, extra_carriers):
+    carriers = renewable_carriers + extra_carriers
+    values = objectives(lambda n, storage_mode: solve_network_certificates(
+        n, pd.Series(0.6, index=n.snapshots), list(carriers), solver_name='highs', storage_mode=storage_mode), extendable_storage_network)
+    assert values == pytest.approx([values[0]] * len(values), rel=1e-6)
+    values = objectives(lambda n, storage_mode: solve_network_co2cap(
+        n, list(carriers), co2_cap, solver_name='highs', storage_mode=storage_mode), extendable_storage_network)
+    assert values == pytest.approx([values[0]] * len(values), rel=1e-6)
@@ -0,0 +1,21 @@
+import pytest
+
+from synthetic_network import synthetic_network
+from time_aggregation import aggregate_snapshots
+
+@pytest.mark.parametrize('method, periods, snapshots', [('segments', 10, 10), ('days', 2, 48)])
+def test_aggregation_keeps_the_total_weightings(method, periods, snapshots):
+    n = synthetic_network(buses=4, snapshots=96, storage_units=2, seed=0)
+    totals = n.snapshot_weightings.sum()
+    loads = n.snapshot_weightings.generators @ n.loads_t.p_set
+    aggregate_snapshots(n, periods, method)
+
+    assert len(n.snapshots) == snapshots
+    assert n.snapshot_weightings.objective.sum() == pytest.approx(totals.objective)
+    assert n.snapshot_weightings.generators.sum() == pytest.approx(totals.generators)
+    if method == 'segments':
+        assert n.snapshot_weightings.stores.sum() == pytest.approx(totals.stores)
+        # The segment means weighted by the segment lengths keep the energy of the time series.
+        assert (n.snapshot_weightings.generators @ n.loads_t.p_set).sum() == pytest.approx(loads.sum())
+    else:
+        assert (n.snapshot_weightings.stores == 1).all()
@@ -0,0 +1,56 @@
+import json
+import os
+
+from conftest import small_network
+from solve_network import solve_network_unconstrained, solve_with_warm_start, topology_key
+
+def test_basis_is_replaced_atomically(tmp_path):
+    n = small_network()
+    n.optimize.create_model()
+    basis_fn = os.path.join(tmp_path, topology_key(n, n.snapshots) + '.bas')
+    calls = []
+
+    def solve(basis_fn, warmstart_fn=None):
+        calls.append((basis_fn, warmstart_fn))
+        with open(basis_fn, 'w') as f:
+            f.write(f"basis {len(calls)}\n")
+        return 'ok', 'optimal'
+
+    for _ in range(2):
+        assert solve_with_warm_start(n, n.snapshots, solve, str(tmp_path)) == ('ok', 'optimal')
+    assert calls[0][1] is None and calls[1][1] == basis_fn
+    assert all(written != basis_fn and written.endswith('.bas') for written, _ in calls)
+    with open(basis_fn) as f:
+        assert f.read() == 'basis 2\n'
+
+    statistics_fns = [fn for fn in os.listdir(tmp_path) if fn.endswith('.json')]
+    assert statistics_fns == [f"{topology_key(n, n.snapshots)}.{os.getpid()}.json"]
+    with open(os.path.join(tmp_path, statistics_fns[0])) as f:
+        statistics = json.load(f)
+    assert [solve['warm start'] for solve in statistics['solves']] == [False, True]
+    assert set(statistics['solves'][1]) == {'warm start', 'solver time [s]', 'simplex iterations', 'solver time saved [s]', 'simplex iterations saved', 'status'}
+    assert sorted(os.listdir(tmp_path)) == sorted(statistics_fns + [os.path.basename(basis_fn)])
+
+def test_failed_solve_keeps_stored_basis(tmp_path):
+    n = small_network()
+    n.optimize.create_model()
+    basis_fn = os.path.join(tmp_path, topology_key(n, n.snapshots) + '.bas')
+    with open(basis_fn, 'w') as f:
+        f.write('stored\n')
+    assert solve_with_warm_start(n, n.snapshots, lambda **kwargs: ('warning', 'infeasible'), str(tmp_path))[0] == 'warning'
+    with open(basis_fn) as f:
+        assert f.read() == 'stored\n'
+    assert not [fn for fn in os.listdir(tmp_path) if '.tmp.' in fn]
+
+def test_warm_start_saves_simplex_iterations(tmp_path, renewable_carriers):
+    for _ in range(2):
+        n = small_network()
+        assert solve_network_unconstrained(n, list(renewable_carriers), solver_name='highs', warm_start_dir=str(tmp_path))[0] == 'ok'
+    statistics_fn, = [fn for fn in os.listdir(tmp_path) if fn.endswith('.json')]
+    with open(os.path.join(tmp_path, statistics_fn)) as f:
+        statistics = json.load(f)
+    cold, warm = statistics['solves']
+    assert statistics['cold solve']['simplex iterations'] == cold['simplex iterations'] > 0
+    assert warm['simplex iterations'] < cold['simplex iterations']
+    assert warm['simplex iterations saved'] == cold['simplex iterations'] - warm['simplex iterations']
+    assert warm['solver time saved [s]'] is not None
@@ -0,0 +1,214 @@
+import heapq
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+AGGREGATION_METHODS = ['segments', 'days']
+
+def clustering_features(n):
+    """Return the time series on which the snapshots are clustered.
+    These are the loads (loads_t.p_set) and the availability of the generators (generators_t.p_max_pu).
+
+    Args:
+        n (PyPSA Network): PyPSA network to be aggregated.
+
+    Returns:
+        pandas.DataFrame: Snapshots x time series, the first column level names the time series.
+    """
+    return pd.concat(
+        [n.loads_t.p_set, n.generators_t.p_max_pu],
+        axis=1,
+        keys=['loads_t.p_set', 'generators_t.p_max_pu'],
+    )
+
+def normalize(features):
+    """Scale every time series to a maximum absolute value of 1, so large loads do not dominate the clustering."""
+    scale = features.abs().max().replace(0, 1)
+    return features / scale
+
+def segment_snapshots(features, segments):
+    """Merge consecutive snapshots into segments (chronological aggregation).
+    Starting from one segment per snapshot, the two neighbouring segments whose merge increases the within
+    segment variance the least (Ward's criterion) are merged until ``segments`` segments are left.
+
+    Args:
+        features (pandas.DataFrame): Normalized time series, snapshots x time series.
+        segments (int): Number of segments.
+
+    Returns:
+        numpy.ndarray: Segment number of each snapshot.
+    """
+    values = features.values.astype(float)
+    count = len(values)
+    if segments >= count:
+        return np.arange(count)
+
+    size = np.ones(count)
+    total = values.copy()
+    next_ = np.append(np.arange(1, count), -1)
+    prev_ = np.arange(-1, count - 1)
+    alive = np.ones(count, dtype=bool)
+    version = np.zeros(count, dtype=int)
+
+    def cost(a, b):
+        diff = total[a] / size[a] - total[b] / size[b]
+        return size[a] * size[b] / (size[a] + size[b]) * (diff @ diff)
+
+    heap = [(cost(i, i + 1), i, i + 1, 0, 0) for i in range(count - 1)]
+    heapq.heapify(heap)
+    while count > segments:
+        _, a, b, version_a, version_b = heapq.heappop(heap)
+        if not (alive[a] and alive[b]) or version[a] != version_a or version[b] != version_b:
+            continue
+        size[a] += size[b]
+        total[a] += total[b]
+        alive[b] = False
+        version[a] += 1
+        next_[a] = next_[b]
+        if next_[a] != -1:
+            prev_[next_[a]] = a
+            heapq.heappush(heap, (cost(a, next_[a]), a, next_[a], version[a], version[next_[a]]))
+        if prev_[a] != -1:
+            heapq.heappush(heap, (cost(prev_[a], a), prev_[a], a, version[prev_[a]], version[a]))
+        count -= 1
+
+    return np.cumsum(alive) - 1
+
+def representative_days(features, days, max_iterations=100):
+    """Cluster the days into ``days`` clusters and choose the medoid (an actual day) of each cluster (k-medoids).
+
+    Args:
+        features (pandas.DataFrame): Normalized time series, snapshots x time series, covering whole days.
+        days (int): Number of representative days.
+        max_iterations (int): Maximum number of k-medoids iterations.
+
+    Returns:
+        pandas.Series: Representative day (date) for every day of the snapshots.
+    """
+    dates = features.index.normalize()
+    hours_per_day = pd.Series(dates).value_counts()
+    if hours_per_day.nunique() != 1:
+        raise ValueError("Representative days require snapshots that cover whole days with the same number of snapshots.")
+
+    unique_dates = dates.unique()
+    profiles = features.values.reshape(len(unique_dates), -1)
+    squared = (profiles ** 2).sum(axis=1)
+    distance = np.maximum(squared[:, None] + squared[None, :] - 2 * profiles @ profiles.T, 0)
+    if days >= len(unique_dates):
+        return pd.Series(unique_dates, index=unique_dates)
+
+    medoids = [distance.sum(axis=1).argmin()]
+    while len(medoids) < days:
+        medoids.append(distance[:, medoids].min(axis=1).argmax())
+    medoids = np.array(medoids)
+
+    for _ in range(max_iterations):
+        cluster = distance[:, medoids].argmin(axis=1)
+        new_medoids = medoids.copy()
+        for k in range(days):
+            members = np.flatnonzero(cluster == k)
+            new_medoids[k] = members[distance[np.ix_(members, members)].sum(axis=1).argmin()]
+        if (new_medoids == medoids).all():
+            break
+        medoids = new_medoids
+
+    cluster = distance[:, medoids].argmin(axis=1)
+    return pd.Series(unique_dates[medoids[cluster]], index=unique_dates)
+
+def aggregation_error(original, aggregated, weightings):
+    """Compare the aggregated time series with the full resolution time series.
+
+    Args:
+        original (pandas.DataFrame): Full resolution time series, snapshots x time series.
+        aggregated (pandas.DataFrame): Aggregated time series mapped back onto the full resolution snapshots.
+        weightings (pandas.Series): Snapshot weightings of the full resolution snapshots.
+
+    Returns:
+        pandas.DataFrame: Per time series group the root mean square error and the maximum absolute error (both
+        relative to the peak of each time series) and the deviation of the total energy in percent.
+    """
+    scale = original.abs().max().replace(0, 1)
+    error = (aggregated - original) / scale
+    report = pd.DataFrame({
+        'rmse': (error ** 2).T.groupby(level=0).mean().mean(axis=1) ** 0.5,
+        'max abs error': error.abs().T.groupby(level=0).max().max(axis=1),
+        'energy deviation [%]': 100 * (
+            aggregated.mul(weightings, axis=0).sum().groupby(level=0).sum()
+            / original.mul(weightings, axis=0).sum().groupby(level=0).sum() - 1
+        ),
+    })
+    report.index.name = 'time series'
+    return report
+
+def aggregate_snapshots(n, periods, method='segments'):
+    """Reduce the snapshots of the network to representative periods before solving it.
+    The snapshots are clustered on the loads and the generator availabilities, the time series of all components
+    are replaced by their aggregated values and the snapshot weightings are set so that every period stands for
+    the snapshots it represents. ``periods`` is the knob between accuracy and solve time.
+
+    With method "segments" consecutive snapshots are merged into ``periods`` segments of varying length (the
+    segment value is the mean and its weighting the sum of the merged snapshots). The chronology is kept, so the
+    state of charge of all storage units, including the fictious storage units and the renewable state of charge
+    of the "soc_share" storage mode, is linked across all segments in the same way as in the full resolution model.
+
+    With method "days" ``periods`` representative days are chosen (k-medoids) and laid out in chronological order.
+    The objective and generator weightings count every representative day as often as it is represented, the
+    store weightings keep the length of the snapshots. The state of charge is thus carried from one representative
+    day to the next with the physical energy content, which keeps the storage and fictious storage constraints
+    valid, but storage between days is only represented along the sequence of representative days.
+
+    Args:
+        n (PyPSA Network): PyPSA network to be aggregated, modified in place.
+        periods (int): Number of segments or representative days.
+        method (str): One of AGGREGATION_METHODS.
+
+    Returns:
+        pandas.DataFrame: Aggregation error against the full resolution inputs, see aggregation_error.
+    """
+    if method not in AGGREGATION_METHODS:
+        raise ValueError(f"Unknown aggregation method '{method}', choose one of {AGGREGATION_METHODS}.")
+
+    snapshots = n.snapshots
+    original = clustering_features(n).loc[snapshots]
+    weightings = n.snapshot_weightings.loc[snapshots].copy()
+
+    if method == 'segments':
+        segment = segment_snapshots(normalize(original), periods)
+        first = pd.Series(np.arange(len(snapshots))).groupby(segment).first().values
+        new_snapshots = snapshots[first]
+        representative = pd.Series(new_snapshots[segment], index=snapshots)
+        new_weightings = weightings.groupby(segment).sum().set_axis(new_snapshots)
+        series = {}
+        for c in n.iterate_components():
+            for attr, df in c.pnl.items():
+                if not df.empty:
+                    series[c.list_name, attr] = df.loc[snapshots].groupby(segment).mean().set_axis(new_snapshots)
+    else:
+        days = representative_days(normalize(original), periods)
+        dates = snapshots.normalize()
+        hour = pd.Series(np.arange(len(snapshots)), index=snapshots).groupby(dates).cumcount().values
+        first = pd.Series(np.arange(len(snapshots)), index=dates).groupby(level=0).first()
+        representative = pd.Series(snapshots[first[days.loc[dates].values].values + hour], index=snapshots)
+        new_snapshots = snapshots[np.isin(dates, days.unique())]
+        counts = days.value_counts()
+        new_weightings = weightings.loc[new_snapshots].copy()
+        for column in ['objective', 'generators']:
+            new_weightings[column] *= counts.loc[new_snapshots.normalize()].values
+        series = {}
+
+    aggregated = clustering_features(n).loc[snapshots]
+    if method == 'segments':
+        aggregated = aggregated.groupby(segment).mean().set_axis(new_snapshots)
+    aggregated = aggregated.loc[representative.values].set_axis(snapshots)
+    report = aggregation_error(original, aggregated, weightings.generators)
+
+    n.set_snapshots(new_snapshots)
+    for (list_name, attr), df in series.items():
+        getattr(n, list_name + '_t')[attr] = df
+    n.snapshot_weightings = new_weightings
+
+    logger.info(f"Aggregated {len(snapshots)} snapshots to {len(new_snapshots)} snapshots ({method}):\n{report}")
+    return report